@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api.metrics import instrument_serializers, metrics_settings
+        if metrics_settings()['ENABLED']:
+            instrument_serializers()
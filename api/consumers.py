@@ -0,0 +1,30 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from api.events import user_group
+
+
+class EventConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes the authenticated user's events as `{"type": <event>, "data": {...}}`:
+    message.created, custom_offer.updated and order.updated. Connections without a valid
+    JWT are rejected. Clients may send `{"type": "ping"}` to keep idle connections open.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.group = user_group(user.pk)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if getattr(self, 'group', None):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def user_event(self, event):
+        await self.send_json({'type': event['event'], 'data': event['data']})
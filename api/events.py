@@ -0,0 +1,41 @@
+import json
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """ Channel layer group holding every WebSocket connection of a user """
+    return f"user.{user_id}"
+
+
+def send_event(user_ids, event, data):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id in user_ids:
+        try:
+            async_to_sync(channel_layer.group_send)(user_group(user_id), {
+                'type': 'user.event',
+                'event': event,
+                'data': data,
+            })
+        except Exception as e:
+            logger.error(f"Failed to publish {event} to user {user_id}: {str(e)}")
+
+
+def publish_event(user_ids, event, data):
+    """
+    Push an event to the users' WebSocket connections (api.consumers.EventConsumer) once the current
+    transaction commits, so clients never see rows that were rolled back. `data` is usually serializer
+    output; it is converted to plain JSON types here because channel layers (msgpack for Redis) cannot
+    carry Decimal, UUID or datetime values.
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id})
+    data = json.loads(json.dumps(data, cls=JSONEncoder))
+    transaction.on_commit(lambda: send_event(user_ids, event, data))
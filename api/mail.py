@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import connection, transaction
+from api.models import OutboundEmail
+
+
+OUTBOX_CHANNEL = 'outbound_email'
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    """
+    Summary:
+        Queue an email instead of sending it inside the request.
+
+    Description:
+        Takes the same arguments as django.core.mail.send_mail. The row is written in the caller's
+        transaction, so it is only delivered if that transaction commits. Once committed, idle
+        send_queued_mail workers are woken with a Postgres NOTIFY.
+
+    Returns:
+        OutboundEmail: The queued email.
+    """
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=[recipient for recipient in recipient_list if recipient],
+    )
+    transaction.on_commit(notify_workers)
+    return email
+
+
+def queue_mass_mail(datatuple):
+    """
+    Summary:
+        Queue several emails with one INSERT.
+
+    Description:
+        Bulk version of queue_mail, datatuple is shaped like for django.core.mail.send_mass_mail:
+        (subject, message, from_email, recipient_list) tuples.
+
+    Returns:
+        list: The queued OutboundEmail rows.
+    """
+    emails = OutboundEmail.objects.bulk_create([
+        OutboundEmail(
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=[recipient for recipient in recipient_list if recipient],
+        )
+        for subject, message, from_email, recipient_list in datatuple
+    ])
+    if emails:
+        transaction.on_commit(notify_workers)
+    return emails
+
+
+def notify_workers():
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"NOTIFY {OUTBOX_CHANNEL}")
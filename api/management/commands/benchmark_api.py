@@ -0,0 +1,244 @@
+import json
+import math
+import subprocess
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.metrics import RequestMetrics
+from job.cache import bump_catalog_version
+from job.models import Job
+from messaging.models import Message
+from order.models import Cart, CartItem, Order
+from users.models import User
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """ Nearest-rank percentile """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values):
+    return {
+        **{f"p{pct}": round(percentile(values, pct), 3) for pct in PERCENTILES},
+        'mean': round(sum(values) / len(values), 3),
+        'min': round(min(values), 3),
+        'max': round(max(values), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the API hot paths through the Django test client and record p50/p95/p99 latency and query '
+        'counts as a JSON baseline. Runs with DEBUG off, in a transaction that is rolled back, so checkout does not '
+        'change data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Only run these scenarios (repeatable)')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON results')
+        parser.add_argument('--compare', help='Baseline JSON to compare against')
+        parser.add_argument('--threshold', type=float, default=10, help='Latency increase (percent) reported as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a regression is found')
+        parser.add_argument('--warm-cache', action='store_true', help='Let anonymous catalog requests hit the response cache')
+        parser.add_argument('--keyword', default='website', help='Keyword for the job and freelancer searches')
+        parser.add_argument('--user', help='Email of the buyer to benchmark as (defaults to the busiest inbox)')
+        parser.add_argument('--host', default='127.0.0.1', help='Host header, must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.client = Client(SERVER_NAME=options['host'], raise_request_exception=False)
+        self.prepare_fixtures()
+
+        scenarios = self.scenarios()
+        unknown = set(options['scenarios'] or []) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}. Available: {', '.join(scenarios)}")
+
+        results = {}
+        # DEBUG would record every query in connection.queries and let debug_toolbar instrument the requests,
+        # since the test client's REMOTE_ADDR is in INTERNAL_IPS, so measure with it off as in production
+        with override_settings(DEBUG=False), transaction.atomic():
+            for name, scenario in scenarios.items():
+                if options['scenarios'] and name not in options['scenarios']:
+                    continue
+                results[name] = self.run(name, scenario)
+            transaction.set_rollback(True)
+
+        report = {'meta': self.meta(), 'scenarios': results}
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def prepare_fixtures(self):
+        if self.options['user']:
+            self.buyer = User.objects.filter(email=self.options['user']).first()
+            if self.buyer is None:
+                raise CommandError(f"No user with email {self.options['user']}")
+        else:
+            busiest = (
+                Message.objects.values('receiver').annotate(total=Count('id'))
+                .order_by('-total').values_list('receiver', flat=True).first()
+            )
+            self.buyer = User.objects.filter(pk=busiest).first() or User.objects.order_by('id').first()
+        if self.buyer is None:
+            raise CommandError("The database is empty, run generate_data first")
+
+        self.jobs = list(
+            Job.objects.exclude(created_by=self.buyer)
+            .order_by('-order_count', '-id').values_list('id', flat=True)[:20]
+        )
+        if not self.jobs:
+            raise CommandError("No jobs to benchmark, run generate_data first")
+
+        token = RefreshToken.for_user(self.buyer).access_token
+        self.auth = {'Authorization': f"{jwt_settings.AUTH_HEADER_TYPES[0]} {token}"}
+
+    def scenarios(self):
+        """
+        Each scenario returns (method, path, payload, authenticated, catalog). Scenario functions get the
+        iteration number and may create rows they need, that setup is not timed.
+        """
+        keyword = self.options['keyword']
+        job_id = self.jobs[0]
+
+        def cart_with_items(iteration, size=3):
+            cart = Cart.objects.create(user=self.buyer)
+            CartItem.objects.bulk_create([
+                CartItem(cart=cart, job_id=job, quantity=1)
+                for job in self.jobs[iteration % len(self.jobs):][:size] or self.jobs[:size]
+            ])
+            return cart
+
+        return {
+            'job_list': lambda i: ('get', '/api/v1/jobs/', {}, False, True),
+            'job_list_cursor': lambda i: ('get', '/api/v1/jobs/', {'pagination': 'cursor'}, False, True),
+            'job_retrieve': lambda i: ('get', f'/api/v1/jobs/{job_id}/', {}, False, True),
+            'job_search': lambda i: ('get', '/api/v1/jobs/search/', {'keyword': keyword, 'sort_by': 'rating_desc'}, False, True),
+            'category_list': lambda i: ('get', '/api/v1/categories/', {}, False, True),
+            'cart_add_item': lambda i: (
+                'post', f'/api/v1/carts/{Cart.objects.create(user=self.buyer).pk}/items/',
+                {'job_id': self.jobs[i % len(self.jobs)], 'quantity': 1}, True, False
+            ),
+            'cart_retrieve': lambda i: ('get', f'/api/v1/carts/{cart_with_items(i).pk}/', {}, True, False),
+            'checkout': lambda i: ('post', '/api/v1/orders/', {'cart_id': str(cart_with_items(i).pk)}, True, False),
+            'order_list': lambda i: ('get', '/api/v1/orders/', {}, True, False),
+            'inbox': lambda i: ('get', '/api/v1/message/inbox/', {}, True, False),
+            'freelancer_search': lambda i: ('get', '/api/v1/profiles/search/', {'keyword': keyword}, False, False),
+        }
+
+    def request(self, method, path, payload, authenticated):
+        headers = self.auth if authenticated else {}
+        if method == 'get':
+            return self.client.get(path, payload, headers=headers)
+        return self.client.generic(
+            method.upper(), path, json.dumps(payload), content_type='application/json', headers=headers
+        )
+
+    def run(self, name, scenario):
+        durations = []
+        queries = []
+        statuses = {}
+
+        for iteration in range(self.options['warmup'] + self.options['iterations']):
+            method, path, payload, authenticated, catalog = scenario(iteration)
+            if catalog and not self.options['warm_cache']:
+                bump_catalog_version()
+
+            metrics = RequestMetrics()
+            with connection.execute_wrapper(metrics.record_query):
+                start = time.perf_counter()
+                response = self.request(method, path, payload, authenticated)
+                duration = (time.perf_counter() - start) * 1000
+
+            if iteration < self.options['warmup']:
+                continue
+            durations.append(duration)
+            queries.append(metrics.queries)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        result = {
+            'method': method.upper(),
+            'path': path,
+            'iterations': len(durations),
+            'status_codes': statuses,
+            'latency_ms': summarize(durations),
+            'queries': summarize(queries),
+        }
+        latency = result['latency_ms']
+        line = (
+            f"{name:<20} p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms"
+            f"  queries {result['queries']['max']:>4.0f}  status {statuses}"
+        )
+        failed = any(not code.startswith(('2', '3')) for code in statuses)
+        self.stdout.write(self.style.ERROR(line) if failed else line)
+        return result
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': self.options['iterations'],
+            'warm_cache': self.options['warm_cache'],
+            'dataset': {
+                'users': User.objects.count(),
+                'jobs': Job.objects.count(),
+                'orders': Order.objects.count(),
+                'messages': Message.objects.count(),
+            },
+        }
+
+    def compare(self, report, baseline_path):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read baseline {baseline_path}: {str(e)}")
+
+        self.stdout.write(f"\nCompared with {baseline_path} (commit {baseline['meta'].get('commit')})")
+        regressions = []
+        for name, result in report['scenarios'].items():
+            previous = baseline['scenarios'].get(name)
+            if previous is None:
+                self.stdout.write(f"{name:<20} new scenario")
+                continue
+            changes = []
+            for pct in PERCENTILES:
+                key = f"p{pct}"
+                before, after = previous['latency_ms'][key], result['latency_ms'][key]
+                change = (after - before) / before * 100 if before else 0
+                changes.append(f"{key} {change:+6.1f}%")
+                if change > self.options['threshold']:
+                    regressions.append(f"{name} {key} {before}ms -> {after}ms")
+            before, after = previous['queries']['max'], result['queries']['max']
+            if after > before:
+                regressions.append(f"{name} queries {before:.0f} -> {after:.0f}")
+            self.stdout.write(f"{name:<20} {'  '.join(changes)}  queries {before:.0f} -> {after:.0f}")
+
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+            return
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(f"Regression: {regression}"))
+        if self.options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} regressions over the baseline")
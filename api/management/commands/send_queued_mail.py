@@ -0,0 +1,121 @@
+import logging
+import select
+import time
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from api.mail import OUTBOX_CHANNEL
+from api.models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound emails over a single SMTP connection, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails claimed per transaction')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before an email is marked FAILED')
+        parser.add_argument('--backoff', type=int, default=30, help='Base retry delay in seconds, doubled per attempt')
+        parser.add_argument('--max-backoff', type=int, default=3600, help='Upper bound for the retry delay in seconds')
+        parser.add_argument('--poll-interval', type=int, default=10, help='Seconds to wait for new mail when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit (for cron)')
+
+    def handle(self, *args, **options):
+        self.options = options
+        smtp = get_connection()
+        self.listen()
+
+        try:
+            while True:
+                sent = self.drain(smtp)
+                if sent:
+                    self.stdout.write(f"Processed {sent} emails")
+                if options['once']:
+                    break
+                if not sent:
+                    self.wait(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            smtp.close()
+
+    def drain(self, smtp):
+        total = 0
+        while True:
+            processed = self.process_batch(smtp)
+            if not processed:
+                return total
+            total += processed
+
+    def process_batch(self, smtp):
+        """ Claim a batch of due emails, skipping rows locked by other workers, and deliver them """
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at')[:self.options['batch_size']]
+            )
+            if not emails:
+                return 0
+
+            # Keep the connection open across the batch, send_messages only closes connections it opened
+            try:
+                smtp.open()
+            except Exception as e:
+                logger.error(f"Failed to connect to the mail server: {str(e)}")
+            for email in emails:
+                self.deliver(smtp, email)
+
+            OutboundEmail.objects.bulk_update(emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+        return len(emails)
+
+    def deliver(self, smtp, email):
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipients,
+            connection=smtp,
+        )
+        email.attempts += 1
+        try:
+            smtp.send_messages([message])
+        except Exception as e:
+            logger.error(f"Failed to send email {email.id} (attempt {email.attempts}): {str(e)}")
+            email.last_error = str(e)
+            if email.attempts >= self.options['max_attempts']:
+                email.status = OutboundEmail.FAILED
+            else:
+                delay = min(self.options['backoff'] * 2 ** (email.attempts - 1), self.options['max_backoff'])
+                email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            # The connection may be broken, reconnect for the rest of the batch
+            smtp.close()
+            try:
+                smtp.open()
+            except Exception as e:
+                logger.error(f"Failed to reconnect to the mail server: {str(e)}")
+            return
+
+        email.status = OutboundEmail.SENT
+        email.sent_at = timezone.now()
+        email.last_error = ''
+
+    def listen(self):
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {OUTBOX_CHANNEL}")
+
+    def wait(self, timeout):
+        """ Sleep until queue_mail sends a NOTIFY or the poll interval elapses """
+        if connection.vendor != 'postgresql':
+            time.sleep(timeout)
+            return
+        pg_connection = connection.connection
+        if select.select([pg_connection], [], [], timeout)[0]:
+            pg_connection.poll()
+            pg_connection.notifies.clear()
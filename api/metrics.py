@@ -0,0 +1,172 @@
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from rest_framework import serializers
+
+
+# Upper bounds (seconds) of the request latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def metrics_settings():
+    return {
+        'ENABLED': True,
+        'QUERY_BUDGETS': {},
+        'RAISE_ON_BUDGET': False,
+        **getattr(settings, 'REQUEST_METRICS', {}),
+    }
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    """ Measurements for a single request, collected by api.middleware.RequestMetricsMiddleware """
+
+    def __init__(self):
+        self.endpoint = 'unmatched'
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_sql_time = 0.0
+        self.serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        """ connection.execute_wrapper hook """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += duration
+            if self.serializing:
+                self.serializer_sql_time += duration
+
+    @property
+    def serializer_own_time(self):
+        """ Serializer time without the lazy queries it triggered """
+        return max(self.serializer_time - self.serializer_sql_time, 0.0)
+
+
+class MetricsRegistry:
+    """ Per-process aggregate of request metrics, keyed by endpoint (ViewSet.action) """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, metrics, duration, response_size, status_code, budget_exceeded):
+        with self.lock:
+            stats = self.endpoints.get(metrics.endpoint)
+            if stats is None:
+                stats = self.endpoints[metrics.endpoint] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'duration_seconds': 0.0,
+                    'max_duration_seconds': 0.0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'sql_seconds': 0.0,
+                    'serializer_seconds': 0.0,
+                    'response_bytes': 0,
+                    'budget_exceeded': 0,
+                    'latency_buckets': [0] * len(LATENCY_BUCKETS),
+                }
+            stats['requests'] += 1
+            stats['errors'] += status_code >= 500
+            stats['duration_seconds'] += duration
+            stats['max_duration_seconds'] = max(stats['max_duration_seconds'], duration)
+            stats['queries'] += metrics.queries
+            stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+            stats['sql_seconds'] += metrics.sql_time
+            stats['serializer_seconds'] += metrics.serializer_own_time
+            stats['response_bytes'] += response_size
+            stats['budget_exceeded'] += budget_exceeded
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats['latency_buckets'][index] += 1
+                    break
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in self.endpoints.items():
+                requests = stats['requests']
+                endpoints[endpoint] = {
+                    **stats,
+                    'latency_buckets': dict(zip(map(str, LATENCY_BUCKETS), stats['latency_buckets'])),
+                    'avg_duration_seconds': stats['duration_seconds'] / requests,
+                    'avg_queries': stats['queries'] / requests,
+                    'query_budget': metrics_settings()['QUERY_BUDGETS'].get(endpoint),
+                }
+            return endpoints
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+
+registry = MetricsRegistry()
+
+
+def render_prometheus(endpoints):
+    """ Render a registry snapshot in the Prometheus text exposition format """
+    counters = [
+        ('onesix_requests_total', 'requests', 'Requests handled'),
+        ('onesix_request_errors_total', 'errors', 'Requests that returned a 5xx response'),
+        ('onesix_db_queries_total', 'queries', 'Database queries executed'),
+        ('onesix_db_seconds_total', 'sql_seconds', 'Time spent executing SQL'),
+        ('onesix_serializer_seconds_total', 'serializer_seconds', 'Time spent serializing, excluding SQL'),
+        ('onesix_response_bytes_total', 'response_bytes', 'Response body bytes'),
+        ('onesix_query_budget_exceeded_total', 'budget_exceeded', 'Requests that exceeded their query budget'),
+    ]
+    lines = []
+    for name, key, description in counters:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} counter')
+        for endpoint, stats in endpoints.items():
+            lines.append(f'{name}{{endpoint="{endpoint}"}} {stats[key]}')
+
+    name = 'onesix_request_duration_seconds'
+    lines.append(f'# HELP {name} Request latency')
+    lines.append(f'# TYPE {name} histogram')
+    for endpoint, stats in endpoints.items():
+        cumulative = 0
+        for bound, count in stats['latency_buckets'].items():
+            cumulative += count
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {stats["requests"]}')
+        lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {stats["duration_seconds"]}')
+        lines.append(f'{name}_count{{endpoint="{endpoint}"}} {stats["requests"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def instrument_serializers():
+    """
+    Time serializer.data for the request being measured. Serializer and ListSerializer both resolve
+    their data through BaseSerializer.data, so wrapping it covers every serializer; nested calls are
+    only counted once.
+    """
+    fget = serializers.BaseSerializer.data.fget
+    if getattr(fget, 'instrumented', False):
+        return
+
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return fget(self)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    data.instrumented = True
+    serializers.BaseSerializer.data = property(data)
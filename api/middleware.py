@@ -0,0 +1,121 @@
+import logging
+import time
+from contextlib import ExitStack
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from api.metrics import RequestMetrics, QueryBudgetExceeded, current_metrics, metrics_settings, registry
+
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_name(view_func):
+    """ Name of the DRF view class, or module.function for plain Django views """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    return view_class.__name__
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-request query count, SQL time, serializer time and response size, tagged by DRF
+    view and action. Adds a Server-Timing header, aggregates into api.metrics.registry (served by
+    /api/v1/metrics/) and enforces REQUEST_METRICS['QUERY_BUDGETS'].
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = metrics_settings()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration = time.perf_counter() - start
+
+        response_size = 0 if response.streaming else len(response.content)
+        budget = config['QUERY_BUDGETS'].get(metrics.endpoint)
+        budget_exceeded = budget is not None and metrics.queries > budget
+
+        registry.record(metrics, duration, response_size, response.status_code, budget_exceeded)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{metrics.queries} queries";dur={metrics.sql_time * 1000:.2f}',
+            f'serializer;dur={metrics.serializer_own_time * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
+
+        if budget_exceeded:
+            message = f"{metrics.endpoint} ran {metrics.queries} queries, over its budget of {budget} ({request.path})"
+            if config['RAISE_ON_BUDGET']:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return None
+        name = endpoint_name(view_func)
+        actions = getattr(view_func, 'actions', None)
+        if actions:
+            action = actions.get(request.method.lower(), request.method.lower())
+        elif getattr(view_func, 'cls', None) is not None:
+            action = request.method.lower()
+        else:
+            action = None
+        metrics.endpoint = f"{name}.{action}" if action else name
+        return None
+
+
+@database_sync_to_async
+def get_jwt_user(raw_token):
+    if not raw_token:
+        return AnonymousUser()
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Sets scope['user'] for WebSocket connections from a SimpleJWT access token. Browsers cannot set
+    headers on WebSocket requests, so the token is read from `?token=` as well as from the usual
+    `Authorization: JWT <token>` header.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await get_jwt_user(self.get_raw_token(scope))
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if token:
+            return token[0]
+        header = dict(scope.get('headers', [])).get(b'authorization', b'').decode().split()
+        if len(header) == 2 and header[0] in jwt_settings.AUTH_HEADER_TYPES:
+            return header[1]
+        return None
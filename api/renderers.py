@@ -0,0 +1,15 @@
+from rest_framework.renderers import BaseRenderer
+from api.metrics import render_prometheus
+
+
+class PrometheusRenderer(BaseRenderer):
+    """ Renders an api.metrics registry snapshot for Prometheus scrapers (?format=prometheus) """
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = renderer_context.get('response') if renderer_context else None
+        if response is not None and response.exception:
+            return str(data)
+        return render_prometheus(data)
@@ -0,0 +1,47 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_query_list(request, param):
+    """ Parse a comma separated query param such as ?fields=id,name into a set """
+    if request is None:
+        return set()
+    query_params = getattr(request, 'query_params', request.GET)
+    return {
+        value.strip()
+        for raw in query_params.getlist(param)
+        for value in raw.split(',')
+        if value.strip()
+    }
+
+
+class SparseFieldsetMixin:
+    """
+    Lets read requests shape the response:
+     - ?fields=id,name returns only the listed fields
+     - ?expand=created_by replaces a field with the serializer declared in Meta.expandable_fields
+    Only the root serializer (or the child of a root list serializer) is affected, nested
+    serializers keep their fields.
+    """
+
+    def is_root_serializer(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self.is_root_serializer():
+            return fields
+
+        expandable_fields = getattr(self.Meta, 'expandable_fields', {})
+        for name in parse_query_list(request, 'expand') & set(expandable_fields):
+            serializer_class, kwargs = expandable_fields[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        only = parse_query_list(request, 'fields')
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
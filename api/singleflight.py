@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key: the first caller (the leader) computes the result and
+    every caller arriving while it runs waits for it and gets the same object back, so a burst of identical
+    requests costs one computation per process.
+
+    do() is for threads (WSGI workers, and sync views under ASGI, which Django runs in worker threads),
+    ado() for coroutines on the server's event loop, see job.middleware.CatalogFlightMiddleware. A result of
+    None is never shared: when the leader fails, returns None or takes longer than `timeout`, waiting callers
+    compute their own result.
+    """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.timeout) and call.result is not None:
+                return call.result
+            return function()
+
+        try:
+            call.result = function()
+            return call.result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, function):
+        """ Like do(), for a coroutine function; callers must share one event loop """
+        future = self._futures.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                result = None
+            if result is not None:
+                return result
+            return await function()
+
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await function()
+            return result
+        finally:
+            del self._futures[key]
+            # Also on errors and cancellation, waiting callers then compute their own result
+            future.set_result(result)
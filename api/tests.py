@@ -1,3 +1,120 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from uuid import UUID
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.events import publish_event
+from api.singleflight import SingleFlight
+from onesix.asgi import application
 
-# Create your tests here.
+
+User = get_user_model()
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_the_leader_result(self):
+        flight = SingleFlight(timeout=5)
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return object()
+
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', compute)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', compute))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        # Give the followers time to reach do() while the leader is still computing
+        time.sleep(0.2)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_none_and_errors_are_not_shared(self):
+        flight = SingleFlight(timeout=5)
+        self.assertIsNone(flight.do('key', lambda: None))
+        with self.assertRaises(ValueError):
+            flight.do('key', lambda: int('x'))
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+    async def test_concurrent_coroutines_share_the_leader_result(self):
+        flight = SingleFlight(timeout=5)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return object()
+
+        results = await asyncio.gather(*(flight.ado('key', compute) for _ in range(4)))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class EventConsumerTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(email='alice@example.com', password='Test@123')
+        self.bob = User.objects.create_user(email='bob@example.com', password='Test@123')
+
+    def token(self, user):
+        return str(RefreshToken.for_user(user).access_token)
+
+    async def connect(self, path='/ws/events/', headers=None):
+        communicator = WebsocketCommunicator(application, path, headers=headers or [])
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_token_in_query_string_or_header_is_accepted(self):
+        communicator, connected, _ = await self.connect(f'/ws/events/?token={self.token(self.alice)}')
+        self.assertTrue(connected)
+        await communicator.send_json_to({'type': 'ping'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong'})
+        await communicator.disconnect()
+
+        communicator, connected, _ = await self.connect(headers=[(b'authorization', f'JWT {self.token(self.alice)}'.encode())])
+        self.assertTrue(connected)
+        await communicator.disconnect()
+
+    async def test_invalid_or_missing_token_is_rejected(self):
+        for path in ['/ws/events/?token=not-a-token', '/ws/events/']:
+            communicator, connected, code = await self.connect(path)
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+
+    async def test_events_reach_every_connection_of_the_user_after_commit(self):
+        first, _, _ = await self.connect(f'/ws/events/?token={self.token(self.alice)}')
+        second, _, _ = await self.connect(f'/ws/events/?token={self.token(self.alice)}')
+        other, _, _ = await self.connect(f'/ws/events/?token={self.token(self.bob)}')
+
+        @database_sync_to_async
+        def publish(commit):
+            with transaction.atomic():
+                publish_event([self.alice.pk], 'order.updated', {'id': 1, 'cart': UUID(int=1)})
+                transaction.set_rollback(not commit)
+
+        await publish(commit=False)
+        self.assertTrue(await first.receive_nothing())
+
+        await publish(commit=True)
+        expected = {'type': 'order.updated', 'data': {'id': 1, 'cart': str(UUID(int=1))}}
+        self.assertEqual(await first.receive_json_from(), expected)
+        self.assertEqual(await second.receive_json_from(), expected)
+        self.assertTrue(await other.receive_nothing())
+
+        for communicator in (first, second, other):
+            await communicator.disconnect()
@@ -1,10 +1,10 @@
 from django.urls import path, include
 from rest_framework_nested import routers
 from job.views import JobViewSet, CategoryViewSet, ReviewViewSet, JobImageViewSet, JobPriceViewSet
-from order.views import CartViewSet, CartItemViewSet, OrderDeliveryViewSet, OrderViewSet, initiate_payment, payment_success, payment_fail, payment_cancel
+from order.views import CartViewSet, CartItemViewSet, DeliveryUploadViewSet, OrderDeliveryViewSet, OrderViewSet, initiate_payment, payment_success, payment_fail, payment_cancel
 from users.views import UserProfileViewSet, PortfolioViewSet
-from messaging.views import MessageViewSet, CustomOfferViewSet
-from api.views import ContactView
+from messaging.views import MessageViewSet, CustomOfferViewSet, ConversationViewSet
+from api.views import ContactView, MetricsView
 
 
 # Main router
@@ -19,7 +19,9 @@ router.register('profiles', UserProfileViewSet, basename='profiles')
 router.register('portfolio', PortfolioViewSet, basename='portfolio')
 router.register('message', MessageViewSet, basename='message')
 router.register('custom-offers', CustomOfferViewSet, basename='custom-offers')
+router.register('conversations', ConversationViewSet, basename='conversations')
 router.register('deliveries', OrderDeliveryViewSet, basename='deliveries')
+router.register('delivery-uploads', DeliveryUploadViewSet, basename='delivery-uploads')
 
 # nested router
 job_router = routers.NestedDefaultRouter(router, 'jobs', lookup='job')
@@ -48,4 +50,5 @@ urlpatterns = [
     path('payment/fail/', payment_fail, name='payment-fail'),
     path('payment/cancel/', payment_cancel, name='payment-cancel'),
     path("contact/", ContactView.as_view(), name="contact"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
\ No newline at end of file
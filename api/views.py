@@ -1,7 +1,11 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from api.mail import queue_mail
+from api.metrics import registry
+from api.renderers import PrometheusRenderer
 from django.conf import settings
 
 
@@ -18,7 +22,7 @@ class ContactView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        send_mail(
+        queue_mail(
             subject=f"[Contact] {subject}",
             message=f"Name: {name}\nEmail: {email}\n\nMessage:\n{message}",
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -26,3 +30,16 @@ class ContactView(APIView):
         )
 
         return Response({"success": "Message sent successfully!"}, status=status.HTTP_200_OK)
+
+
+
+class MetricsView(APIView):
+    """
+    Aggregated request metrics of this server process, per endpoint.
+    JSON by default, Prometheus text with ?format=prometheus.
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [JSONRenderer, PrometheusRenderer]
+
+    def get(self, request):
+        return Response(registry.snapshot())
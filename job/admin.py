@@ -4,7 +4,7 @@ from job.models import Category, JobPrice, Job, JobImage, Review
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'description']
+    list_display = ['name', 'description', 'job_count']
     search_fields = ['name']
 
 
@@ -19,6 +19,7 @@ class JobAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'created_by', 'duration_days', 'average_rating', 'total_orders']
     list_filter = ['category', 'created_by']
     search_fields = ['name', 'description']
+    readonly_fields = ['rating_sum', 'rating_count', 'average_rating', 'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count', 'order_count']
 
 
 @admin.register(JobImage)
@@ -29,6 +30,6 @@ class JobImageAdmin(admin.ModelAdmin):
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
-    list_display = ['job', 'user', 'ratings', 'created_at']
-    list_filter = ['job', 'user', 'ratings']
+    list_display = ['job', 'user', 'ratings', 'reviewer_role', 'created_at']
+    list_filter = ['job', 'user', 'ratings', 'reviewer_role']
     search_fields = ['comment', 'job__name', 'user__email']
\ No newline at end of file
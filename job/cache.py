@@ -0,0 +1,134 @@
+import hashlib
+import time
+from functools import wraps
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from api.singleflight import SingleFlight
+
+
+CATALOG_STATE_KEY = 'job:catalog:state'
+
+# Identical anonymous requests that miss the cache at the same time wait for one computation
+catalog_flight = SingleFlight(timeout=getattr(settings, 'CATALOG_COALESCE_TIMEOUT', 10))
+
+
+def catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_state():
+    """ Return the current catalog version and the time it was last changed """
+    cache = catalog_cache()
+    state = cache.get(CATALOG_STATE_KEY)
+    if state is None:
+        state = {'version': uuid4().hex, 'last_modified': time.time()}
+        # Another process may have initialised it first, keep theirs
+        if not cache.add(CATALOG_STATE_KEY, state, timeout=None):
+            state = cache.get(CATALOG_STATE_KEY, state)
+    return state
+
+
+def bump_catalog_version():
+    catalog_cache().set(
+        CATALOG_STATE_KEY,
+        {'version': uuid4().hex, 'last_modified': time.time()},
+        timeout=None
+    )
+
+
+def invalidate_catalog_cache(*args, **kwargs):
+    """
+    Invalidate every cached catalog response once the current transaction commits.
+    Usable directly as a post_save/post_delete receiver.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_cache_key(view, request, version):
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    lookup = view.kwargs.get(view.lookup_url_kwarg or view.lookup_field, '')
+    # Pagination links are absolute, so the host is part of the response, and the bytes depend on the media type
+    raw = f"{request.get_host()}:{request.accepted_media_type}:{view.basename}:{view.action}:{lookup}:{params}"
+    return f"job:catalog:{version}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def render_catalog_response(view, request, response):
+    """ Render the data of a view response once with the negotiated renderer, as a cache entry """
+    renderer = request.accepted_renderer
+    content_type = request.accepted_media_type
+    if renderer.charset:
+        content_type = f"{content_type}; charset={renderer.charset}"
+    content = renderer.render(response.data, request.accepted_media_type, view.get_renderer_context())
+    return {'content': content, 'content_type': content_type}
+
+
+def cache_catalog_response(view_func):
+    """
+    Cache anonymous catalog responses per view, action, media type and normalized query params.
+
+    Entries are keyed on the catalog version, which job.signals bumps whenever a job, price, image,
+    review, category or order item changes, so stale entries are never served and simply expire.
+    They hold the rendered bytes: concurrent identical misses are coalesced by catalog_flight, so one
+    request per process queries and serializes while the others wait and reuse its bytes.
+    Responses carry an ETag and Last-Modified and conditional requests are answered with 304.
+    The browsable API is rendered per request.
+    """
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        if request.user and request.user.is_authenticated:
+            return view_func(self, request, *args, **kwargs)
+        if isinstance(request.accepted_renderer, BrowsableAPIRenderer):
+            return view_func(self, request, *args, **kwargs)
+
+        cache = catalog_cache()
+        state = get_catalog_state()
+        key = catalog_cache_key(self, request, state['version'])
+        etag = 'W/' + quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+        if not_modified(request, etag, state['last_modified']):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            entry = cache.get(key)
+            if entry is None:
+                computed = {}
+
+                def compute():
+                    computed['response'] = view_func(self, request, *args, **kwargs)
+                    if computed['response'].status_code != status.HTTP_200_OK:
+                        return None
+                    rendered = render_catalog_response(self, request, computed['response'])
+                    cache.set(key, rendered, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+                    return rendered
+
+                entry = catalog_flight.do(key, compute)
+                if entry is None:
+                    # Not a 200, e.g. invalid search params: nothing to share, return this request's own response
+                    return computed['response']
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(state['last_modified'])
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
+    return wrapper
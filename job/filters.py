@@ -1,6 +1,6 @@
 from django_filters import rest_framework as filters
 from job.models import Job, Category
-from django.db.models import Avg, Q
+from job.services import JobSearchService
 
 
 class JobFilter(filters.FilterSet):
@@ -17,11 +17,7 @@ class JobFilter(filters.FilterSet):
         fields = ['keyword', 'category', 'min_price', 'max_price', 'min_rating', 'max_duration_days', 'creator_email']
 
     def filter_keyword(self, queryset, name, value):
-        return queryset.filter(
-            Q(name__icontains=value) |
-            Q(description__icontains=value) |
-            Q(category__name__icontains=value)
-        )
+        return JobSearchService.search(queryset, value)
 
     def filter_min_rating(self, queryset, name, value):
-        return queryset.annotate(avg_rating=Avg('reviews__ratings')).filter(avg_rating__gte=value)
\ No newline at end of file
+        return queryset.filter(average_rating__gte=value)
\ No newline at end of file
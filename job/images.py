@@ -0,0 +1,199 @@
+import math
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def image_settings():
+    return {
+        'STORAGE': 'job.images.LocalImageStorage',
+        # Uploads wait for the worker in this entry of STORAGES, under STAGING_PREFIX
+        'STAGING_STORAGE': 'default',
+        'STAGING_PREFIX': 'image_staging',
+        # name -> (width, height, mode), 'crop' fills the box, 'fit' keeps the whole image inside it
+        'DERIVATIVES': {
+            'thumbnail': (160, 120, 'crop'),
+            'card': (480, 360, 'crop'),
+            'full': (1600, 1600, 'fit'),
+        },
+        'FORMAT': 'WEBP',
+        'QUALITY': 80,
+        'MAX_ATTEMPTS': 3,
+        'CLAIM_TIMEOUT': 10 * 60,
+        **getattr(settings, 'IMAGE_PIPELINE', {}),
+    }
+
+
+def get_image_storage():
+    config = image_settings()
+    return import_string(config['STORAGE'])(config)
+
+
+def get_staging_storage():
+    return storages[image_settings()['STAGING_STORAGE']]
+
+
+class ImageStorage:
+    """ Where derivatives are published, save() returns the public URL of the stored file """
+
+    def __init__(self, config):
+        self.config = config
+
+    def save(self, name, data):
+        raise NotImplementedError
+
+    def delete(self, name):
+        raise NotImplementedError
+
+
+class LocalImageStorage(ImageStorage):
+    """ Files under MEDIA_ROOT served from MEDIA_URL, for development and tests """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.storage = FileSystemStorage()
+
+    def save(self, name, data):
+        self.storage.delete(name)
+        return self.storage.url(self.storage.save(name, ContentFile(data)))
+
+    def delete(self, name):
+        self.storage.delete(name)
+
+
+class CloudinaryImageStorage(ImageStorage):
+    """ Uploads to the Cloudinary account configured in settings, URLs point at its CDN """
+
+    def save(self, name, data):
+        import cloudinary.uploader
+        result = cloudinary.uploader.upload(BytesIO(data), public_id=os.path.splitext(name)[0], overwrite=True, resource_type='image')
+        return result['secure_url']
+
+    def delete(self, name):
+        import cloudinary.uploader
+        cloudinary.uploader.destroy(os.path.splitext(name)[0], resource_type='image')
+
+
+def resize(image, width, height, mode):
+    """ Scale down to the box, 'crop' fills it and cuts the overflow around the center """
+    if mode == 'crop':
+        return ImageOps.fit(image, (min(width, image.width), min(height, image.height)), Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.LANCZOS)
+    return resized
+
+
+def encode(image, image_format, quality):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
+
+
+def _encode83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _srgb_to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash(image, x_components=4, y_components=3):
+    """
+    BlurHash (https://blurha.sh) of an RGB image: a ~30 character placeholder clients decode into a
+    blurred preview while the derivative loads. Computed on a 32px copy, the hash only keeps the
+    lowest frequencies so the result is the same.
+    """
+    small = image.copy()
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(_srgb_to_linear(channel) for channel in pixel) for pixel in small.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                cos_y = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * cos_y
+                    pixel = pixels[y * width + x]
+                    red += basis * pixel[0]
+                    green += basis * pixel[1]
+                    blue += basis * pixel[2]
+            scale = 1 / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        quantised_max = max(0, min(82, math.floor(max(abs(value) for factor in ac for value in factor) * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode83(0, 1)
+    result += _encode83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        red, green, blue = (
+            max(0, min(18, math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5))) for value in factor
+        )
+        result += _encode83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
+
+
+def build_derivatives(source, prefix):
+    """
+    Summary:
+        Generate the configured derivatives of an image and publish them to the image storage.
+
+    Args:
+        source: A binary file object with the original image.
+        prefix: Storage path prefix, e.g. 'job_images/42'.
+
+    Returns:
+        dict: width, height and blurhash of the original and derivatives as
+            {name: {'name', 'url', 'width', 'height'}}.
+    """
+    config = image_settings()
+    storage = get_image_storage()
+    with Image.open(source) as original:
+        # Apply the EXIF orientation, phones store portrait photos rotated
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    extension = config['FORMAT'].lower()
+    derivatives = {}
+    for name, (width, height, mode) in config['DERIVATIVES'].items():
+        resized = resize(image, width, height, mode)
+        path = f"{prefix}/{name}.{extension}"
+        derivatives[name] = {
+            'name': path,
+            'url': storage.save(path, encode(resized, config['FORMAT'], config['QUALITY'])),
+            'width': resized.width,
+            'height': resized.height,
+        }
+    return {
+        'width': image.width,
+        'height': image.height,
+        'blurhash': blurhash(image),
+        'derivatives': derivatives,
+    }
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from job.services import RelatedJobService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the related jobs table from co-purchases, categories and TF-IDF over job names and descriptions. Run it periodically, e.g. nightly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help="Neighbours kept per job (RELATED_JOBS['TOP_K'] by default)")
+        parser.add_argument('--block-size', type=int, default=None, help="Jobs scored per matrix product (RELATED_JOBS['BLOCK_SIZE'] by default)")
+
+    def handle(self, *args, **options):
+        config = {}
+        if options['top_k'] is not None:
+            config['TOP_K'] = options['top_k']
+        if options['block_size'] is not None:
+            config['BLOCK_SIZE'] = options['block_size']
+
+        written = RelatedJobService.rebuild(config, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} related jobs"))
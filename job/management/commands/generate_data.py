@@ -0,0 +1,281 @@
+import random
+from array import array
+from bisect import bisect
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from uuid import uuid4
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from users.models import User
+from job.models import Category, JobPrice, Job, Review
+from order.models import Order, OrderItem
+from messaging.models import Message
+
+
+CATEGORIES = [
+    "Web Development", "Graphic Design", "Digital Marketing", "Content Writing", "Video Editing",
+    "Mobile Apps", "Data Science", "Translation", "Music & Audio", "Virtual Assistance",
+]
+SKILLS = [
+    "Python", "Django", "React", "JavaScript", "SEO", "Photoshop", "Illustrator", "Copywriting",
+    "Premiere Pro", "Flutter", "SQL", "Machine Learning", "WordPress", "Figma", "Excel",
+]
+LOCATIONS = [
+    "Dhaka, Bangladesh", "Chittagong, Bangladesh", "Lahore, Pakistan", "Mumbai, India", "Berlin, Germany",
+    "London, United Kingdom", "Lagos, Nigeria", "Manila, Philippines", "Austin, United States", "Toronto, Canada",
+]
+ADJECTIVES = ["professional", "modern", "responsive", "custom", "SEO friendly", "minimalist", "premium", "fast"]
+SERVICES = ["website", "logo", "landing page", "blog article", "promo video", "mobile app", "dashboard", "ad campaign"]
+
+# Review stars lean positive like on real marketplaces
+RATING_WEIGHTS = [(1, 3), (2, 4), (3, 10), (4, 28), (5, 55)]
+STATUS_WEIGHTS = [
+    (Order.COMPLETED, 55), (Order.DELIVERED, 10), (Order.IN_PROGRESS, 15),
+    (Order.PENDING, 12), (Order.CANCELED, 8),
+]
+
+
+class ZipfChooser:
+    """
+    Pick indexes in range(n) with probability proportional to 1 / (rank ** exponent), so a few
+    sellers, jobs and buyers account for most of the activity. Ranks are shuffled so popularity
+    is not correlated with primary keys.
+    """
+
+    def __init__(self, n, exponent, rng):
+        self.rng = rng
+        self.cum_weights = array('d', accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+        self.total = self.cum_weights[-1]
+        self.order = array('l', range(n))
+        rng.shuffle(self.order)
+
+    def __call__(self):
+        return self.order[bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset (users, jobs, reviews, orders, messages) with bulk_create for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--jobs', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=50000)
+        parser.add_argument('--orders', type=int, default=50000)
+        parser.add_argument('--messages', type=int, default=100000)
+        parser.add_argument('--seller-ratio', type=float, default=0.2, help='Share of users that sell jobs')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for seller, job and buyer popularity')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create statement')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible dataset')
+        parser.add_argument('--password', default='Test@123', help='Password of every generated user')
+        parser.add_argument('--skip-rebuild', action='store_true', help='Do not rebuild job and freelancer stats, order summaries, conversations and search vectors afterwards')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        # Unique per run so the command can be executed repeatedly against the same database
+        self.run_tag = uuid4().hex[:8]
+
+        started = timezone.now()
+        self.create_categories()
+        self.create_users()
+        self.create_jobs()
+        self.create_reviews()
+        self.create_orders()
+        self.create_messages()
+
+        if not options['skip_rebuild']:
+            # bulk_create skips the signals that maintain these columns
+            call_command('rebuild_job_stats', stdout=self.stdout)
+            call_command('rebuild_freelancer_stats', stdout=self.stdout)
+            call_command('rebuild_order_summaries', stdout=self.stdout)
+            call_command('rebuild_conversations', stdout=self.stdout)
+            if connection.vendor == 'postgresql':
+                call_command('rebuild_search_index', stdout=self.stdout)
+
+        elapsed = (timezone.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(f"Synthetic dataset {self.run_tag} generated in {elapsed:.1f}s"))
+
+    def bulk_insert(self, model, rows):
+        """
+        bulk_create an iterable of unsaved instances in chunks, one transaction per chunk.
+        Returns the primary keys of the created rows in insertion order.
+        """
+        label = model._meta.verbose_name_plural
+        ids = []
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                ids.extend(self.flush(chunk))
+                chunk = []
+                self.stdout.write(f"  {label}: {len(ids)}", ending='\r')
+        if chunk:
+            ids.extend(self.flush(chunk))
+        self.stdout.write(f"  {label}: {len(ids)}")
+        return ids
+
+    def flush(self, *chunks):
+        """ Insert the chunks (parents first) in one transaction """
+        with transaction.atomic():
+            for chunk in chunks:
+                if chunk:
+                    type(chunk[0]).objects.bulk_create(chunk, batch_size=self.chunk_size)
+        return [row.pk for row in chunks[0]]
+
+    def create_categories(self):
+        existing = set(Category.objects.values_list('name', flat=True))
+        Category.objects.bulk_create([
+            Category(name=name, description=f"{name} services")
+            for name in CATEGORIES if name not in existing
+        ])
+        self.category_ids = list(Category.objects.values_list('id', flat=True))
+
+    def create_users(self):
+        count = self.options['users']
+        password = make_password(self.options['password'])  # hashing is slow, share one hash
+        rng = self.rng
+
+        def rows():
+            for i in range(count):
+                yield User(
+                    email=f"synthetic-{self.run_tag}-{i}@example.com",
+                    password=password,
+                    first_name=f"User{i}",
+                    last_name="Synthetic",
+                    bio=f"{rng.choice(ADJECTIVES).capitalize()} freelancer working on {rng.choice(SERVICES)} projects",
+                    skills=rng.sample(SKILLS, rng.randint(1, 5)),
+                    location=rng.choice(LOCATIONS),
+                )
+
+        self.user_ids = array('l', self.bulk_insert(User, rows()))
+        sellers = max(1, int(len(self.user_ids) * self.options['seller_ratio']))
+        self.seller_ids = self.user_ids[:sellers]
+
+    def create_jobs(self):
+        count = self.options['jobs']
+        rng = self.rng
+        choose_seller = ZipfChooser(len(self.seller_ids), self.options['skew'], rng)
+
+        # One price row per job, Job.price is a protected FK
+        prices = [Decimal(rng.lognormvariate(4, 0.8)).quantize(Decimal('0.01')) + 5 for _ in range(count)]
+        price_ids = self.bulk_insert(JobPrice, (JobPrice(price=price) for price in prices))
+
+        creators = array('l', (self.seller_ids[choose_seller()] for _ in range(count)))
+        durations = array('l', (rng.choice((1, 2, 3, 3, 5, 7, 7, 14, 30)) for _ in range(count)))
+
+        names = []
+
+        def rows():
+            for i in range(count):
+                service = rng.choice(SERVICES)
+                names.append(f"I will build a {rng.choice(ADJECTIVES)} {service} #{i}")
+                yield Job(
+                    name=names[i],
+                    description=f"{rng.choice(SKILLS)} specialist delivering a {service} with {rng.randint(1, 5)} revisions.",
+                    price_id=price_ids[i],
+                    category_id=rng.choice(self.category_ids),
+                    created_by_id=creators[i],
+                    duration_days=durations[i],
+                )
+
+        self.job_ids = array('l', self.bulk_insert(Job, rows()))
+        self.job_creators = creators
+        self.job_durations = durations
+        self.job_prices = prices
+        self.job_names = names
+        self.choose_job = ZipfChooser(len(self.job_ids), self.options['skew'], rng)
+        self.choose_buyer = ZipfChooser(len(self.user_ids), self.options['skew'], rng)
+
+    def pick_buyer(self, seller_id):
+        buyer_id = self.user_ids[self.choose_buyer()]
+        while buyer_id == seller_id and len(self.user_ids) > 1:
+            buyer_id = self.user_ids[self.rng.randrange(len(self.user_ids))]
+        return buyer_id
+
+    def create_reviews(self):
+        rng = self.rng
+        ratings, weights = zip(*RATING_WEIGHTS)
+
+        def rows():
+            for _ in range(self.options['reviews']):
+                index = self.choose_job()
+                yield Review(
+                    job_id=self.job_ids[index],
+                    user_id=self.pick_buyer(self.job_creators[index]),
+                    ratings=rng.choices(ratings, weights)[0],
+                    reviewer_role=Review.BUYER,
+                    comment=rng.choice(["Great work!", "Fast delivery", "Would hire again", "Okay", "Not as described"]),
+                )
+
+        self.bulk_insert(Review, rows())
+
+    def create_orders(self):
+        rng = self.rng
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        today = timezone.now().date()
+        orders, items = [], []
+        created = 0
+
+        for _ in range(self.options['orders']):
+            picks = {self.choose_job() for _ in range(rng.choices((1, 2, 3), (70, 22, 8))[0])}
+            buyer_id = self.pick_buyer(self.job_creators[next(iter(picks))])
+            picks = [index for index in picks if self.job_creators[index] != buyer_id]
+            if not picks:
+                continue
+            status = rng.choices(statuses, weights)[0]
+            order = Order(
+                id=uuid4(),
+                user_id=buyer_id,
+                status=status,
+                is_completed=status == Order.COMPLETED,
+                deadline=today + timedelta(days=max(self.job_durations[index] for index in picks)),
+            )
+            total = Decimal(0)
+            for index in picks:
+                quantity = rng.choices((1, 2, 3), (85, 10, 5))[0]
+                price = self.job_prices[index]
+                items.append(OrderItem(
+                    order_id=order.id,
+                    job_id=self.job_ids[index],
+                    job_name=self.job_names[index],
+                    freelancer_id=self.job_creators[index],
+                    order_status=status,
+                    deadline=order.deadline,
+                    price=price,
+                    quantity=quantity,
+                    total_price=price * quantity,
+                ))
+                total += price * quantity
+            order.total_price = total
+            orders.append(order)
+
+            if len(orders) >= self.chunk_size:
+                created += len(self.flush(orders, items))
+                orders, items = [], []
+                self.stdout.write(f"  orders: {created}", ending='\r')
+        if orders:
+            created += len(self.flush(orders, items))
+        self.stdout.write(f"  orders: {created}")
+
+    def create_messages(self):
+        rng = self.rng
+
+        def rows():
+            for _ in range(self.options['messages']):
+                index = self.choose_job()
+                seller_id = self.job_creators[index]
+                buyer_id = self.pick_buyer(seller_id)
+                sender_id, receiver_id = (buyer_id, seller_id) if rng.random() < 0.5 else (seller_id, buyer_id)
+                yield Message(
+                    sender_id=sender_id,
+                    receiver_id=receiver_id,
+                    job_id=self.job_ids[index] if rng.random() < 0.6 else None,
+                    content=rng.choice(["Hi, is this still available?", "Sure, send me the details", "Here is the draft", "Thanks!"]),
+                )
+
+        self.bulk_insert(Message, rows())
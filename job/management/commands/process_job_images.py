@@ -0,0 +1,52 @@
+import select
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from job.services import IMAGE_CHANNEL, JobImageService
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail, card and full-size derivatives, dimensions and blurhash of pending job images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Images claimed per transaction')
+        parser.add_argument('--poll-interval', type=int, default=10, help='Seconds to wait for new images when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit (for cron and backfills)')
+
+    def handle(self, *args, **options):
+        self.listen()
+        try:
+            while True:
+                processed = self.drain(options['batch_size'])
+                if processed:
+                    self.stdout.write(f"Processed {processed} images")
+                if options['once']:
+                    break
+                if not processed:
+                    self.wait(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size):
+        total = 0
+        while True:
+            processed = JobImageService.process_batch(batch_size)
+            if not processed:
+                return total
+            total += processed
+
+    def listen(self):
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {IMAGE_CHANNEL}")
+
+    def wait(self, timeout):
+        """ Sleep until JobImageService.stage sends a NOTIFY or the poll interval elapses """
+        if connection.vendor != 'postgresql':
+            time.sleep(timeout)
+            return
+        pg_connection = connection.connection
+        if select.select([pg_connection], [], [], timeout)[0]:
+            pg_connection.poll()
+            pg_connection.notifies.clear()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from job.models import Job
+from job.services import JobStatsService
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized job stats (rating_sum, rating_count, average_rating, rating histogram, order_count) and category job counts in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Number of jobs updated per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(
+                Job.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += JobStatsService.rebuild(Job.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]))
+            last_id = ids[-1]
+
+        categories = JobStatsService.rebuild_category_counts()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {updated} jobs and {categories} categories"))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from job.services import TrendingService
+
+
+class Command(BaseCommand):
+    help = 'Add new orders, reviews and views to the time-decayed job trend scores and rebuild the trending leaderboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between two refreshes')
+        parser.add_argument('--once', action='store_true', help='Refresh once and exit (for cron)')
+        parser.add_argument('--rebuild', action='store_true', help='Recount recent orders and reviews from scratch first')
+
+    def handle(self, *args, **options):
+        rebuild = options['rebuild']
+        try:
+            while True:
+                result = TrendingService.refresh(rebuild=rebuild)
+                rebuild = False
+                self.stdout.write(
+                    f"Updated {result['jobs']} jobs ({result['views']} views), {result['leaderboard']} leaderboard entries"
+                )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,55 @@
+from django.conf import settings
+from job.cache import catalog_flight
+
+
+def catalog_flight_key(scope):
+    """ Key of an anonymous catalog read, None for requests that are not coalesced """
+    if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+        return None
+    if not scope['path'].startswith(tuple(getattr(settings, 'CATALOG_COALESCE_PATHS', ()))):
+        return None
+    headers = dict(scope.get('headers', []))
+    if b'authorization' in headers:
+        return None
+    query = scope.get('query_string', b'').decode()
+    return f"{scope['method']}:{headers.get(b'host', b'').decode()}:{scope['path']}?{query}:{headers.get(b'accept', b'').decode()}"
+
+
+class CatalogFlightMiddleware:
+    """
+    ASGI middleware coalescing identical anonymous catalog requests on the event loop.
+
+    The first request (the leader) goes through to Django while identical ones wait here, without a thread
+    or a database connection. When the leader was answered from the catalog cache (a 200 with the ETag
+    job.cache.cache_catalog_response sets), the waiting requests go through as well and are served from
+    the entry it left. Otherwise, or after CATALOG_COALESCE_TIMEOUT, they run on their own. Under WSGI,
+    cache_catalog_response coalesces the worker threads with catalog_flight.do() instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        key = catalog_flight_key(scope)
+        if key is None:
+            return await self.app(scope, receive, send)
+
+        sent = False
+
+        async def lead():
+            nonlocal sent
+            sent = True
+            cached = False
+
+            async def watch(message):
+                nonlocal cached
+                if message['type'] == 'http.response.start':
+                    cached = message['status'] == 200 and any(name == b'etag' for name, _ in message.get('headers', []))
+                await send(message)
+
+            await self.app(scope, receive, watch)
+            return True if cached else None
+
+        await catalog_flight.ado(key, lead)
+        if not sent:
+            await self.app(scope, receive, send)
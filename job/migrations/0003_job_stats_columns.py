@@ -0,0 +1,78 @@
+# Generated by Django 5.2 on 2026-10-17 03:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def populate_job_stats(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    Review = apps.get_model('job', 'Review')
+    OrderItem = apps.get_model('order', 'OrderItem')
+    ratings = Review.objects.filter(job=OuterRef('pk')).order_by().values('job')
+    rating_sum = Coalesce(
+        Subquery(ratings.annotate(total=Sum('ratings')).values('total'), output_field=IntegerField()),
+        Value(0)
+    )
+    rating_count = Coalesce(
+        Subquery(ratings.annotate(total=Count('id')).values('total'), output_field=IntegerField()),
+        Value(0)
+    )
+    Job.objects.update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        average_rating=Coalesce(
+            Cast(rating_sum, FloatField()) / Cast(NullIf(rating_count, 0), FloatField()),
+            Value(0.0)
+        ),
+        order_count=Coalesce(
+            Subquery(
+                OrderItem.objects.filter(job=OuterRef('pk')).order_by().values('job')
+                .annotate(total=Count('id')).values('total'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0002_alter_jobimage_image'),
+        ('order', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='average_rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='order_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['-average_rating', '-id'], name='job_job_average_4721dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['-order_count', '-id'], name='job_job_order_c_6ef125_idx'),
+        ),
+        migrations.RunPython(populate_job_stats, migrations.RunPython.noop),
+    ]
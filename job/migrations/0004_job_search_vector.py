@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-17 03:22
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    Category = apps.get_model('job', 'Category')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    creator_email = Subquery(User.objects.filter(pk=OuterRef('created_by_id')).values('email')[:1])
+    Job.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='english') +
+        SearchVector(category_name, weight='B', config='english') +
+        SearchVector('description', weight='C', config='english') +
+        SearchVector(creator_email, weight='D', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0003_job_stats_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_job_name_bb1d81_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='job_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='job_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
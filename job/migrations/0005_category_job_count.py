@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 03:26
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_job_count(apps, schema_editor):
+    Category = apps.get_model('job', 'Category')
+    Job = apps.get_model('job', 'Job')
+    Category.objects.update(job_count=Coalesce(
+        Subquery(
+            Job.objects.filter(category=OuterRef('pk')).order_by().values('category')
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0004_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_job_count, migrations.RunPython.noop),
+    ]
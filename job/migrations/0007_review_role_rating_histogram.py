@@ -0,0 +1,79 @@
+# Generated by Django 5.2 on 2026-10-17 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_reviewer_roles(apps, schema_editor):
+    Review = apps.get_model('job', 'Review')
+    OrderItem = apps.get_model('order', 'OrderItem')
+    Review.objects.filter(Exists(
+        OrderItem.objects.filter(job=OuterRef('job'), order__user=OuterRef('user'), order__is_completed=True)
+    )).update(reviewer_role='buyer')
+
+
+def populate_rating_histogram(apps, schema_editor):
+    Job = apps.get_model('job', 'Job')
+    Review = apps.get_model('job', 'Review')
+    ratings = Review.objects.filter(job=OuterRef('pk')).order_by().values('job')
+    Job.objects.update(**{
+        f"rating_{stars}_count": Coalesce(
+            Subquery(ratings.filter(ratings=stars).annotate(total=Count('id')).values('total'), output_field=IntegerField()),
+            Value(0)
+        )
+        for stars in range(1, 6)
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0006_job_image_derivatives'),
+        ('order', '0006_delivery_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='job_review_job_id_df24fd_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='reviewer_role',
+            field=models.CharField(choices=[('buyer', 'Buyer'), ('seller', 'Seller')], default='seller', editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['job', '-created_at', '-id'], name='review_job_recent_idx'),
+        ),
+        migrations.RunPython(populate_reviewer_roles, migrations.RunPython.noop),
+        migrations.RunPython(populate_rating_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0007_review_role_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('co_purchase_score', models.FloatField(default=0)),
+                ('content_score', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='job.job')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='job.job')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'rank'), name='related_job_rank_unique')],
+            },
+        ),
+    ]
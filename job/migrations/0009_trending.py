@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-17 04:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0008_related_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTrend',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='job.job')),
+                ('order_score', models.FloatField(default=0)),
+                ('review_score', models.FloatField(default=0)),
+                ('view_score', models.FloatField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('pending_views', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('landmark', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['created_at'], name='review_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobtrend',
+            index=models.Index(condition=models.Q(('pending_views__gt', 0)), fields=['job'], name='job_trend_pending_views_idx'),
+        ),
+        migrations.AddField(
+            model_name='trendingjob',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='job.category'),
+        ),
+        migrations.AddField(
+            model_name='trendingjob',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='job.job'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingjob',
+            index=models.Index(fields=['category', 'rank'], name='trending_job_rank_idx'),
+        ),
+    ]
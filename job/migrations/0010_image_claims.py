@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0009_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobimage',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobimage',
+            name='staged_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='jobimage',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='jobimage',
+            index=models.Index(condition=models.Q(('status', 'PROCESSING')), fields=['claimed_at'], name='job_image_processing_idx'),
+        ),
+    ]
@@ -3,11 +3,15 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from job.validators import validate_file_size
 from cloudinary.models import CloudinaryField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
+    # Maintained by job.signals
+    job_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -28,40 +32,167 @@ class Job(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="jobs")
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="created_jobs")
     duration_days = models.PositiveIntegerField(validators=[MinValueValidator(1)], help_text="Number of days required to complete the job") 
+    # Denormalized stats, maintained by job.services.JobStatsService
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    average_rating = models.FloatField(default=0, editable=False)
+    # Number of 1 to 5 star reviews
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    order_count = models.PositiveIntegerField(default=0, editable=False)
+    # Weighted full-text document, maintained by job.signals
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-id',]
         indexes = [
-            models.Index(fields=['name', 'description', 'category']),
+            GinIndex(fields=['search_vector'], name='job_search_vector_gin'),
+            GinIndex(fields=['name'], name='job_name_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['-average_rating', '-id']),
+            models.Index(fields=['-order_count', '-id']),
         ]
 
     def __str__(self):
         return self.name
-    
-    @property
-    def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.ratings for review in reviews) / reviews.count()
-        return 0
 
     @property
     def total_orders(self):
-        return self.order_items.count()
+        return self.order_count
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f"rating_{stars}_count") for stars in range(1, 6)}
 
 
 class JobImage(models.Model):
+    PENDING = 'PENDING'
+    PROCESSING = 'PROCESSING'
+    READY = 'READY'
+    FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='images')
     # image = models.ImageField(upload_to="jobs/images/", validators=[validate_file_size])
-    image = CloudinaryField('image')
+    # Original of images uploaded before derivatives existed, new uploads go through job.images
+    image = CloudinaryField('image', blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True, default='')
+    # {name: {'name', 'url', 'width', 'height'}} for the sizes in IMAGE_PIPELINE['DERIVATIVES']
+    derivatives = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Name of the upload in the staging storage until the process_job_images worker is done with it
+    staged_name = models.CharField(max_length=255, blank=True, default='')
+    # When a worker claimed the image, a PROCESSING image whose worker stopped is claimed again after IMAGE_PIPELINE['CLAIM_TIMEOUT']
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='job_image_pending_idx', condition=models.Q(status='PENDING')),
+            models.Index(fields=['claimed_at'], name='job_image_processing_idx', condition=models.Q(status='PROCESSING')),
+        ]
 
     def __str__(self):
         return f"Image for {self.job.name}"
 
+    def url(self, size='full'):
+        """ URL of a derivative, the legacy original while derivatives are not ready, None if there is neither """
+        derivative = self.derivatives.get(size)
+        if derivative:
+            return derivative['url']
+        return self.image.url if self.image else None
+
+
+class RelatedJob(models.Model):
+    """ Top-K neighbours of a job, rebuilt by the build_related_jobs command (see job.recommendations) """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='neighbors')
+    related = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='neighbor_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    co_purchase_score = models.FloatField(default=0)
+    content_score = models.FloatField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'rank'], name='related_job_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.related_id} related to {self.job_id} (#{self.rank})"
+
+
+class JobTrend(models.Model):
+    """
+    Time-decayed popularity of a job, maintained by job.services.TrendingService. Scores use forward
+    decay: an event at time t adds weight * exp(rate * (t - TrendingState.landmark)), so old rows never
+    need to be decayed and rankings stay comparable. Views are counted in the cache and added to pending_views
+    in batches, which the next refresh moves into view_score.
+    """
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='trend')
+    order_score = models.FloatField(default=0)
+    review_score = models.FloatField(default=0)
+    view_score = models.FloatField(default=0)
+    score = models.FloatField(default=0)
+    pending_views = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job'], name='job_trend_pending_views_idx', condition=models.Q(pending_views__gt=0)),
+        ]
+
+    def __str__(self):
+        return f"Trend of job {self.job_id}"
+
+
+class TrendingJob(models.Model):
+    """ Top jobs by JobTrend.score, per category and globally (category NULL), rebuilt on every refresh """
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='trending')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'rank'], name='trending_job_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.job_id} in {self.category_id or 'all categories'}"
+
+
+class TrendingState(models.Model):
+    """ Single row: the decay landmark and the time up to which orders and reviews were counted """
+    landmark = models.DateTimeField()
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Trending refreshed at {self.refreshed_at}"
+
 
 class Review(models.Model):
+    BUYER = 'buyer'
+    SELLER = 'seller'
+
+    REVIEWER_ROLE_CHOICES = [
+        (BUYER, 'Buyer'),
+        (SELLER, 'Seller'),
+    ]
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     ratings = models.PositiveIntegerField(
@@ -71,12 +202,16 @@ class Review(models.Model):
         ]
     )
     comment = models.TextField()
+    # Side of the completed order the reviewer was on, set when the review is created
+    reviewer_role = models.CharField(max_length=10, choices=REVIEWER_ROLE_CHOICES, default=SELLER, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=['job', 'created_at']),
+            models.Index(fields=['job', '-created_at', '-id'], name='review_job_recent_idx'),
+            # New reviews since the last trending refresh
+            models.Index(fields=['created_at'], name='review_created_at_idx'),
         ]
 
     def __str__(self):
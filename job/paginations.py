@@ -1,5 +1,74 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 
 
 class DefaultPagination(PageNumberPagination):
-    page_size = 12
\ No newline at end of file
+    page_size = 12
+
+
+class KeysetPagination(CursorPagination):
+    """ Cursor pagination without COUNT(*) or OFFSET, for infinite-scroll clients """
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Keyset pagination that clients opt into with `?pagination=cursor` (or by sending a `cursor`
+    returned in a previous `next`/`previous` link). Other requests are handled by
+    `fallback_pagination_class`, or left unpaginated when it is None.
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetPagination
+    fallback_pagination_class = DefaultPagination
+    # Must match an index on the paginated table, e.g. '-id' or ('-created_at', '-id')
+    ordering = '-id'
+
+    def __init__(self):
+        self.paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        paginator = self.cursor_pagination_class()
+        paginator.ordering = self.ordering
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.get_cursor_paginator()
+        elif self.fallback_pagination_class is not None:
+            self.paginator = self.fallback_pagination_class()
+        else:
+            self.paginator = None
+            return None
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.get_cursor_paginator().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [{
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': "Set to 'cursor' for keyset pagination",
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        }]
+        parameters += self.get_cursor_paginator().get_schema_operation_parameters(view)
+        if self.fallback_pagination_class is not None:
+            parameters += self.fallback_pagination_class().get_schema_operation_parameters(view)
+        return parameters
+
+
+class ReviewPagination(OptionalCursorPagination):
+    """ Newest reviews first, `?pagination=cursor` for long review pages """
+    ordering = ('-created_at', '-id')
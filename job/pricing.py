@@ -0,0 +1,39 @@
+from decimal import ROUND_HALF_UP, Decimal
+from django.conf import settings
+from django.db.models import DecimalField, Value
+from django.db.models.functions import Coalesce, Round
+
+
+CENT = Decimal('0.01')
+MONEY_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+class FeePolicy:
+    """
+    Service fee charged to buyers on top of job prices (settings.SERVICE_FEE_RATE, 16% by default).
+    The same rate and rounding are used in Python and in SQL, so annotated cart prices and totals
+    match the ones computed for a single job.
+    """
+
+    def __init__(self, rate):
+        self.rate = Decimal(str(rate))
+
+    @property
+    def multiplier(self):
+        return 1 + self.rate
+
+    def apply(self, amount):
+        """ Amount including the fee, rounded half up to cents """
+        return (Decimal(amount) * self.multiplier).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def expression(self, amount):
+        """ SQL version of apply() for an expression such as F('price__price') or Sum(...), NULL becomes 0 """
+        return Round(
+            Coalesce(amount, Value(Decimal(0)), output_field=MONEY_FIELD) * Value(self.multiplier),
+            2,
+            output_field=MONEY_FIELD
+        )
+
+
+def get_fee_policy():
+    return FeePolicy(getattr(settings, 'SERVICE_FEE_RATE', '0.16'))
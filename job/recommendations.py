@@ -0,0 +1,182 @@
+import re
+from collections import Counter
+import numpy as np
+from django.conf import settings
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from i in is it me my of on or our so that the this to will with you your".split()
+)
+
+
+def related_jobs_settings():
+    return {
+        'TOP_K': 10,
+        # Final score = CO_PURCHASE_WEIGHT * co-purchase cosine + CONTENT_WEIGHT * content score
+        'CO_PURCHASE_WEIGHT': 0.7,
+        'CONTENT_WEIGHT': 0.3,
+        # Share of the content score given to jobs of the same category, the rest is TF-IDF cosine
+        'CATEGORY_WEIGHT': 0.3,
+        # Name tokens count this many times in the document, they describe the job better than the description
+        'NAME_WEIGHT': 3,
+        'MAX_FEATURES': 5000,
+        'MIN_DF': 2,
+        'MAX_DF': 0.5,
+        # Larger orders are skipped, they would add n^2 weak pairs
+        'MAX_ORDER_ITEMS': 50,
+        # Jobs scored per matrix product, memory is BLOCK_SIZE * number of jobs floats
+        'BLOCK_SIZE': 256,
+        **getattr(settings, 'RELATED_JOBS', {}),
+    }
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def document(name, description, name_weight):
+    return tokenize(name) * name_weight + tokenize(description)
+
+
+def tfidf_matrix(documents, max_features, min_df, max_df):
+    """
+    Summary:
+        L2-normalised TF-IDF vectors of tokenized documents.
+
+    Description:
+        Uses sublinear term frequency (1 + log tf) and smoothed idf. Only the max_features terms with the
+        highest document frequency between min_df documents and max_df (a share of all documents) are kept,
+        so the matrix stays dense-friendly. Rows of documents without any kept term are zero.
+
+    Args:
+        documents: A list of token lists.
+        max_features: Maximum number of terms.
+        min_df: Minimum number of documents a term appears in.
+        max_df: Maximum share of documents a term appears in.
+
+    Returns:
+        numpy.ndarray: float32 matrix of shape (len(documents), number of terms).
+    """
+    n = len(documents)
+    document_frequency = Counter(term for tokens in documents for term in set(tokens))
+    upper = max(min_df, int(max_df * n))
+    terms = [term for term, df in document_frequency.items() if min_df <= df <= upper]
+    terms.sort(key=lambda term: (-document_frequency[term], term))
+    vocabulary = {term: index for index, term in enumerate(terms[:max_features])}
+
+    rows, columns, counts = [], [], []
+    for row, tokens in enumerate(documents):
+        for term, count in Counter(token for token in tokens if token in vocabulary).items():
+            rows.append(row)
+            columns.append(vocabulary[term])
+            counts.append(count)
+
+    matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+    if not counts:
+        return matrix
+    frequencies = np.array([document_frequency[term] for term in vocabulary], dtype=np.float32)
+    idf = np.log((1 + n) / (1 + frequencies)) + 1
+    columns = np.array(columns)
+    matrix[np.array(rows), columns] = (1 + np.log(np.array(counts, dtype=np.float32))) * idf[columns]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def co_purchase_matrix(orders, items, n, max_order_items):
+    """
+    Summary:
+        Item-to-item cosine similarity of jobs bought in the same orders, as a sparse COO triplet.
+
+    Description:
+        similarity(a, b) = orders containing both / sqrt(orders containing a * orders containing b).
+        Pairs are generated for all orders at once by repeating every item once per item of its order.
+
+    Args:
+        orders: Integer order index of every order item.
+        items: Job index (0..n-1) of every order item.
+        n: Number of jobs.
+        max_order_items: Orders with more distinct jobs are ignored.
+
+    Returns:
+        tuple: (rows, columns, values) sorted by row then column, rows and columns are job indexes.
+    """
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+    if len(items) == 0:
+        return empty
+    # A job ordered twice in the same order counts once
+    pairs = np.unique(np.asarray(orders, dtype=np.int64) * n + np.asarray(items, dtype=np.int64))
+    orders, items = pairs // n, pairs % n
+
+    _, starts, sizes = np.unique(orders, return_index=True, return_counts=True)
+    keep = sizes <= max_order_items
+    popularity = np.bincount(items, minlength=n).astype(np.float32)
+
+    element_sizes = np.repeat(np.where(keep, sizes, 0), sizes)
+    element_starts = np.repeat(starts, sizes)
+    left = np.repeat(items, element_sizes)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(element_sizes) - element_sizes, element_sizes)
+    right = items[np.repeat(element_starts, element_sizes) + offsets]
+    distinct = left != right
+    if not distinct.any():
+        return empty
+
+    keys, together = np.unique(left[distinct] * n + right[distinct], return_counts=True)
+    rows, columns = keys // n, keys % n
+    values = (together / np.sqrt(popularity[rows] * popularity[columns])).astype(np.float32)
+    return rows, columns, values
+
+
+def top_neighbors(categories, content, co_purchases, config):
+    """
+    Summary:
+        Score every pair of jobs and yield the top-K neighbours of each job, block by block.
+
+    Description:
+        A block of jobs is scored against all jobs with one matrix product of TF-IDF vectors, a category
+        comparison and the co-purchase rows of the block, so memory stays at BLOCK_SIZE * n floats.
+
+    Args:
+        categories: Category ID of every job.
+        content: TF-IDF matrix from tfidf_matrix.
+        co_purchases: (rows, columns, values) from co_purchase_matrix.
+        config: related_jobs_settings().
+
+    Yields:
+        tuple: (start, neighbours) where neighbours[i] lists (job index, score, co-purchase score, content score)
+            of job start + i, best first. Only neighbours with a positive score are listed.
+    """
+    n = len(categories)
+    categories = np.asarray(categories)
+    rows, columns, values = co_purchases
+    top_k = min(config['TOP_K'], n - 1)
+    block_size = config['BLOCK_SIZE']
+    category_weight = config['CATEGORY_WEIGHT']
+    if top_k <= 0:
+        return
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        block = np.arange(end - start)
+
+        content_scores = (1 - category_weight) * (content[start:end] @ content.T)
+        content_scores += category_weight * (categories[start:end, None] == categories[None, :])
+        co_purchase_scores = np.zeros((end - start, n), dtype=np.float32)
+        first, last = np.searchsorted(rows, [start, end])
+        co_purchase_scores[rows[first:last] - start, columns[first:last]] = values[first:last]
+
+        scores = config['CO_PURCHASE_WEIGHT'] * co_purchase_scores + config['CONTENT_WEIGHT'] * content_scores
+        scores[block, block + start] = -np.inf
+
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+        candidates = np.take_along_axis(candidates, order, axis=1)
+
+        neighbours = []
+        for i, row in enumerate(candidates):
+            neighbours.append([
+                (int(j), float(scores[i, j]), float(co_purchase_scores[i, j]), float(content_scores[i, j]))
+                for j in row if scores[i, j] > 0
+            ])
+        yield start, neighbours
@@ -1,8 +1,9 @@
 from rest_framework import serializers
-from decimal import Decimal
 from job.models import Category, Job, Review, JobImage, JobPrice
 from django.contrib.auth import get_user_model
 from users.serializers import PublicUserSerializer
+from api.serializers import SparseFieldsetMixin
+from job.pricing import get_fee_policy
 
 
 
@@ -19,11 +20,32 @@ class CategorySerializer(serializers.ModelSerializer):
         return value
 
 
+class CategoryTreeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    job_count = serializers.IntegerField()
+
+
 class JobImageSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField()
+    """
+    `image` is the upload on write and the full-size URL on read. Lists should use the `thumbnail` or
+    `card` derivative and `blurhash` as a placeholder, they are filled once the image is processed.
+    """
+    image = serializers.ImageField(write_only=True)
+
     class Meta:
         model = JobImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'status', 'width', 'height', 'blurhash', 'derivatives']
+        read_only_fields = ['status', 'width', 'height', 'blurhash', 'derivatives']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['image'] = instance.url('full')
+        data['derivatives'] = {
+            name: {key: derivative[key] for key in ('url', 'width', 'height')}
+            for name, derivative in instance.derivatives.items()
+        }
+        return data
 
 
 class JobPriceSerializer(serializers.ModelSerializer):
@@ -32,14 +54,15 @@ class JobPriceSerializer(serializers.ModelSerializer):
         fields = ['id', 'price']
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     cart_price = serializers.SerializerMethodField(method_name='calculate_cart')
     images = JobImageSerializer(many=True, read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=True)
     price = serializers.PrimaryKeyRelatedField(queryset=JobPrice.objects.all(), required=True)
-    average_rating = serializers.FloatField(source='average_rating_db', read_only=True)
-    order_count = serializers.ReadOnlyField()
+    average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    order_count = serializers.IntegerField(read_only=True)
     created_by = PublicUserSerializer(read_only=True)
 
     def validate(self, data):
@@ -57,11 +80,14 @@ class JobSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Job
-        fields = ['category_name','id', 'name', 'description', 'price', 'category', 'cart_price', 'images', 'created_by', 'duration_days', 'average_rating', 'order_count', 'created_at', 'updated_at', 'created_by']
-        read_only_fields = ['created_by', 'created_at', 'updated_at', 'cart_price', 'average_rating', 'order_count']
+        fields = ['category_name','id', 'name', 'description', 'price', 'category', 'cart_price', 'images', 'created_by', 'duration_days', 'average_rating', 'rating_count', 'rating_histogram', 'order_count', 'created_at', 'updated_at', 'created_by']
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'cart_price', 'average_rating', 'rating_count', 'order_count']
 
     def calculate_cart(self, job):
-        return round(job.price.price * Decimal(1.16), 2)
+        # Annotated by JobViewSet.get_queryset
+        if getattr(job, 'cart_price', None) is not None:
+            return job.cart_price
+        return get_fee_policy().apply(job.price.price)
     
     def validate_price(self, price):
         if not JobPrice.objects.filter(pk=price.id).exists():
@@ -69,6 +95,46 @@ class JobSerializer(serializers.ModelSerializer):
         return price
 
 
+class JobCreatorSerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'name', 'profile_picture']
+
+    def get_name(self, obj):
+        return obj.get_full_name()
+
+
+class JobListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact job card for list and search pages. Expects the cart_price and first_image annotations
+    from JobViewSet.get_queryset, so a page costs a fixed number of queries. `image` is the card-sized
+    derivative of the first image, or its original while it has not been processed.
+    """
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    cart_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    image = serializers.ImageField(source='first_image', read_only=True)
+    image_blurhash = serializers.CharField(source='first_image_blurhash', read_only=True, default='')
+    created_by = JobCreatorSerializer(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'category', 'category_name', 'price', 'cart_price', 'image', 'image_blurhash', 'created_by', 'duration_days', 'average_rating', 'order_count', 'created_at']
+        read_only_fields = fields
+        expandable_fields = {
+            'created_by': (PublicUserSerializer, {}),
+            'images': (JobImageSerializer, {'many': True}),
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        card = getattr(instance, 'first_image_card', None)
+        if card and 'image' in data:
+            data['image'] = card
+        return data
+
+
 class SimpleUserSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField(method_name='get_current_user_name')
 
@@ -81,21 +147,12 @@ class SimpleUserSerializer(serializers.ModelSerializer):
 
 
 class ReviewSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField(method_name='get_user')
-    reviewer_role = serializers.SerializerMethodField()
+    user = SimpleUserSerializer(read_only=True)
 
     class Meta:
         model = Review
-        fields = ['id', 'user', 'job', 'ratings', 'comment', 'reviewer_role']
-        read_only_fields = ['user', 'job', 'reviewer_role']
-
-    def get_user(self, obj):
-        return SimpleUserSerializer(obj.user).data
-    
-    def get_reviewer_role(self, obj):
-        order = obj.job.order_items.filter(order__user=obj.user, order__is_completed=True).first()
-        return 'buyer' if order else 'seller'
-
+        fields = ['id', 'user', 'job', 'ratings', 'comment', 'reviewer_role', 'created_at']
+        read_only_fields = ['user', 'job', 'reviewer_role', 'created_at']
 
     def create(self, validated_data):
         job_id = self.context['job_id']
@@ -114,3 +171,9 @@ class JobSearchSerializer(serializers.Serializer):  # job search
         choices=['price_asc', 'price_desc', 'rating_desc', 'orders_desc'],
         required=False
     )
+
+
+class TrendingQuerySerializer(serializers.Serializer):  # trending jobs
+    # An ID rather than a related field, the leaderboard query alone tells whether it has jobs
+    category = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50, default=20)
@@ -0,0 +1,667 @@
+import logging
+import math
+import os
+from collections import defaultdict
+from datetime import timedelta
+from io import BytesIO
+from uuid import uuid4
+import requests
+from job.models import Job, JobImage, JobTrend, RelatedJob, Review, Category, TrendingJob, TrendingState
+from job.cache import invalidate_catalog_cache
+from job.images import build_derivatives, get_image_storage, get_staging_storage, image_settings
+from job.trending import (
+    MAX_EXPONENT, decay_rate, exponent, forward_weight, trending_cache, trending_settings, view_buffer_key
+)
+from order.models import Order, OrderItem
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Count, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, NullIf, RowNumber
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CHANNEL = 'job_images'
+
+
+class JobStatsService:
+    @staticmethod
+    def _average(rating_sum, rating_count):
+        return Coalesce(
+            Cast(rating_sum, FloatField()) / Cast(NullIf(rating_count, 0), FloatField()),
+            Value(0.0)
+        )
+
+    @staticmethod
+    def apply_rating(job_id, new_rating=None, old_rating=None):
+        """
+        Summary:
+            Apply a review change to a job's denormalized review stats and rating histogram.
+
+        Description:
+            Adjusts rating_sum, rating_count and the per-star counters with F() expressions and recomputes
+            average_rating in the same UPDATE, so concurrent reviews never overwrite each other.
+
+        Args:
+            job_id: The ID of the job the review belongs to.
+            new_rating: The stars of the created or updated review, None when it is deleted.
+            old_rating: The stars before an update or delete, None when the review is created.
+        """
+        values = {}
+        if old_rating is not None:
+            values[f"rating_{old_rating}_count"] = F(f"rating_{old_rating}_count") - 1
+        if new_rating is not None:
+            counter = f"rating_{new_rating}_count"
+            values[counter] = values.get(counter, F(counter)) + 1
+        new_sum = F('rating_sum') + ((new_rating or 0) - (old_rating or 0))
+        new_count = F('rating_count') + ((new_rating is not None) - (old_rating is not None))
+        Job.objects.filter(pk=job_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            average_rating=JobStatsService._average(new_sum, new_count),
+            **values
+        )
+
+    @staticmethod
+    def add_orders(job_ids, delta=1):
+        """
+        Summary:
+            Adjust order_count for a set of jobs.
+
+        Args:
+            job_ids: IDs of the jobs that were ordered (or whose orders were removed).
+            delta: +1 when order items are created, -1 when they are deleted.
+        """
+        if not job_ids:
+            return
+        Job.objects.filter(pk__in=job_ids).update(order_count=F('order_count') + delta)
+        # Order items are bulk created, which sends no post_save
+        invalidate_catalog_cache()
+
+    @staticmethod
+    def add_category_jobs(category_id, delta):
+        """
+        Summary:
+            Adjust a category's job_count when a job is created, deleted or moved.
+
+        Args:
+            category_id: The ID of the category.
+            delta: +1 or -1.
+        """
+        Category.objects.filter(pk=category_id).update(job_count=F('job_count') + delta)
+
+    @staticmethod
+    def rebuild_category_counts():
+        """
+        Summary:
+            Recompute every category's job_count in a single UPDATE.
+
+        Returns:
+            int: Number of categories updated.
+        """
+        job_count = Coalesce(
+            Subquery(
+                Job.objects.filter(category=OuterRef('pk')).order_by().values('category')
+                .annotate(total=Count('id')).values('total'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+        updated = Category.objects.update(job_count=job_count)
+        invalidate_catalog_cache()
+        return updated
+
+    @staticmethod
+    def rebuild(queryset=None):
+        """
+        Summary:
+            Recompute the denormalized stats from reviews and order items.
+
+        Description:
+            Runs a single UPDATE over the given jobs using correlated subqueries, so it can be used
+            to backfill the columns or repair drift without loading jobs into Python.
+
+        Args:
+            queryset: Jobs to rebuild, all jobs by default.
+
+        Returns:
+            int: Number of jobs updated.
+        """
+        if queryset is None:
+            queryset = Job.objects.all()
+
+        ratings = Review.objects.filter(job=OuterRef('pk')).order_by().values('job')
+        rating_sum = Coalesce(
+            Subquery(ratings.annotate(total=Sum('ratings')).values('total'), output_field=IntegerField()),
+            Value(0)
+        )
+        rating_count = Coalesce(
+            Subquery(ratings.annotate(total=Count('id')).values('total'), output_field=IntegerField()),
+            Value(0)
+        )
+        histogram = {
+            f"rating_{stars}_count": Coalesce(
+                Subquery(ratings.filter(ratings=stars).annotate(total=Count('id')).values('total'), output_field=IntegerField()),
+                Value(0)
+            )
+            for stars in range(1, 6)
+        }
+        order_count = Coalesce(
+            Subquery(
+                OrderItem.objects.filter(job=OuterRef('pk')).order_by().values('job')
+                .annotate(total=Count('id')).values('total'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+        updated = queryset.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            average_rating=JobStatsService._average(rating_sum, rating_count),
+            order_count=order_count,
+            **histogram
+        )
+        invalidate_catalog_cache()
+        return updated
+
+
+class JobSearchService:
+    SEARCH_CONFIG = 'english'
+
+    @staticmethod
+    def search_vector():
+        """
+        Summary:
+            Build the weighted search document for a job.
+
+        Description:
+            name (A), category name (B), description (C) and creator email (D). Category and creator
+            are read through subqueries so the expression can be used in queryset.update().
+        """
+        config = JobSearchService.SEARCH_CONFIG
+        category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+        creator_email = Subquery(get_user_model().objects.filter(pk=OuterRef('created_by_id')).values('email')[:1])
+        return (
+            SearchVector('name', weight='A', config=config) +
+            SearchVector(category_name, weight='B', config=config) +
+            SearchVector('description', weight='C', config=config) +
+            SearchVector(creator_email, weight='D', config=config)
+        )
+
+    @staticmethod
+    def update_vectors(queryset):
+        """
+        Summary:
+            Recompute search_vector for the given jobs in a single UPDATE.
+
+        Returns:
+            int: Number of jobs updated.
+        """
+        return queryset.update(search_vector=JobSearchService.search_vector())
+
+    @staticmethod
+    def search(queryset, keyword):
+        """
+        Summary:
+            Filter and rank jobs by a free-text keyword.
+
+        Description:
+            Matches the GIN-indexed search_vector with a websearch query, and falls back to the
+            trigram-indexed word similarity operator on the name (pg_trgm.word_similarity_threshold)
+            so misspelled keywords still find jobs. Results are ordered by SearchRank, then by
+            trigram similarity.
+
+        Args:
+            queryset: The job queryset to search in.
+            keyword: The raw keyword entered by the user.
+
+        Returns:
+            QuerySet: The matching jobs, annotated with rank and similarity.
+        """
+        query = SearchQuery(keyword, search_type='websearch', config=JobSearchService.SEARCH_CONFIG)
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramWordSimilarity(keyword, 'name')
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_word_similar=keyword)
+        ).order_by('-rank', '-similarity', '-id')
+
+
+class RelatedJobService:
+    @staticmethod
+    def related(queryset, job_id):
+        """
+        Summary:
+            Restrict a job queryset to the precomputed neighbours of a job, best first.
+
+        Description:
+            Joins RelatedJob on (job, rank), so the neighbours are read in the same query as the jobs.
+
+        Args:
+            queryset: The job queryset to restrict, e.g. annotated for job cards.
+            job_id: The ID of the job.
+
+        Returns:
+            QuerySet: The related jobs.
+        """
+        return queryset.filter(neighbor_of__job_id=job_id).order_by('neighbor_of__rank')
+
+    @staticmethod
+    def rebuild(config=None, log=None):
+        """
+        Summary:
+            Recompute the top-K related jobs of every job.
+
+        Description:
+            Co-purchase similarity comes from order items grouped by order, content similarity from the
+            category and TF-IDF over name and description, see job.recommendations. Neighbours are written
+            block by block, each block replacing the rows of its jobs in one transaction, so readers never
+            see a job without neighbours.
+
+        Args:
+            config: Settings overriding RELATED_JOBS.
+            log: Optional callable receiving progress messages.
+
+        Returns:
+            int: Number of neighbour rows written.
+        """
+        # NumPy is only needed by this batch job, not by the web processes
+        from job.recommendations import co_purchase_matrix, document, related_jobs_settings, tfidf_matrix, top_neighbors
+        config = {**related_jobs_settings(), **(config or {})}
+        log = log or (lambda message: None)
+
+        job_ids, categories, documents = [], [], []
+        for job_id, category_id, name, description in Job.objects.order_by('pk').values_list(
+            'pk', 'category_id', 'name', 'description'
+        ).iterator(chunk_size=5000):
+            job_ids.append(job_id)
+            categories.append(category_id)
+            documents.append(document(name, description, config['NAME_WEIGHT']))
+        index = {job_id: position for position, job_id in enumerate(job_ids)}
+        log(f"Loaded {len(job_ids)} jobs")
+
+        order_indexes, items, orders = [], [], {}
+        for order_id, job_id in OrderItem.objects.filter(job__isnull=False).order_by().values_list(
+            'order_id', 'job_id'
+        ).iterator(chunk_size=5000):
+            if job_id in index:
+                order_indexes.append(orders.setdefault(order_id, len(orders)))
+                items.append(index[job_id])
+        log(f"Loaded {len(items)} order items from {len(orders)} orders")
+
+        content = tfidf_matrix(documents, config['MAX_FEATURES'], config['MIN_DF'], config['MAX_DF'])
+        co_purchases = co_purchase_matrix(order_indexes, items, len(job_ids), config['MAX_ORDER_ITEMS'])
+        del documents, order_indexes, items
+
+        written = 0
+        for start, neighbours in top_neighbors(categories, content, co_purchases, config):
+            block_ids = job_ids[start:start + len(neighbours)]
+            rows = [
+                RelatedJob(
+                    job_id=job_ids[start + offset],
+                    related_id=job_ids[position],
+                    rank=rank,
+                    score=score,
+                    co_purchase_score=co_purchase_score,
+                    content_score=content_score,
+                )
+                for offset, related in enumerate(neighbours)
+                for rank, (position, score, co_purchase_score, content_score) in enumerate(related, start=1)
+            ]
+            with transaction.atomic():
+                RelatedJob.objects.filter(job_id__in=block_ids).delete()
+                RelatedJob.objects.bulk_create(rows)
+            written += len(rows)
+            log(f"  jobs: {start + len(neighbours)}")
+        invalidate_catalog_cache()
+        return written
+
+
+class TrendingService:
+    SCORE_FIELDS = ['order_score', 'review_score', 'view_score']
+
+    @staticmethod
+    def record_view(job_id):
+        """
+        Summary:
+            Buffer a job detail view until the next refresh.
+
+        Description:
+            Views are counted with an atomic cache increment per job, and the view that completes a batch of
+            VIEW_BATCH adds the whole batch to the job's pending_views, so only one view per batch writes to the
+            database. The counter expires after HALF_LIFE: a job viewed fewer than VIEW_BATCH times per half-life
+            loses those views, which would not move its score noticeably anyway.
+
+        Args:
+            job_id: The ID of the viewed job.
+        """
+        config = trending_settings()
+        batch = config['VIEW_BATCH']
+        if batch > 1:
+            cache = trending_cache(config)
+            key = view_buffer_key(job_id)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                count = 1 if cache.add(key, 1, timeout=config['HALF_LIFE']) else cache.incr(key)
+            # Exactly one view reaches each multiple of the batch, even with concurrent increments
+            if count % batch:
+                return
+        TrendingService._add_views(job_id, max(batch, 1))
+
+    @staticmethod
+    def _add_views(job_id, views):
+        """ A single UPDATE of the job's trend row, which is only created on the first batch """
+        if JobTrend.objects.filter(job_id=job_id).update(pending_views=F('pending_views') + views):
+            return
+        JobTrend.objects.bulk_create([JobTrend(job_id=job_id)], ignore_conflicts=True)
+        JobTrend.objects.filter(job_id=job_id).update(pending_views=F('pending_views') + views)
+
+    @staticmethod
+    def _state(now):
+        """ The locked state row, so only one refresh runs at a time """
+        TrendingState.objects.bulk_create([TrendingState(pk=1, landmark=now)], ignore_conflicts=True)
+        return TrendingState.objects.select_for_update().get(pk=1)
+
+    @staticmethod
+    def _rebase(state, now, rate, reset=False):
+        """ Move the landmark to now, scaling the stored scores down; reset drops order and review scores """
+        factor = math.exp(-exponent(now, state.landmark, rate))
+        if reset:
+            JobTrend.objects.update(order_score=0, review_score=0, view_score=F('view_score') * factor, score=F('view_score') * factor)
+        else:
+            JobTrend.objects.update(**{field: F(field) * factor for field in TrendingService.SCORE_FIELDS + ['score']})
+        state.landmark = now
+
+    @staticmethod
+    def _events(since, until, landmark, rate, config):
+        """ Forward-decayed order and review weights per job for events created in (since, until] """
+        deltas = defaultdict(lambda: defaultdict(float))
+        items = OrderItem.objects.filter(
+            order__created_at__gt=since, order__created_at__lte=until
+        ).exclude(order__status=Order.CANCELED).values_list('job_id', 'quantity', 'order__created_at')
+        for job_id, quantity, created_at in items.iterator(chunk_size=5000):
+            deltas[job_id]['order_score'] += forward_weight(config['ORDER_WEIGHT'] * quantity, created_at, landmark, rate)
+
+        reviews = Review.objects.filter(created_at__gt=since, created_at__lte=until).values_list('job_id', 'ratings', 'created_at')
+        for job_id, ratings, created_at in reviews.iterator(chunk_size=5000):
+            deltas[job_id]['review_score'] += forward_weight(config['REVIEW_WEIGHT'] * ratings / 5, created_at, landmark, rate)
+        return deltas
+
+    @staticmethod
+    def _take_views(deltas, now, landmark, rate, config):
+        """ Move the buffered views into deltas, weighted at the refresh time. Returns the number of views """
+        pending = list(JobTrend.objects.select_for_update().filter(pending_views__gt=0).values_list('job_id', 'pending_views'))
+        if not pending:
+            return 0
+        JobTrend.objects.filter(job_id__in=[job_id for job_id, _ in pending]).update(pending_views=0)
+        for job_id, views in pending:
+            deltas[job_id]['view_score'] += forward_weight(config['VIEW_WEIGHT'] * views, now, landmark, rate)
+        return sum(views for _, views in pending)
+
+    @staticmethod
+    def _apply(deltas, batch_size=500):
+        """ Add deltas to the trend rows, one Case/When UPDATE per batch of jobs """
+        job_ids = list(deltas)
+        for start in range(0, len(job_ids), batch_size):
+            batch = job_ids[start:start + batch_size]
+            JobTrend.objects.bulk_create([JobTrend(job_id=job_id) for job_id in batch], ignore_conflicts=True)
+
+            def per_job(field, amount):
+                return Case(
+                    *[When(job_id=job_id, then=F(field) + amount(deltas[job_id])) for job_id in batch],
+                    default=F(field),
+                    output_field=JobTrend._meta.get_field(field)
+                )
+
+            values = {
+                field: per_job(field, lambda delta, field=field: delta[field])
+                for field in TrendingService.SCORE_FIELDS
+                if any(deltas[job_id][field] for job_id in batch)
+            }
+            values['score'] = per_job('score', lambda delta: sum(delta.values()))
+            JobTrend.objects.filter(job_id__in=batch).update(**values)
+
+    @staticmethod
+    def _rebuild_leaderboard(now, landmark, rate, top_n):
+        """ Replace the top jobs per category and globally, returns the number of rows """
+        scale = math.exp(-exponent(now, landmark, rate))
+        ranked = JobTrend.objects.filter(score__gt=0)
+        rows = [
+            TrendingJob(category=None, job_id=job_id, rank=rank, score=score * scale)
+            for rank, (job_id, score) in enumerate(
+                ranked.order_by('-score', 'job_id').values_list('job_id', 'score')[:top_n], start=1
+            )
+        ]
+        per_category = ranked.annotate(
+            rank=Window(RowNumber(), partition_by=F('job__category'), order_by=[F('score').desc(), F('job_id').asc()])
+        ).filter(rank__lte=top_n).values_list('job__category', 'job_id', 'rank', 'score')
+        rows += [
+            TrendingJob(category_id=category_id, job_id=job_id, rank=rank, score=score * scale)
+            for category_id, job_id, rank, score in per_category
+        ]
+        TrendingJob.objects.all().delete()
+        TrendingJob.objects.bulk_create(rows)
+        return len(rows)
+
+    @staticmethod
+    def refresh(rebuild=False, now=None):
+        """
+        Summary:
+            Add new orders, reviews and views to the job trend scores and rebuild the trending leaderboard.
+
+        Description:
+            Scores are forward-decayed (see JobTrend), so a refresh only updates the jobs with activity since
+            the previous one: order items and reviews created after TrendingState.refreshed_at and buffered
+            views. Events of the last SETTLE_DELAY seconds are left for the next refresh, so orders still being
+            committed are not skipped. The first refresh, or rebuild=True, recounts the last REBUILD_HALF_LIVES
+            half-lives of orders and reviews from scratch; view scores are kept since views are not stored.
+            Then the top TOP_N jobs per category and globally replace the TrendingJob rows.
+
+        Args:
+            rebuild: Recount orders and reviews instead of adding the new ones.
+            now: The refresh time, defaults to the current time.
+
+        Returns:
+            dict: Number of 'jobs' whose scores changed, 'views' counted and 'leaderboard' rows.
+        """
+        config = trending_settings()
+        rate = decay_rate(config)
+        now = now or timezone.now()
+        until = now - timedelta(seconds=config['SETTLE_DELAY'])
+
+        with transaction.atomic():
+            state = TrendingService._state(now)
+            if rebuild or state.refreshed_at is None:
+                since = now - timedelta(seconds=config['HALF_LIFE'] * config['REBUILD_HALF_LIVES'])
+                TrendingService._rebase(state, now, rate, reset=True)
+            else:
+                since = state.refreshed_at
+                if exponent(now, state.landmark, rate) > MAX_EXPONENT:
+                    TrendingService._rebase(state, now, rate)
+
+            deltas = TrendingService._events(since, until, state.landmark, rate, config)
+            views = TrendingService._take_views(deltas, now, state.landmark, rate, config)
+            TrendingService._apply(deltas)
+
+            threshold = config['MIN_SCORE'] * math.exp(exponent(now, state.landmark, rate))
+            JobTrend.objects.filter(score__lt=threshold, pending_views=0).delete()
+            leaderboard = TrendingService._rebuild_leaderboard(now, state.landmark, rate, config['TOP_N'])
+
+            state.refreshed_at = until
+            state.save()
+        return {'jobs': len(deltas), 'views': views, 'leaderboard': leaderboard}
+
+    @staticmethod
+    def trending(queryset, category_id=None, limit=20):
+        """
+        Summary:
+            Restrict a job queryset to the trending leaderboard of a category, or the global one.
+
+        Description:
+            Reads the precomputed TrendingJob rows through the (category, rank) index, no aggregate runs.
+
+        Args:
+            queryset: The job queryset to restrict, e.g. annotated for job cards.
+            category_id: The category, None for all categories.
+            limit: Number of jobs.
+
+        Returns:
+            QuerySet: The trending jobs, best first.
+        """
+        if category_id is None:
+            lookup = Q(trending__category__isnull=True, trending__rank__lte=limit)
+        else:
+            lookup = Q(trending__category_id=category_id, trending__rank__lte=limit)
+        return queryset.filter(lookup).order_by('trending__rank')
+
+
+class JobImageService:
+    @staticmethod
+    def stage(job, upload):
+        """
+        Summary:
+            Accept an uploaded image for a job without processing it in the request.
+
+        Description:
+            The upload is saved to the staging storage (IMAGE_PIPELINE['STAGING_STORAGE'], shared by the web
+            and worker hosts) and the JobImage is created PENDING. The process_job_images worker generates the
+            derivatives and publishes them to the image storage, workers are woken with a Postgres NOTIFY once
+            the transaction commits.
+
+        Args:
+            job: The job the image belongs to.
+            upload: The validated UploadedFile.
+
+        Returns:
+            JobImage: The pending image.
+        """
+        config = image_settings()
+        extension = os.path.splitext(upload.name)[1].lower()
+        staged_name = get_staging_storage().save(f"{config['STAGING_PREFIX']}/{uuid4().hex}{extension}", upload)
+        try:
+            image = JobImage.objects.create(job=job, staged_name=staged_name)
+        except Exception:
+            get_staging_storage().delete(staged_name)
+            raise
+        transaction.on_commit(JobImageService.notify_workers)
+        return image
+
+    @staticmethod
+    def notify_workers():
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"NOTIFY {IMAGE_CHANNEL}")
+
+    @staticmethod
+    def claim(batch_size):
+        """
+        Summary:
+            Mark a batch of pending images PROCESSING and commit, so they are processed without holding row locks.
+
+        Description:
+            Images left PROCESSING for IMAGE_PIPELINE['CLAIM_TIMEOUT'] seconds, by a worker that stopped, are
+            claimed again. process only writes its result while claimed_at still matches.
+
+        Args:
+            batch_size: The maximum number of images to claim.
+
+        Returns:
+            list: The claimed JobImages.
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=image_settings()['CLAIM_TIMEOUT'])
+        images = JobImage.objects.select_for_update(skip_locked=True)
+        with transaction.atomic():
+            claimed = list(images.filter(status=JobImage.PENDING).order_by('id')[:batch_size])
+            if len(claimed) < batch_size:
+                claimed += images.filter(status=JobImage.PROCESSING, claimed_at__lt=stale).order_by('claimed_at')[:batch_size - len(claimed)]
+            JobImage.objects.filter(pk__in=[image.pk for image in claimed]).update(status=JobImage.PROCESSING, claimed_at=now)
+        for image in claimed:
+            image.status, image.claimed_at = JobImage.PROCESSING, now
+        return claimed
+
+    @staticmethod
+    def process(image):
+        """
+        Summary:
+            Generate and publish the derivatives of one image.
+
+        Description:
+            Reads the staged upload, or downloads the legacy Cloudinary original for images uploaded before
+            the pipeline, outside any transaction. Failures go back to PENDING and are retried by later batches
+            until IMAGE_PIPELINE['MAX_ATTEMPTS'], then the image is marked FAILED and its staged upload deleted:
+            it keeps serving a legacy original if it has one, nothing otherwise.
+
+        Args:
+            image: The JobImage, claimed by JobImageService.claim.
+        """
+        claimed = JobImage.objects.filter(pk=image.pk, status=JobImage.PROCESSING, claimed_at=image.claimed_at)
+        attempts = image.attempts + 1
+        try:
+            if image.staged_name:
+                with get_staging_storage().open(image.staged_name, 'rb') as source:
+                    result = build_derivatives(source, f"job_images/{image.pk}")
+            else:
+                response = requests.get(image.image.url, timeout=30)
+                response.raise_for_status()
+                result = build_derivatives(BytesIO(response.content), f"job_images/{image.pk}")
+        except Exception as e:
+            logger.error(f"Failed to process job image {image.pk} (attempt {attempts}): {str(e)}")
+            if attempts < image_settings()['MAX_ATTEMPTS']:
+                claimed.update(status=JobImage.PENDING, attempts=attempts, last_error=str(e), claimed_at=None)
+            elif claimed.update(status=JobImage.FAILED, attempts=attempts, last_error=str(e), claimed_at=None, staged_name=''):
+                JobImageService.delete_files(image.pk, {}, image.staged_name)
+                invalidate_catalog_cache()
+            return
+
+        updated = claimed.update(
+            width=result['width'],
+            height=result['height'],
+            blurhash=result['blurhash'],
+            derivatives=result['derivatives'],
+            status=JobImage.READY,
+            attempts=attempts,
+            last_error='',
+            claimed_at=None,
+            staged_name='',
+        )
+        if updated:
+            JobImageService.delete_files(image.pk, {}, image.staged_name)
+            invalidate_catalog_cache()
+        elif not JobImage.objects.filter(pk=image.pk).exists():
+            # Deleted while processing, its post_delete receiver did not know about these derivatives
+            JobImageService.delete_files(image.pk, result['derivatives'])
+
+    @staticmethod
+    def process_batch(batch_size):
+        """
+        Summary:
+            Claim a batch of pending images, skipping the ones other workers hold, and process them.
+
+        Returns:
+            int: The number of images claimed, 0 when the queue is empty.
+        """
+        images = JobImageService.claim(batch_size)
+        for image in images:
+            JobImageService.process(image)
+        return len(images)
+
+    @staticmethod
+    def delete_files(image_id, derivatives, staged_name=''):
+        """ Remove an image's derivatives and staged upload """
+        storage = get_image_storage()
+        for derivative in derivatives.values():
+            try:
+                storage.delete(derivative['name'])
+            except Exception as e:
+                logger.error(f"Failed to delete {derivative['name']}: {str(e)}")
+        if staged_name:
+            try:
+                get_staging_storage().delete(staged_name)
+            except Exception as e:
+                logger.error(f"Failed to delete the staged upload of job image {image_id}: {str(e)}")
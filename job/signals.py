@@ -0,0 +1,115 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from job.models import Job, Category, JobPrice, JobImage, Review
+from job.services import JobImageService, JobSearchService, JobStatsService
+from job.cache import invalidate_catalog_cache
+from order.models import Order, OrderItem
+
+
+SEARCH_FIELDS = {'name', 'description', 'category', 'created_by'}
+
+
+@receiver(post_save, sender=Job)
+def update_job_search_vector(sender, instance, update_fields=None, **kwargs):
+    """ Keep the job's search document in sync with its searchable fields """
+    if update_fields and not SEARCH_FIELDS & set(update_fields):
+        return
+    JobSearchService.update_vectors(Job.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def update_category_jobs_search_vector(sender, instance, created, **kwargs):
+    """ A renamed category changes the search document of all its jobs """
+    if created:
+        return
+    JobSearchService.update_vectors(Job.objects.filter(category=instance))
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_creator_email(sender, instance, update_fields=None, **kwargs):
+    """ Load the stored email so post_save only rewrites the user's jobs when it changed """
+    instance._previous_email = None
+    if instance.pk and (update_fields is None or 'email' in update_fields):
+        instance._previous_email = sender.objects.filter(pk=instance.pk).values_list('email', flat=True).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_creator_jobs_search_vector(sender, instance, created, **kwargs):
+    """ The creator email is part of the search document of all their jobs """
+    previous_email = getattr(instance, '_previous_email', None)
+    if created or previous_email is None or previous_email == instance.email:
+        return
+    JobSearchService.update_vectors(Job.objects.filter(created_by=instance))
+
+
+@receiver(pre_save, sender=Job)
+def remember_job_category(sender, instance, update_fields=None, **kwargs):
+    """ Load the stored category so post_save can tell whether the job moved """
+    instance._previous_category_id = None
+    if instance.pk and (update_fields is None or 'category' in update_fields):
+        instance._previous_category_id = Job.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+@receiver(post_save, sender=Job)
+def update_category_job_count(sender, instance, created, **kwargs):
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    if created:
+        JobStatsService.add_category_jobs(instance.category_id, 1)
+    elif previous_category_id and previous_category_id != instance.category_id:
+        JobStatsService.add_category_jobs(previous_category_id, -1)
+        JobStatsService.add_category_jobs(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Job)
+def decrement_category_job_count(sender, instance, **kwargs):
+    JobStatsService.add_category_jobs(instance.category_id, -1)
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    """ Load the stored rating so the rating counters of the job and the seller can be moved by the difference """
+    instance._previous_ratings = None
+    if instance._state.adding:
+        return
+    reviews = Review.objects.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        # Lock the review until the counters are updated, a concurrent edit would otherwise apply the same old rating twice
+        reviews = reviews.select_for_update()
+    instance._previous_ratings = reviews.values_list('ratings', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def update_job_rating(sender, instance, created, **kwargs):
+    previous_ratings = getattr(instance, '_previous_ratings', None)
+    if created or previous_ratings is None:
+        JobStatsService.apply_rating(instance.job_id, new_rating=instance.ratings)
+    elif previous_ratings != instance.ratings:
+        JobStatsService.apply_rating(instance.job_id, new_rating=instance.ratings, old_rating=previous_ratings)
+
+
+@receiver(post_delete, sender=Review)
+def remove_job_rating(sender, instance, **kwargs):
+    previous_ratings = getattr(instance, '_previous_ratings', None)
+    JobStatsService.apply_rating(instance.job_id, old_rating=instance.ratings if previous_ratings is None else previous_ratings)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_job_orders(sender, instance, **kwargs):
+    # Runs before the items are deleted with the order
+    JobStatsService.add_orders(list(instance.items.values_list('job_id', flat=True)), delta=-1)
+
+
+@receiver(post_delete, sender=JobImage)
+def delete_job_image_files(sender, instance, **kwargs):
+    # The primary key is cleared once the delete finishes, capture it first
+    image_id, derivatives, staged_name = instance.pk, instance.derivatives, instance.staged_name
+    transaction.on_commit(lambda: JobImageService.delete_files(image_id, derivatives, staged_name))
+
+
+# Any change to what the public catalog renders invalidates the cached responses
+for model in (Job, JobPrice, JobImage, Review, Category, OrderItem):
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_delete_{model.__name__}')
@@ -1,3 +1,301 @@
-from django.test import TestCase
+import asyncio
+import os
+import time
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from channels.testing import HttpCommunicator
+from PIL import Image
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from job import cache as catalog
+from job.models import Category, Job, JobImage, JobPrice, JobTrend, Review
+from job.services import JobImageService, JobStatsService, TrendingService
+from order.models import Order, OrderItem
+from onesix.asgi import application
 
-# Create your tests here.
+
+User = get_user_model()
+
+JOB_STATS = ['rating_sum', 'rating_count', 'average_rating', 'order_count'] + [f'rating_{stars}_count' for stars in range(1, 6)]
+
+
+def create_job(seller, category, price='50.00', **kwargs):
+    return Job.objects.create(
+        name=kwargs.pop('name', 'I will write a landing page'),
+        description=kwargs.pop('description', 'Copy for a landing page'),
+        price=JobPrice.objects.create(price=Decimal(price)),
+        category=category,
+        created_by=seller,
+        duration_days=kwargs.pop('duration_days', 2),
+        **kwargs
+    )
+
+
+def complete_order(buyer, job):
+    order = Order.objects.create(user=buyer, status=Order.COMPLETED, is_completed=True, total_price=job.price.price)
+    OrderItem.objects.create(
+        order=order, job=job, job_name=job.name, freelancer=job.created_by, order_status=order.status,
+        price=job.price.price, quantity=1, total_price=job.price.price,
+    )
+    # What OrderService.create_order does for the items it creates
+    JobStatsService.add_orders([job.pk])
+    return order
+
+
+class CounterTestCase(TestCase):
+    """ Compares counters maintained incrementally with the values their rebuild computes from scratch """
+
+    def assertMatchesRebuild(self, queryset, fields, rebuild):
+        maintained = list(queryset.order_by('pk').values('pk', *fields))
+        rebuild()
+        self.assertEqual(maintained, list(queryset.order_by('pk').values('pk', *fields)))
+
+
+class CategoryJobCountTests(CounterTestCase):
+    def test_create_move_and_delete_jobs(self):
+        seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        writing, design = Category.objects.create(name='Writing'), Category.objects.create(name='Design')
+
+        def assertJobCounts(*counts):
+            self.assertEqual(list(Category.objects.order_by('pk').values_list('job_count', flat=True)), list(counts))
+            self.assertMatchesRebuild(Category.objects.all(), ['job_count'], JobStatsService.rebuild_category_counts)
+
+        first = create_job(seller, writing)
+        second = create_job(seller, writing, name='I will edit your blog post')
+        assertJobCounts(2, 0)
+
+        second.category = design
+        second.save()
+        assertJobCounts(1, 1)
+
+        # Saves that do not touch the category leave the counts alone
+        second.name = 'I will edit two blog posts'
+        second.save(update_fields=['name'])
+        assertJobCounts(1, 1)
+
+        first.delete()
+        assertJobCounts(0, 1)
+
+
+class JobRatingStatsTests(CounterTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.buyers = [User.objects.create_user(email=f'buyer{i}@example.com', password='Test@123') for i in range(2)]
+        cls.job = create_job(cls.seller, Category.objects.create(name='Writing'))
+        for buyer in cls.buyers:
+            complete_order(buyer, cls.job)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.reviews_url = f'/api/v1/jobs/{self.job.pk}/reviews/'
+
+    def review(self, user, ratings):
+        self.client.force_authenticate(user)
+        response = self.client.post(self.reviews_url, {'ratings': ratings, 'comment': 'Great work'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def assertStats(self, rating_sum, rating_count, histogram):
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.rating_sum, self.job.rating_count), (rating_sum, rating_count))
+        self.assertEqual([getattr(self.job, f'rating_{stars}_count') for stars in range(1, 6)], histogram)
+        self.assertMatchesRebuild(Job.objects.all(), JOB_STATS, JobStatsService.rebuild)
+
+    def test_create_update_delete_review(self):
+        first = self.review(self.buyers[0], 5)
+        self.review(self.buyers[1], 2)
+        self.assertStats(7, 2, [0, 1, 0, 0, 1])
+        self.assertEqual(self.job.average_rating, 3.5)
+
+        self.client.force_authenticate(self.buyers[0])
+        response = self.client.patch(f'{self.reviews_url}{first}/', {'ratings': 4}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertStats(6, 2, [0, 1, 0, 1, 0])
+
+        self.assertEqual(self.client.delete(f'{self.reviews_url}{first}/').status_code, 204)
+        self.assertStats(2, 1, [0, 1, 0, 0, 0])
+
+    def test_reviews_saved_outside_the_api_are_counted(self):
+        review = Review.objects.create(job=self.job, user=self.buyers[0], ratings=3, comment='Fine')
+        review.ratings = 1
+        review.save()
+        self.assertStats(1, 1, [1, 0, 0, 0, 0])
+        review.delete()
+        self.assertStats(0, 0, [0, 0, 0, 0, 0])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'search_vector is a PostgreSQL tsvector')
+class CreatorSearchVectorTests(TestCase):
+    def test_email_change_refreshes_the_creator_jobs(self):
+        seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        job = create_job(seller, Category.objects.create(name='Writing'))
+        seller.email = 'renamed@example.com'
+        seller.save()
+        matches = Job.objects.filter(pk=job.pk, search_vector=SearchQuery('renamed@example.com', config='english'))
+        self.assertTrue(matches.exists())
+
+
+@override_settings(TRENDING={'VIEW_BATCH': 3})
+class TrendingViewBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.job = create_job(seller, Category.objects.create(name='Writing'))
+
+    def setUp(self):
+        cache.clear()
+
+    def pending_views(self):
+        return JobTrend.objects.filter(job=self.job).values_list('pending_views', flat=True).first()
+
+    def test_views_are_written_once_per_batch(self):
+        with self.assertNumQueries(0):
+            for _ in range(2):
+                TrendingService.record_view(self.job.pk)
+        self.assertIsNone(self.pending_views())
+
+        TrendingService.record_view(self.job.pk)
+        self.assertEqual(self.pending_views(), 3)
+
+        # Once the trend row exists a batch costs a single UPDATE
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                TrendingService.record_view(self.job.pk)
+        self.assertEqual(self.pending_views(), 6)
+
+        result = TrendingService.refresh()
+        self.assertEqual(result['views'], 6)
+        self.assertEqual(self.pending_views(), 0)
+
+
+class JobImagePipelineTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(
+            IMAGE_PIPELINE={'STORAGE': 'job.images.LocalImageStorage', 'MAX_ATTEMPTS': 2},
+            MEDIA_ROOT=os.path.join(self.root, 'media'),
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        self.job = create_job(seller, Category.objects.create(name='Design'))
+
+    def upload(self, width, height):
+        content = BytesIO()
+        Image.new('RGB', (width, height), (200, 80, 40)).save(content, format='PNG')
+        return SimpleUploadedFile('photo.png', content.getvalue(), content_type='image/png')
+
+    def test_worker_publishes_sized_webp_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = JobImageService.stage(self.job, self.upload(800, 600))
+        self.assertEqual(image.status, JobImage.PENDING)
+        staged = os.path.join(self.root, 'media', image.staged_name)
+        self.assertTrue(os.path.exists(staged))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_job_images', '--once', stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(image.status, JobImage.READY)
+        self.assertEqual((image.width, image.height), (800, 600))
+        self.assertTrue(image.blurhash)
+        self.assertEqual(image.staged_name, '')
+        self.assertFalse(os.path.exists(staged))
+
+        sizes = {'thumbnail': (160, 120), 'card': (480, 360), 'full': (800, 600)}
+        self.assertEqual(set(image.derivatives), set(sizes))
+        for name, size in sizes.items():
+            derivative = image.derivatives[name]
+            self.assertEqual((derivative['width'], derivative['height']), size)
+            with Image.open(os.path.join(self.root, 'media', derivative['name'])) as stored:
+                self.assertEqual((stored.format, stored.size), ('WEBP', size))
+
+    def test_failed_upload_is_deleted_and_serves_nothing(self):
+        image = JobImageService.stage(self.job, SimpleUploadedFile('photo.png', b'not an image', content_type='image/png'))
+        staged = os.path.join(self.root, 'media', image.staged_name)
+
+        JobImageService.process_batch(10)
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.attempts), (JobImage.PENDING, 1))
+        self.assertTrue(os.path.exists(staged))
+
+        JobImageService.process_batch(10)
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.attempts, image.staged_name), (JobImage.FAILED, 2, ''))
+        self.assertFalse(os.path.exists(staged))
+        self.assertIsNone(image.url())
+
+        response = APIClient().get(f'/api/v1/jobs/{self.job.pk}/images/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()[0]['image'])
+        jobs = APIClient().get('/api/v1/jobs/', HTTP_ACCEPT='application/json').json()['results']
+        self.assertIsNone(jobs[0]['image'])
+
+    def test_claimed_images_are_committed_processing_and_reclaimed_when_stale(self):
+        image = JobImageService.stage(self.job, self.upload(300, 300))
+        claimed = JobImageService.claim(10)
+        self.assertEqual([claim.pk for claim in claimed], [image.pk])
+        self.assertEqual(JobImage.objects.get(pk=image.pk).status, JobImage.PROCESSING)
+        self.assertEqual(JobImageService.claim(10), [])
+
+        # The worker stopped, another one takes the image over and the first one's late attempt changes nothing
+        JobImage.objects.filter(pk=image.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(JobImageService.process_batch(10), 1)
+        JobImageService.process(claimed[0])
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.attempts), (JobImage.READY, 1))
+
+    def test_deleting_an_image_removes_its_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = JobImageService.stage(self.job, self.upload(300, 300))
+        JobImageService.process_batch(10)
+        image.refresh_from_db()
+        paths = [os.path.join(self.root, 'media', derivative['name']) for derivative in image.derivatives.values()]
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+
+class CatalogFlightTests(TransactionTestCase):
+    """ Identical anonymous catalog requests served by the ASGI application, the way daphne runs it """
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Writing')
+
+    async def test_concurrent_identical_requests_render_once(self):
+        render = catalog.render_catalog_response
+
+        def slow_render(*args, **kwargs):
+            # Keep the leader busy so the other requests arrive while it computes
+            time.sleep(0.3)
+            return render(*args, **kwargs)
+
+        # Leave the thread coalescing in cache_catalog_response out, the requests must wait in CatalogFlightMiddleware
+        with mock.patch.object(catalog.catalog_flight, 'do', side_effect=lambda key, function: function()), \
+                mock.patch('job.cache.render_catalog_response', side_effect=slow_render) as rendered:
+            communicators = [HttpCommunicator(application, 'GET', '/api/v1/categories/', headers=[(b'host', b'testserver')]) for _ in range(4)]
+            responses = await asyncio.gather(*(communicator.get_response(timeout=10) for communicator in communicators))
+
+        self.assertEqual([response['status'] for response in responses], [200] * 4)
+        self.assertEqual(len({response['body'] for response in responses}), 1)
+        self.assertEqual(rendered.call_count, 1)
@@ -0,0 +1,52 @@
+import math
+from django.conf import settings
+from django.core.cache import caches
+
+
+# exp() overflows a float past ~709, scores are rebased well before that
+MAX_EXPONENT = 500
+
+
+def trending_settings():
+    return {
+        # A job's score halves every HALF_LIFE seconds without new activity
+        'HALF_LIFE': 3 * 24 * 60 * 60,
+        # Weight of an ordered unit, of a 5 star review (scaled by stars / 5) and of a detail view
+        'ORDER_WEIGHT': 5.0,
+        'REVIEW_WEIGHT': 2.0,
+        'VIEW_WEIGHT': 0.1,
+        # Jobs kept per category and globally
+        'TOP_N': 50,
+        # Events older than this many half-lives are ignored when rebuilding from scratch
+        'REBUILD_HALF_LIVES': 8,
+        # Trend rows whose current score decayed below this are deleted
+        'MIN_SCORE': 0.01,
+        # Orders and reviews younger than this are counted by the next refresh, their transactions may still be open
+        'SETTLE_DELAY': 60,
+        # Detail views are counted in this cache and written to the job's trend row VIEW_BATCH at a time,
+        # the cache should be shared by all web processes (a per-process cache fills one batch per process)
+        'CACHE_ALIAS': 'default',
+        'VIEW_BATCH': 20,
+        **getattr(settings, 'TRENDING', {}),
+    }
+
+
+def view_buffer_key(job_id):
+    return f"job:trending:views:{job_id}"
+
+
+def trending_cache(config):
+    return caches[config['CACHE_ALIAS']]
+
+
+def decay_rate(config):
+    return math.log(2) / config['HALF_LIFE']
+
+
+def exponent(moment, landmark, rate):
+    return rate * (moment - landmark).total_seconds()
+
+
+def forward_weight(weight, moment, landmark, rate):
+    """ Contribution of an event of the given weight at `moment`, in the forward-decayed scale of `landmark` """
+    return weight * math.exp(exponent(moment, landmark, rate))
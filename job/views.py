@@ -1,23 +1,28 @@
 from job.models import Job, Category, Review, JobImage, JobPrice
-from job.serializers import JobSerializer, CategorySerializer, ReviewSerializer, JobImageSerializer, JobPriceSerializer, JobSearchSerializer
-from django.db.models import Count
+from job.serializers import JobSerializer, JobListSerializer, CategorySerializer, CategoryTreeSerializer, ReviewSerializer, JobImageSerializer, JobPriceSerializer, JobSearchSerializer, TrendingQuerySerializer
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from job.filters import JobFilter
 from rest_framework.filters import SearchFilter, OrderingFilter
-from job.paginations import DefaultPagination
+from job.paginations import OptionalCursorPagination, ReviewPagination
 from api.permissions import IsAdminOrReadOnly
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from job.permissions import IsReviewAuthorOrReadOnly
-from django.core.mail import send_mail
+from api.mail import queue_mail
 from django.conf import settings
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Avg
-from django.db.models.functions import Coalesce
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db.models import CharField, Q, F, OuterRef, Subquery
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from cloudinary.models import CloudinaryField
+from api.serializers import parse_query_list
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
+from django.db import transaction
+from job.services import JobImageService, JobSearchService, RelatedJobService, TrendingService
+from job.cache import cache_catalog_response
+from job.pricing import get_fee_policy
 
 
 class JobViewSet(ModelViewSet):
@@ -27,12 +32,13 @@ class JobViewSet(ModelViewSet):
      - Allows anyone to browse and filter jobs
      - Supports searching by name, description, and category
      - Supports ordering by price, average rating, and total orders
+     - Paginates by page number, or by keyset with `?pagination=cursor`
     """
     # queryset = Job.objects.select_related('category', 'created_by').prefetch_related('images')
     serializer_class = JobSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = JobFilter
-    pagination_class = DefaultPagination
+    pagination_class = OptionalCursorPagination
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'cart_price', 'average_rating', 'order_count']
     permission_classes = [IsAuthenticated]
@@ -41,7 +47,7 @@ class JobViewSet(ModelViewSet):
         """
         Allow anyone to list and retrieve jobs, authenticated users for other actions
         """
-        if self.action in ['list', 'retrieve', 'search']:
+        if self.action in ['list', 'retrieve', 'search', 'related', 'trending']:
             return [AllowAny()]
         return super().get_permissions()
 
@@ -50,20 +56,45 @@ class JobViewSet(ModelViewSet):
             return Job.objects.none()
         # return Job.objects.select_related('category', 'created_by').prefetch_related('images')
         queryset = Job.objects.all().select_related('price', 'category', 'created_by') \
-                        .prefetch_related('images') \
-                        .annotate(
-                            average_rating_db=Coalesce(Avg('reviews__ratings'), 0.0),
-                            order_count=Count('order_items', distinct=True)
-                        )
-        return queryset
+                        .defer('search_vector') \
+                        .annotate(cart_price=get_fee_policy().expression(F('price__price')))
+
+        if self.action in ['list', 'search', 'related', 'trending']:
+            # JobListSerializer only needs the first image, anything else is prefetched on ?expand=
+            # Skip images with nothing to show yet or ever: no derivatives and no legacy original
+            first_image = JobImage.objects.filter(
+                Q(status=JobImage.READY) | (Q(image__isnull=False) & ~Q(image='')), job=OuterRef('pk')
+            ).order_by('id')
+            queryset = queryset.annotate(
+                first_image=Subquery(first_image.values('image')[:1], output_field=CloudinaryField('image')),
+                first_image_card=Subquery(
+                    first_image.values(url=KeyTextTransform('url', KeyTransform('card', 'derivatives')))[:1],
+                    output_field=CharField()
+                ),
+                first_image_blurhash=Subquery(first_image.values('blurhash')[:1]),
+            )
+            expand = parse_query_list(self.request, 'expand')
+            if 'images' in expand:
+                queryset = queryset.prefetch_related('images')
+            if 'created_by' in expand:
+                queryset = queryset.prefetch_related('created_by__portfolio')
+            return queryset
+
+        return queryset.prefetch_related('images', 'created_by__portfolio')
+
+    def get_serializer_class(self):
+        if self.action in ['list', 'search', 'related', 'trending']:
+            return JobListSerializer
+        return super().get_serializer_class()
     
     @swagger_auto_schema(
         operation_summary="Retrieve a list of jobs",
-        operation_description="Fetches all jobs with optional filtering and sorting, accessible to anyone",
+        operation_description="Fetches all jobs as compact cards with optional filtering and sorting, accessible to anyone. Use `?fields=` to pick fields and `?expand=created_by,images` for the full creator and all images",
         responses={
-            200: JobSerializer(many=True)
+            200: JobListSerializer(many=True)
         }
     )
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         """Retrieve all jobs available in the platform"""
         return super().list(request, *args, **kwargs)
@@ -78,6 +109,14 @@ class JobViewSet(ModelViewSet):
     )
     def retrieve(self, request, *args, **kwargs):
         """Retrieve details of a specific job"""
+        response = self.cached_retrieve(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            # Cached and not modified responses are views too, see TrendingService
+            TrendingService.record_view(self.kwargs['pk'])
+        return response
+
+    @cache_catalog_response
+    def cached_retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
     @swagger_auto_schema(
@@ -129,13 +168,14 @@ class JobViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Search jobs with advanced filters",
-        operation_description="Search jobs by keyword, category, price range, rating, and duration, with sorting options, accessible to anyone",
+        operation_description="Search jobs by keyword, category, price range, rating, and duration, with sorting options, accessible to anyone. Keyword relevance and `sort_by` apply to page-number pagination; `?pagination=cursor` pages newest first",
         responses={
-            200: JobSerializer(many=True),
+            200: JobListSerializer(many=True),
             400: "Bad Request"
         }
     )
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])  # Search
+    @cache_catalog_response
     def search(self, request):
         """Search jobs with advanced filters and sorting"""
         serializer = JobSearchSerializer(data=request.query_params)
@@ -150,12 +190,7 @@ class JobViewSet(ModelViewSet):
 
         # Apply filters
         if data.get('keyword'):
-            queryset = queryset.filter(
-                Q(name__icontains=data['keyword']) |
-                Q(description__icontains=data['keyword']) |
-                Q(category__name__icontains=data['keyword']) |
-                Q(created_by__email__icontains=data['keyword'])
-            )
+            queryset = JobSearchService.search(queryset, data['keyword'])
         if data.get('category'):
             queryset = queryset.filter(category=data['category'])
         if data.get('min_price'):
@@ -163,7 +198,7 @@ class JobViewSet(ModelViewSet):
         if data.get('max_price'):
             queryset = queryset.filter(price__price__lte=data['max_price'])
         if data.get('min_rating'):
-            queryset = queryset.annotate(avg_rating=Avg('reviews__ratings')).filter(avg_rating__gte=data['min_rating'])
+            queryset = queryset.filter(average_rating__gte=data['min_rating'])
         if data.get('max_duration_days'):
             queryset = queryset.filter(duration_days__lte=data['max_duration_days'])
 
@@ -174,9 +209,9 @@ class JobViewSet(ModelViewSet):
         elif sort_by == 'price_desc':
             queryset = queryset.order_by('-cart_price')
         elif sort_by == 'rating_desc':
-            queryset = queryset.annotate(avg_rating=Avg('reviews__ratings')).order_by('-avg_rating')
+            queryset = queryset.order_by('-average_rating', '-id')
         elif sort_by == 'orders_desc':
-            queryset = queryset.annotate(total_orders=Count('order_items')).order_by('-total_orders')
+            queryset = queryset.order_by('-order_count', '-id')
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -185,26 +220,63 @@ class JobViewSet(ModelViewSet):
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve related jobs",
+        operation_description="Jobs often bought together with this job or similar in category and wording, best first, accessible to anyone. "
+                              "Read from the table rebuilt by `build_related_jobs`; unknown or new jobs return an empty list",
+        responses={
+            200: JobListSerializer(many=True)
+        }
+    )
+    @action(detail=True, methods=['get'], pagination_class=None)
+    @cache_catalog_response
+    def related(self, request, pk=None):
+        """Retrieve the precomputed neighbours of a job"""
+        if not str(pk).isdigit():
+            raise NotFound()
+        queryset = RelatedJobService.related(self.get_queryset(), int(pk))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
     
+    @swagger_auto_schema(
+        operation_summary="Retrieve trending jobs",
+        operation_description="Jobs with the most recent orders, reviews and views, best first, accessible to anyone. "
+                              "`?category=` for the leaderboard of a category, `?limit=` for the number of jobs. "
+                              "Read from the leaderboard refreshed by `refresh_trending`",
+        responses={
+            200: JobListSerializer(many=True),
+            400: "Bad Request"
+        }
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def trending(self, request):
+        """Retrieve the trending jobs of a category or of the whole catalog"""
+        serializer = TrendingQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = TrendingService.trending(self.get_queryset(), data.get('category'), data['limit'])
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         job = serializer.save(created_by=self.request.user)
         # Send notification to job creator
-        send_mail(
+        queue_mail(
             subject='Job Created Successfully',
             message=f'Dear {self.request.user.get_full_name() or self.request.user.email},\n\nYour job "{job.name}" has been created successfully.\n\nThank you!',
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[self.request.user.email],
-            fail_silently=True,
         )
 
     def perform_update(self, serializer):
         job = serializer.save()
-        send_mail(
+        queue_mail(
             subject='Job Updated Successfully',
             message=f'Dear {self.request.user.get_full_name() or self.request.user.email},\n\nYour job "{job.name}" has been updated successfully.\n\nThank you!',
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[self.request.user.email],
-            fail_silently=True,
         )
 
 
@@ -234,7 +306,7 @@ class JobImageViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Upload a job image",
-        operation_description="Allows the job creator to upload an image for their job",
+        operation_description="Allows the job creator to upload an image for their job. The image is returned PENDING, thumbnail, card and full-size derivatives with their dimensions and blurhash appear once the background worker has processed it.",
         request_body=JobImageSerializer,
         responses={
             201: JobImageSerializer,
@@ -254,12 +326,13 @@ class JobImageViewSet(ModelViewSet):
         job = Job.objects.get(pk=self.kwargs['job_pk'])
         if self.request.user != job.created_by:
             raise PermissionDenied("You can only upload images for your own job")
-        serializer.save(job_id=self.kwargs.get('job_pk'))
+        # Derivatives are generated by the process_job_images worker, the response returns the PENDING image
+        serializer.instance = JobImageService.stage(job, serializer.validated_data['image'])
 
 
 class CategoryViewSet(ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
-    queryset = Category.objects.annotate(job_count=Count('jobs')).prefetch_related('jobs')
+    queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
     @swagger_auto_schema(
@@ -269,6 +342,7 @@ class CategoryViewSet(ModelViewSet):
             200: CategorySerializer(many=True)
         }
     )
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         """Retrieve all categories"""
         return super().list(request, *args, **kwargs)
@@ -288,6 +362,20 @@ class CategoryViewSet(ModelViewSet):
         """Create a category by admin"""
         return super().create(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_summary="Retrieve the category tree",
+        operation_description="Fetches every category with its job count, read from the maintained job_count column, accessible to anyone",
+        responses={
+            200: CategoryTreeSerializer(many=True)
+        }
+    )
+    @action(detail=False, methods=['get'])
+    @cache_catalog_response
+    def tree(self, request):
+        """Retrieve all categories with job counts"""
+        categories = Category.objects.order_by('name').values('id', 'name', 'job_count')
+        return Response(CategoryTreeSerializer(categories, many=True).data)
+
 
 class JobPriceViewSet(ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
@@ -324,10 +412,13 @@ class JobPriceViewSet(ModelViewSet):
 class ReviewViewSet(ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsReviewAuthorOrReadOnly]
+    pagination_class = ReviewPagination
 
     @swagger_auto_schema(
         operation_summary="Retrieve job reviews",
-        operation_description="Fetches all reviews for a specific job, accessible to anyone",
+        operation_description="Fetches the reviews of a specific job, newest first, accessible to anyone. "
+                              "Paginated by page number (`?page=`), or by keyset with `?pagination=cursor`. "
+                              "The job's rating histogram is returned by the job detail endpoint",
         responses={
             200: ReviewSerializer(many=True),
             404: "Not Found"
@@ -360,21 +451,29 @@ class ReviewViewSet(ModelViewSet):
         order_item = job.order_items.filter(
             Q(order__is_completed=True) &
             (Q(order__user=user) | Q(freelancer=user))
-        ).first()
+        ).select_related('order').first()
 
         if not order_item:
             raise ValidationError("Only buyers or sellers of a completed order can review this job")
 
-        serializer.save(user=user, job=job)
+        reviewer_role = Review.BUYER if order_item.order.user_id == user.pk else Review.SELLER
+        # The job and seller rating counters are updated by the Review signals, in the same transaction
+        with transaction.atomic():
+            serializer.save(user=user, job=job, reviewer_role=reviewer_role)
 
     def perform_update(self, serializer):
-        review = self.get_object()
-        if (timezone.now() - review.created_at).days > 16:
+        if (timezone.now() - serializer.instance.created_at).days > 16:
             raise ValidationError("Reviews cannot be updated after 16 days")
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
     def get_queryset(self):
-        return Review.objects.filter(job_id=self.kwargs.get('job_pk'))
+        # Served by review_job_recent_idx, the reviewer is joined instead of fetched per review
+        return Review.objects.filter(job_id=self.kwargs.get('job_pk')).select_related('user').order_by('-created_at', '-id')
 
     def get_serializer_context(self):
         return {'job_id': self.kwargs.get('job_pk')}
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from messaging.services import ConversationService
+
+
+class Command(BaseCommand):
+    help = 'Attach messages created outside the API to conversations and recompute last messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Conversations inserted per statement')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            attached = ConversationService.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Attached {attached} messages to conversations"))
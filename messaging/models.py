@@ -2,7 +2,50 @@ from django.db import models
 from django.conf import settings
 
 
+class Conversation(models.Model):
+    """
+    Thread between two users. The pair is stored ordered (user_one < user_two) so each pair has one row.
+    last_message and the participants' unread counters are maintained by messaging.services.ConversationService.
+    """
+    user_one = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    user_two = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    participants = models.ManyToManyField(settings.AUTH_USER_MODEL, through='ConversationParticipant', related_name='conversations')
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_one', 'user_two'], name='conversation_unique_pair'),
+            models.CheckConstraint(condition=models.Q(user_one__lt=models.F('user_two')), name='conversation_ordered_pair'),
+        ]
+
+    def __str__(self):
+        return f"Conversation between {self.user_one_id} and {self.user_two_id}"
+
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversation_memberships')
+    unread_count = models.PositiveIntegerField(default=0)
+    # Copy of Conversation.last_message_at so the inbox is a single index range scan
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    last_read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_participant_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in conversation {self.conversation_id}"
+
+
 class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages', blank=True, null=True)
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='sent_messages', on_delete=models.CASCADE)
     receiver = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='received_messages', on_delete=models.CASCADE)
     job = models.ForeignKey('job.Job', on_delete=models.CASCADE, blank=True, null=True)
@@ -10,6 +53,13 @@ class Message(models.Model):
     file = models.FileField(upload_to='message_files', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', 'created_at']),
+            models.Index(fields=['receiver', 'created_at']),
+            models.Index(fields=['conversation', '-id']),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender} to {self.receiver}"
 
@@ -0,0 +1,18 @@
+from job.paginations import KeysetPagination, OptionalCursorPagination
+
+
+class MessagePagination(OptionalCursorPagination):
+    """ Messages stay unpaginated unless the client opts into keyset pages """
+    fallback_pagination_class = None
+    ordering = '-id'
+
+
+class ConversationPagination(KeysetPagination):
+    """ Inbox pages, served from the (user, -last_message_at, -id) index """
+    ordering = ('-last_message_at', '-id')
+
+
+class ConversationMessagePagination(KeysetPagination):
+    """ Conversation history pages, served from the (conversation, -id) index """
+    page_size = 30
+    ordering = '-id'
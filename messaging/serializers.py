@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from messaging.models import Message, CustomOffer
+from messaging.models import Message, CustomOffer, ConversationParticipant
 from users.serializers import UserSerializer
 from users.models import User
 from job.models import Job
@@ -50,4 +50,44 @@ class CustomOfferSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("You can only create custom offers for your own jobs.")
         if data['receiver'] == request.user:
             raise serializers.ValidationError("You cannot send a custom offer to yourself.")
-        return data
\ No newline at end of file
+        return data
+
+
+class ParticipantSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'full_name', 'profile_picture']
+
+
+class ConversationMessageSerializer(serializers.ModelSerializer):
+    """ Message in a conversation history, participants are referenced by id """
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'sender', 'receiver', 'job', 'content', 'file', 'created_at']
+        read_only_fields = fields
+
+
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    """ Inbox row, serialized from the user's ConversationParticipant """
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    participant = serializers.SerializerMethodField()
+    last_message = ConversationMessageSerializer(source='conversation.last_message', read_only=True)
+
+    class Meta:
+        model = ConversationParticipant
+        fields = ['id', 'participant', 'last_message', 'last_message_at', 'unread_count', 'last_read_at']
+
+    def get_participant(self, obj):
+        conversation = obj.conversation
+        other = conversation.user_two if conversation.user_one_id == obj.user_id else conversation.user_one
+        return ParticipantSerializer(other).data
+
+
+class CustomOfferEventSerializer(serializers.ModelSerializer):
+    """ custom_offer.updated WebSocket payload """
+    class Meta:
+        model = CustomOffer
+        fields = ['id', 'job', 'sender', 'receiver', 'price', 'delivery_days', 'status', 'created_at']
+        read_only_fields = fields
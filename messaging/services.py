@@ -0,0 +1,190 @@
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, OuterRef, PositiveIntegerField, Q, Subquery, Value, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from messaging.models import Conversation, ConversationParticipant, Message
+
+
+class ConversationService:
+    @staticmethod
+    def get_or_create(user, other):
+        """
+        Summary:
+            Return the conversation between two users, creating it with both participants if needed.
+
+        Args:
+            user: One participant.
+            other: The other participant.
+
+        Returns:
+            Conversation: The conversation for the pair.
+        """
+        user_one, user_two = sorted([user.pk, other.pk])
+        with transaction.atomic():
+            # get_or_create retries the lookup if a concurrent request created the pair first
+            conversation, created = Conversation.objects.get_or_create(user_one_id=user_one, user_two_id=user_two)
+            if created:
+                ConversationParticipant.objects.bulk_create([
+                    ConversationParticipant(conversation=conversation, user_id=user_one),
+                    ConversationParticipant(conversation=conversation, user_id=user_two),
+                ])
+        return conversation
+
+    @staticmethod
+    def record_message(message):
+        """
+        Summary:
+            Point the conversation at a newly created message and bump the receiver's unread counter.
+
+        Description:
+            Uses two UPDATE statements. last_message and the participants' last_message_at only move forward, so concurrent
+            sends cannot leave an older message as the latest.
+
+        Args:
+            message: The saved message, with its conversation set.
+        """
+        Conversation.objects.filter(
+            Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk),
+            pk=message.conversation_id
+        ).update(last_message=message, last_message_at=message.created_at)
+        ConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+            last_message_at=Case(
+                When(Q(last_message_at__isnull=True) | Q(last_message_at__lt=message.created_at), then=Value(message.created_at)),
+                default=F('last_message_at'),
+                output_field=DateTimeField()
+            ),
+            unread_count=Case(
+                When(user_id=message.receiver_id, then=F('unread_count') + 1),
+                default=F('unread_count'),
+                output_field=PositiveIntegerField()
+            )
+        )
+
+    @staticmethod
+    def remove_message(message):
+        """
+        Summary:
+            Update the conversation after a message was deleted.
+
+        Description:
+            Takes the message back out of the receiver's unread counter if they had not read it yet, then recomputes
+            last_message.
+
+        Args:
+            message: The deleted message, with its conversation set.
+        """
+        ConversationParticipant.objects.filter(
+            Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.created_at),
+            conversation_id=message.conversation_id,
+            user_id=message.receiver_id,
+            unread_count__gt=0,
+        ).update(unread_count=F('unread_count') - 1)
+        ConversationService.refresh_last_message(message.conversation_id)
+
+    @staticmethod
+    def refresh_last_message(conversation_id):
+        """
+        Summary:
+            Recompute last_message after a message was deleted.
+
+        Args:
+            conversation_id: The ID of the conversation.
+        """
+        latest = Message.objects.filter(conversation_id=conversation_id).order_by('-id').values('pk', 'created_at').first()
+        last_message_at = latest['created_at'] if latest else None
+        Conversation.objects.filter(pk=conversation_id).update(
+            last_message_id=latest['pk'] if latest else None,
+            last_message_at=last_message_at,
+        )
+        ConversationParticipant.objects.filter(conversation_id=conversation_id).update(last_message_at=last_message_at)
+
+    @staticmethod
+    def mark_read(conversation, user):
+        """
+        Summary:
+            Reset a participant's unread counter.
+
+        Args:
+            conversation: The conversation being read.
+            user: The participant reading it.
+        """
+        ConversationParticipant.objects.filter(conversation=conversation, user=user).update(
+            unread_count=0, last_read_at=timezone.now()
+        )
+
+    @staticmethod
+    def inbox(user):
+        """
+        Summary:
+            Conversation summaries for a user, most recently active first.
+
+        Description:
+            One query over the (user, -last_message_at, -id) index, with both participants and the last message joined in.
+            Conversations without messages (new ones, or emptied ones, see refresh_last_message) are left out: the keyset
+            cursor cannot compare a NULL last_message_at, and there is nothing to show for them.
+
+        Args:
+            user: The authenticated user.
+
+        Returns:
+            QuerySet: ConversationParticipant rows for the user.
+        """
+        return ConversationParticipant.objects.filter(user=user, last_message_at__isnull=False).select_related(
+            'conversation__user_one',
+            'conversation__user_two',
+            'conversation__last_message',
+        )
+
+    @staticmethod
+    def rebuild(batch_size=5000):
+        """
+        Summary:
+            Create conversations for messages that have none and recompute every conversation's last message.
+
+        Description:
+            Used for messages created outside the API (bulk loads, fixtures). Unread counters of existing participants
+            are kept, new participants start with everything read.
+
+        Args:
+            batch_size: Number of conversations inserted per statement.
+
+        Returns:
+            int: The number of messages attached to a conversation.
+        """
+        orphans = Message.objects.filter(conversation__isnull=True)
+        pairs = (
+            orphans.annotate(one=Least('sender', 'receiver'), two=Greatest('sender', 'receiver'))
+            .order_by().values_list('one', 'two').distinct()
+        )
+        Conversation.objects.bulk_create(
+            (Conversation(user_one_id=one, user_two_id=two) for one, two in pairs.iterator() if one != two),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        attached = orphans.update(conversation=Subquery(
+            Conversation.objects.filter(
+                user_one=Least(OuterRef('sender'), OuterRef('receiver')),
+                user_two=Greatest(OuterRef('sender'), OuterRef('receiver')),
+            ).values('pk')[:1]
+        ))
+
+        latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-id')
+        Conversation.objects.update(
+            last_message=Subquery(latest.values('pk')[:1]),
+            last_message_at=Subquery(latest.values('created_at')[:1]),
+        )
+
+        ConversationParticipant.objects.bulk_create(
+            (
+                ConversationParticipant(conversation_id=pk, user_id=user_id)
+                for pk, one, two in Conversation.objects.values_list('pk', 'user_one', 'user_two').iterator()
+                for user_id in (one, two)
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        ConversationParticipant.objects.update(last_message_at=Subquery(
+            Conversation.objects.filter(pk=OuterRef('conversation')).values('last_message_at')[:1]
+        ))
+        return attached
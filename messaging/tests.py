@@ -1,3 +1,63 @@
+from django.contrib.auth import get_user_model
+from datetime import timedelta
 from django.test import TestCase
+from messaging.models import ConversationParticipant, Message
+from messaging.services import ConversationService
 
-# Create your tests here.
+
+User = get_user_model()
+
+
+class InboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(email='alice@example.com', password='Test@123')
+        cls.bob = User.objects.create_user(email='bob@example.com', password='Test@123')
+
+    def send(self, conversation, sender, receiver, content='Hello'):
+        message = Message.objects.create(conversation=conversation, sender=sender, receiver=receiver, content=content)
+        ConversationService.record_message(message)
+        return message
+
+    def test_inbox_skips_conversations_without_messages(self):
+        conversation = ConversationService.get_or_create(self.alice, self.bob)
+        self.assertFalse(ConversationService.inbox(self.alice).exists())
+
+        message = self.send(conversation, self.alice, self.bob)
+        self.assertEqual(list(ConversationService.inbox(self.bob).values_list('conversation', 'unread_count')), [(conversation.pk, 1)])
+
+        message.delete()
+        ConversationService.refresh_last_message(conversation.pk)
+        self.assertFalse(ConversationService.inbox(self.alice).exists())
+        self.assertFalse(ConversationService.inbox(self.bob).exists())
+
+    def test_deleting_unread_message_decrements_unread_count(self):
+        conversation = ConversationService.get_or_create(self.alice, self.bob)
+        first = self.send(conversation, self.alice, self.bob)
+        ConversationService.mark_read(conversation, self.bob)
+        second = self.send(conversation, self.alice, self.bob)
+        third = self.send(conversation, self.alice, self.bob)
+
+        third.delete()
+        ConversationService.remove_message(third)
+        self.assertEqual(ConversationParticipant.objects.get(conversation=conversation, user=self.bob).unread_count, 1)
+
+        # Already read, the counter stays as it is
+        first.delete()
+        ConversationService.remove_message(first)
+        membership = ConversationParticipant.objects.get(conversation=conversation, user=self.bob)
+        self.assertEqual((membership.unread_count, membership.last_message_at), (1, second.created_at))
+
+    def test_participant_last_message_at_only_moves_forward(self):
+        conversation = ConversationService.get_or_create(self.alice, self.bob)
+        newer = self.send(conversation, self.alice, self.bob)
+        older = Message.objects.create(conversation=conversation, sender=self.bob, receiver=self.alice, content='Late')
+        Message.objects.filter(pk=older.pk).update(created_at=newer.created_at - timedelta(minutes=1))
+        older.refresh_from_db()
+        ConversationService.record_message(older)
+
+        self.assertEqual(
+            set(ConversationParticipant.objects.filter(conversation=conversation).values_list('last_message_at', flat=True)),
+            {newer.created_at}
+        )
+        self.assertEqual(ConversationParticipant.objects.get(conversation=conversation, user=self.alice).unread_count, 1)
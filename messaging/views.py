@@ -1,16 +1,25 @@
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import models
-from messaging.models import Message, CustomOffer
-from messaging.serializers import MessageSerializer, CustomOfferSerializer
-from django.core.mail import send_mail
+from messaging.models import Message, CustomOffer, Conversation
+from messaging.serializers import MessageSerializer, CustomOfferSerializer, CustomOfferEventSerializer, ConversationSummarySerializer, ConversationMessageSerializer
+from messaging.paginations import MessagePagination, ConversationPagination, ConversationMessagePagination
+from messaging.services import ConversationService
+from api.mail import queue_mail
+from api.events import publish_event
 from django.conf import settings
 from order.services import OrderService
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from django.shortcuts import get_object_or_404
+
+
+def publish_offer(offer):
+    publish_event([offer.sender_id, offer.receiver_id], 'custom_offer.updated', CustomOfferEventSerializer(offer).data)
 
 
 class MessageViewSet(ModelViewSet):
@@ -20,6 +29,7 @@ class MessageViewSet(ModelViewSet):
     """
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MessagePagination
 
     def get_queryset(self):
         """
@@ -33,7 +43,7 @@ class MessageViewSet(ModelViewSet):
             return Message.objects.none()
         return Message.objects.filter(
             models.Q(sender=self.request.user) | models.Q(receiver=self.request.user)
-        ).select_related('sender', 'receiver', 'job')
+        ).select_related('sender', 'receiver', 'job').prefetch_related('sender__portfolio')
     
     @swagger_auto_schema(
         operation_summary="Create a new message",
@@ -52,34 +62,119 @@ class MessageViewSet(ModelViewSet):
         }
     )
     def perform_create(self, serializer):
-        message = serializer.save(sender=self.request.user)
-        # Send email notification to receiver
-        file_info = f"\nAttachment: {message.file.url}" if message.file else ""
-        send_mail(
-            subject=f'New Message from {self.request.user.get_full_name() or self.request.user.email}',
-            message=f'You have received a new message regarding "{message.job.name if message.job else "General"}":\n\n{message.content}{file_info}\n\nPlease check your inbox.',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[message.receiver.email],
-            fail_silently=True,
-        )
+        with transaction.atomic():
+            conversation = ConversationService.get_or_create(self.request.user, serializer.validated_data['receiver'])
+            message = serializer.save(sender=self.request.user, conversation=conversation)
+            ConversationService.record_message(message)
+            publish_event([message.sender_id, message.receiver_id], 'message.created', ConversationMessageSerializer(message).data)
+            # Send email notification to receiver
+            file_info = f"\nAttachment: {message.file.url}" if message.file else ""
+            queue_mail(
+                subject=f'New Message from {self.request.user.get_full_name() or self.request.user.email}',
+                message=f'You have received a new message regarding "{message.job.name if message.job else "General"}":\n\n{message.content}{file_info}\n\nPlease check your inbox.',
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[message.receiver.email],
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if instance.conversation_id:
+                ConversationService.remove_message(instance)
 
     @swagger_auto_schema(
         operation_summary="Get user inbox",
         operation_description=(
-            "Retrieves all messages sent or received by the authenticated user, ordered by creation date (newest first). "
-            "Messages are grouped by conversation (sender/receiver pair) and include sender, receiver, and job details."
+            "Retrieves the authenticated user's conversations, most recently active first. "
+            "Each entry has the other participant, the last message and the user's unread count. "
+            "Pages are keyset paginated, follow `next` for older conversations. "
+            "Use `/conversations/{id}/messages/` for the history of a conversation."
         ),
         responses={
-            200: MessageSerializer(many=True),
+            200: ConversationSummarySerializer(many=True),
             401: "Unauthorized: Authentication credentials were not provided."
         }
     )
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def inbox(self, request):
-        # Get messages grouped by conversation (sender/receiver pair)
-        messages = self.get_queryset().order_by('-created_at')
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
+        paginator = ConversationPagination()
+        page = paginator.paginate_queryset(ConversationService.inbox(request.user), request, view=self)
+        serializer = ConversationSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ConversationViewSet(ReadOnlyModelViewSet):
+    """
+    ViewSet for conversation threads.
+    Lists the user's conversations (same as the message inbox) and serves keyset-paginated history per conversation.
+    """
+    serializer_class = ConversationSummarySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ConversationPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Conversation.objects.none()
+        if self.action == 'list':
+            return ConversationService.inbox(self.request.user)
+        return Conversation.objects.filter(participants=self.request.user)
+
+    @swagger_auto_schema(
+        operation_summary="List conversations",
+        operation_description="Conversation summaries of the authenticated user, most recently active first, keyset paginated.",
+        responses={
+            200: ConversationSummarySerializer(many=True),
+            401: "Unauthorized: Authentication credentials were not provided."
+        }
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve a conversation",
+        operation_description="Summary of a single conversation of the authenticated user.",
+        responses={
+            200: ConversationSummarySerializer,
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Conversation not found."
+        }
+    )
+    def retrieve(self, request, *args, **kwargs):
+        # Summaries are the user's participant rows, looked up by conversation
+        membership = get_object_or_404(ConversationService.inbox(request.user), conversation_id=kwargs['pk'])
+        return Response(self.get_serializer(membership).data)
+
+    @swagger_auto_schema(
+        operation_summary="Conversation history",
+        operation_description="Messages of a conversation, newest first. Pages are keyset paginated, follow `next` for older messages.",
+        responses={
+            200: ConversationMessageSerializer(many=True),
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Conversation not found."
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        conversation = self.get_object()
+        paginator = ConversationMessagePagination()
+        page = paginator.paginate_queryset(Message.objects.filter(conversation=conversation), request, view=self)
+        serializer = ConversationMessageSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_summary="Mark a conversation as read",
+        operation_description="Resets the authenticated user's unread count for the conversation.",
+        request_body=None,
+        responses={
+            204: "No Content",
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Conversation not found."
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        ConversationService.mark_read(self.get_object(), request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class CustomOfferViewSet(ModelViewSet):
@@ -122,13 +217,13 @@ class CustomOfferViewSet(ModelViewSet):
     )
     def perform_create(self, serializer):
         offer = serializer.save(sender=self.request.user)
+        publish_offer(offer)
         # Send email notification to receiver
-        send_mail(
+        queue_mail(
             subject=f'New Custom Offer for {offer.job.name}',
             message=f'Dear {offer.receiver.get_full_name() or offer.receiver.email},\n\nYou have received a custom offer from {self.request.user.get_full_name() or self.request.user.email} for "{offer.job.name}".\nPrice: ${offer.price}\nDelivery: {offer.delivery_days} days\nFeatures: {offer.features}\n\nPlease review the offer.',
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[offer.receiver.email],
-            fail_silently=True,
         )
 
     @swagger_auto_schema(
@@ -167,14 +262,14 @@ class CustomOfferViewSet(ModelViewSet):
             )
             offer.status = 'ACCEPTED'
             offer.save()
+            publish_offer(offer)
 
             # Send email notification to sender
-            send_mail(
+            queue_mail(
                 subject=f'Your Custom Offer for {offer.job.name} Accepted',
                 message=f'Dear {offer.sender.get_full_name() or offer.sender.email},\n\nYour custom offer for "{offer.job.name}" has been accepted by {offer.receiver.get_full_name() or offer.receiver.email}.\nOrder ID: {order.id}',
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[offer.sender.email],
-                fail_silently=True,
             )
         
         return Response({'status': 'Offer accepted', 'order_id': order.id})
@@ -205,14 +300,14 @@ class CustomOfferViewSet(ModelViewSet):
         
         offer.status = 'REJECTED'
         offer.save()
+        publish_offer(offer)
 
         # Send email notification to sender
-        send_mail(
+        queue_mail(
             subject=f'Your Custom Offer for {offer.job.name} Rejected',
             message=f'Dear {offer.sender.get_full_name() or offer.sender.email},\n\nYour custom offer for "{offer.job.name}" has been rejected by {offer.receiver.get_full_name() or offer.receiver.email}.',
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[offer.sender.email],
-            fail_silently=True,
         )
         
         return Response({'status': 'Offer rejected'})
@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onesix.settings')
 
-application = get_asgi_application()
+# Set up Django before importing consumers, they import models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from api.middleware import JWTAuthMiddleware
+from api.routing import websocket_urlpatterns
+from job.middleware import CatalogFlightMiddleware
+
+application = ProtocolTypeRouter({
+    # Identical anonymous catalog requests wait on the event loop for the first one
+    'http': CatalogFlightMiddleware(django_asgi_app),
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
@@ -25,11 +25,13 @@ AUTH_USER_MODEL = 'users.User'
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver with WebSocket support, must come before staticfiles
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
     'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'drf_yasg',
@@ -42,12 +44,11 @@ INSTALLED_APPS = [
     'job',
     'order',
     'messaging',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +59,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE.insert(2, 'debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'onesix.urls'
 
 TEMPLATES = [
@@ -77,6 +82,22 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'onesix.wsgi.app'
 # WSGI_APPLICATION = 'onesix.wsgi.application'
+# HTTP and WebSockets (/ws/events/), served by daphne or any ASGI server
+ASGI_APPLICATION = 'onesix.asgi.application'
+
+# Pub/sub for WebSocket events (api.events). The in-memory layer only reaches sockets
+# connected to the same process; run several workers behind a broker instead:
+# CHANNEL_LAYERS = {
+#     'default': {
+#         'BACKEND': 'channels_redis.core.RedisChannelLayer',
+#         'CONFIG': {'hosts': [config('REDIS_URL', default='redis://127.0.0.1:6379/0')]},
+#     },
+# }
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
 
 
 # --- CORS Settings ---
@@ -126,6 +147,74 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory works out of the box; use FileBasedCache (or any shared backend) so that
+# catalog invalidations are seen by every worker process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': BASE_DIR / 'cache',
+    # }
+}
+
+# Request instrumentation, see api.middleware.RequestMetricsMiddleware
+# QUERY_BUDGETS caps the queries of an endpoint (ViewSet.action), including authentication
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'RAISE_ON_BUDGET': False,
+    'QUERY_BUDGETS': {
+        'JobViewSet.list': 4,
+        'JobViewSet.search': 4,
+        'JobViewSet.related': 2,
+        'JobViewSet.trending': 2,
+        'JobViewSet.retrieve': 6,
+        'ReviewViewSet.list': 3,
+        'CategoryViewSet.list': 2,
+        'CategoryViewSet.tree': 2,
+        'OrderViewSet.list': 4,
+        'OrderViewSet.summary': 2,
+        'OrderViewSet.queue': 3,
+        'OrderViewSet.retrieve': 6,
+        'CartViewSet.list': 5,
+        'CartViewSet.retrieve': 5,
+        'CartItemViewSet.bulk': 10,
+        'MessageViewSet.inbox': 4,
+        'ConversationViewSet.list': 4,
+        'ConversationViewSet.messages': 4,
+        'UserProfileViewSet.search': 4,
+        'UserProfileViewSet.retrieve': 3,
+    },
+}
+
+# Anonymous job/category responses, see job.cache
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+# Seconds identical concurrent misses wait for the request computing the response, see api.singleflight
+CATALOG_COALESCE_TIMEOUT = 10
+# Path prefixes of the anonymous catalog requests coalesced on the event loop, see job.middleware.CatalogFlightMiddleware
+CATALOG_COALESCE_PATHS = ['/api/v1/jobs/', '/api/v1/categories/']
+
+# Related jobs built by the build_related_jobs command, see job.recommendations for every option
+RELATED_JOBS = {
+    'TOP_K': 10,
+    'CO_PURCHASE_WEIGHT': 0.7,
+    'CONTENT_WEIGHT': 0.3,
+}
+
+# Trending leaderboard refreshed by the refresh_trending command, see job.trending for every option
+TRENDING = {
+    'HALF_LIFE': 3 * 24 * 60 * 60,
+    'TOP_N': 50,
+    'VIEW_BATCH': 20,
+}
+
+# Service fee added to job prices in carts, see job.pricing.FeePolicy
+SERVICE_FEE_RATE = '0.16'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -179,6 +268,34 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Job image derivatives, see job.images. Uploads are staged in the default storage for the process_job_images worker
+IMAGE_PIPELINE = {
+    'STORAGE': 'job.images.CloudinaryImageStorage',
+    'STAGING_STORAGE': 'default',
+    'STAGING_PREFIX': 'image_staging',
+    'DERIVATIVES': {
+        'thumbnail': (160, 120, 'crop'),
+        'card': (480, 360, 'crop'),
+        'full': (1600, 1600, 'fit'),
+    },
+    'FORMAT': 'WEBP',
+    'QUALITY': 80,
+    'MAX_ATTEMPTS': 3,
+    # Seconds after which an image claimed by a worker that stopped is claimed again
+    'CLAIM_TIMEOUT': 10 * 60,
+}
+
+# Chunked delivery uploads, see order.uploads. Chunks are kept outside MEDIA_ROOT until the upload is completed
+DELIVERY_UPLOADS = {
+    'STORAGE': 'order.uploads.LocalUploadStorage',
+    'ROOT': BASE_DIR / 'delivery_uploads',
+    'CHUNK_SIZE': 8 * 1024 * 1024,
+    'MAX_SIZE': 1024 * 1024 * 1024,
+    'EXPIRE_AFTER': 24 * 60 * 60,
+    # Seconds after which an upload claimed by a finalize_delivery_uploads worker that stopped is claimed again
+    'CLAIM_TIMEOUT': 60 * 60,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -63,6 +63,12 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('id', 'created_at', 'updated_at', 'total_price')
 
+    def save_related(self, request, form, formsets, change):
+        """Save the order items, then give a new order the deadline of its longest job (see Order.save)."""
+        super().save_related(request, form, formsets, change)
+        if form.instance.deadline is None:
+            form.instance.save()
+
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     """
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from order.services import OrderDeadlineService
+
+
+class Command(BaseCommand):
+    help = 'Flag overdue orders and remind sellers of orders due soon, queueing emails and WebSocket events in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders locked and processed per transaction')
+        parser.add_argument('--due-within', type=int, default=1, help='Remind sellers of orders due within this many days')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between two runs')
+        parser.add_argument('--once', action='store_true', help='Process due orders once and exit (for cron)')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                overdue, reminded = self.run(options)
+                if overdue or reminded:
+                    self.stdout.write(f"Flagged {overdue} overdue orders, reminded {reminded} orders due soon")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def run(self, options):
+        """ Drain both queues batch by batch, each batch commits (and releases its locks) on its own """
+        today = timezone.localdate()
+        until = today + timedelta(days=options['due_within'])
+        overdue = self.drain(OrderDeadlineService.process_overdue, today, batch_size=options['batch_size'])
+        reminded = self.drain(OrderDeadlineService.process_due_soon, today, until, batch_size=options['batch_size'])
+        return overdue, reminded
+
+    def drain(self, process, *args, **kwargs):
+        total = 0
+        while True:
+            processed = process(*args, **kwargs)
+            if not processed:
+                return total
+            total += processed
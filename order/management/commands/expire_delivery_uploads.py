@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from order.services import DeliveryUploadService
+from order.uploads import upload_settings
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked delivery uploads that received nothing for DELIVERY_UPLOADS["EXPIRE_AFTER"] seconds, with their stored chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expire-after', type=int, default=None, help='Idle seconds before an upload is deleted')
+
+    def handle(self, *args, **options):
+        expire_after = options['expire_after'] or upload_settings()['EXPIRE_AFTER']
+        deleted = DeliveryUploadService.expire(timezone.now() - timedelta(seconds=expire_after))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired delivery uploads"))
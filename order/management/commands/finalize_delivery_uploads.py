@@ -0,0 +1,52 @@
+import select
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from order.services import DELIVERY_CHANNEL, DeliveryUploadService
+
+
+class Command(BaseCommand):
+    help = 'Verify completed chunked uploads, copy them to the delivery storage and create their deliveries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5, help='Uploads claimed at a time')
+        parser.add_argument('--poll-interval', type=int, default=10, help='Seconds to wait for new uploads when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit (for cron)')
+
+    def handle(self, *args, **options):
+        self.listen()
+        try:
+            while True:
+                finalized = self.drain(options['batch_size'])
+                if finalized:
+                    self.stdout.write(f"Finalized {finalized} delivery uploads")
+                if options['once']:
+                    break
+                if not finalized:
+                    self.wait(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size):
+        total = 0
+        while True:
+            finalized = DeliveryUploadService.finalize_batch(batch_size)
+            if not finalized:
+                return total
+            total += finalized
+
+    def listen(self):
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {DELIVERY_CHANNEL}")
+
+    def wait(self, timeout):
+        """ Sleep until DeliveryUploadService.complete sends a NOTIFY or the poll interval elapses """
+        if connection.vendor != 'postgresql':
+            time.sleep(timeout)
+            return
+        pg_connection = connection.connection
+        if select.select([pg_connection], [], [], timeout)[0]:
+            pg_connection.poll()
+            pg_connection.notifies.clear()
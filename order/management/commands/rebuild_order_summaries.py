@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from order.services import OrderSummaryService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user order counts and amounts by status (OrderSummary) from orders and order items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Number of rows inserted per statement')
+
+    def handle(self, *args, **options):
+        created = OrderSummaryService.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} order summary rows"))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 04:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_seller_columns(apps, schema_editor):
+    OrderItem = apps.get_model('order', 'OrderItem')
+    Order = apps.get_model('order', 'Order')
+    Job = apps.get_model('job', 'Job')
+    order = Order.objects.filter(pk=OuterRef('order_id'))
+    OrderItem.objects.update(
+        freelancer=Subquery(Job.objects.filter(pk=OuterRef('job_id')).values('created_by')[:1]),
+        order_status=Subquery(order.values('status')[:1]),
+        deadline=Subquery(order.values('deadline')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0005_category_job_count'),
+        ('order', '0003_order_summary_and_job_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='deadline',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='order_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In Progress'), ('DELIVERED', 'Delivered'), ('COMPLETED', 'Completed'), ('CANCELED', 'Canceled')], default='PENDING', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['freelancer', 'order_status', 'deadline'], name='order_order_freelan_0b215a_idx'),
+        ),
+        migrations.RunPython(populate_seller_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0007_order_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryupload',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='deliveryupload',
+            name='status',
+            field=models.CharField(choices=[('UPLOADING', 'Uploading'), ('QUEUED', 'Queued'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='UPLOADING', max_length=10),
+        ),
+    ]
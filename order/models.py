@@ -61,21 +61,34 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    # Set by the check_order_deadlines scheduler, cleared when the deadline changes
+    reminded_at = models.DateTimeField(null=True, blank=True)
+    overdue_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['user', 'status', 'created_at']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Open orders not flagged overdue yet, the only ones the deadline scheduler looks at
+            models.Index(
+                fields=['deadline'],
+                name='order_open_deadline_idx',
+                condition=models.Q(status__in=['PENDING', 'IN_PROGRESS'], overdue_at__isnull=True),
+            ),
+            # New orders since the last trending refresh
+            models.Index(fields=['created_at'], name='order_created_at_idx'),
         ]
 
     def save(self, *args, **kwargs):
+        # Orders created outside OrderService (admin, fixtures) get the deadline of their longest job once they have items
+        if self.deadline is None and not self._state.adding:
+            longest = self.items.aggregate(days=models.Max('job__duration_days'))['days']
+            if longest is not None:
+                self.deadline = timezone.now().date() + timedelta(days=longest)
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'deadline'}
         super().save(*args, **kwargs)
 
-        if not self.deadline and self.items.exists():
-            max_duration = max(item.job.duration_days for item in self.items.all())
-            self.deadline = timezone.now().date() + timedelta(days=max_duration)
-            super().save(update_fields=['deadline']) 
-        
-
     def __str__(self):
         return f"Order {self.id} by {self.user.first_name} - {self.status}"
 
@@ -84,7 +97,13 @@ class Order(models.Model):
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='order_items')
+    # Name of the job at checkout, so order lists don't join jobs and renames don't rewrite history
+    job_name = models.CharField(max_length=200, blank=True, default='')
+    # Seller of the job, set at checkout
     freelancer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_jobs")
+    # Copies of the order's status and deadline, kept in sync by order.signals, for the seller queue index
+    order_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, default=Order.PENDING)
+    deadline = models.DateField(null=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=12, decimal_places=2)
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
@@ -92,6 +111,7 @@ class OrderItem(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['order', 'job', 'freelancer']),
+            models.Index(fields=['freelancer', 'order_status', 'deadline']),
         ]
 
     def save(self, *args, **kwargs):
@@ -102,6 +122,34 @@ class OrderItem(models.Model):
         return f"{self.job.name} for Order {self.order.id}"
     
 
+class OrderSummary(models.Model):
+    """
+    Number and amount of a user's orders per status, as buyer and as seller. Maintained by
+    order.services.OrderSummaryService so dashboards don't scan the order history.
+    """
+    BUYER = 'buyer'
+    SELLER = 'seller'
+    ROLE_CHOICES = [
+        (BUYER, 'Buyer'),
+        (SELLER, 'Seller'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='order_summaries')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    # Order total for buyers, total of their own items for sellers
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'role', 'status'], name='order_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.status}: {self.order_count}"
+
+
 class OrderDelivery(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='deliveries')
     file = models.FileField(upload_to='order_deliveries', blank=True, null=True, validators=[delivery_validate_file_size])
@@ -115,4 +163,48 @@ class OrderDelivery(models.Model):
         ]
 
     def __str__(self):
-        return f"Delivery for Order {self.order.id} by {self.delivered_by.email}"
\ No newline at end of file
+        return f"Delivery for Order {self.order.id} by {self.delivered_by.email}"
+
+
+class DeliveryUpload(models.Model):
+    """
+    A resumable, chunked upload of a delivery file. Chunks are stored by order.uploads until the upload
+    is completed, then the finalize_delivery_uploads worker turns the assembled file into an OrderDelivery.
+    """
+    UPLOADING = 'UPLOADING'
+    QUEUED = 'QUEUED'
+    PROCESSING = 'PROCESSING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (UPLOADING, 'Uploading'),
+        (QUEUED, 'Queued'),
+        (PROCESSING, 'Processing'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='delivery_uploads')
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='delivery_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # SHA-256 of the whole file, hex encoded, checked once the file is assembled
+    checksum = models.CharField(max_length=64, blank=True, default='')
+    description = models.TextField(blank=True, default='')
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=UPLOADING)
+    delivery = models.OneToOneField(OrderDelivery, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    # Why the last completion did not create a delivery
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Upload of {self.filename} for Order {self.order_id} ({self.received}/{self.size})"
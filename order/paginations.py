@@ -0,0 +1,11 @@
+from job.paginations import OptionalCursorPagination
+
+
+class OrderPagination(OptionalCursorPagination):
+    """ Page numbers by default, `?pagination=cursor` skips the COUNT(*) for dashboards """
+    ordering = ('-created_at', '-id')
+
+
+class OrderDeliveryPagination(OptionalCursorPagination):
+    fallback_pagination_class = None
+    ordering = '-id'
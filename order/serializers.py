@@ -1,10 +1,13 @@
+from django.db import transaction
 from rest_framework import serializers
-from order.models import Cart, CartItem, Order, OrderItem, OrderDelivery
+from order.models import Cart, CartItem, DeliveryUpload, Order, OrderItem, OrderDelivery
 from job.models import Job
 from job.serializers import JobSerializer
 from order.services import OrderService
+from order.uploads import DELIVERY_FILE_EXTENSIONS, upload_settings
 from users.serializers import UserSerializer
 from django.core.validators import FileExtensionValidator
+from job.validators import delivery_validate_file_size
 from decimal import Decimal
 
 
@@ -30,25 +33,61 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         job_id = self.validated_data['job_id']
         quantity = self.validated_data['quantity']
 
-        try:
-            cart_item = CartItem.objects.get(cart_id=cart_id, job_id=job_id)
-            cart_item.quantity += quantity
-            self.instance = cart_item.save()
-        except CartItem.DoesNotExist:
-            self.instance = CartItem.objects.create(cart_id=cart_id, **self.validated_data)
+        with transaction.atomic():
+            # Same cart lock as OrderService.create_order, so a checkout never prices a half-written cart
+            if Cart.objects.select_for_update().filter(pk=cart_id).first() is None:
+                raise serializers.ValidationError({'cart_id': 'No cart found with this id'})
+            try:
+                cart_item = CartItem.objects.get(cart_id=cart_id, job_id=job_id)
+                cart_item.quantity += quantity
+                cart_item.save()
+                self.instance = cart_item
+            except CartItem.DoesNotExist:
+                self.instance = CartItem.objects.create(cart_id=cart_id, **self.validated_data)
 
         return self.instance
     
     def validate_job_id(self, value):
-        if not Job.objects.filter(pk=value).exists():
+        created_by = Job.objects.filter(pk=value).values_list('created_by', flat=True).first()
+        if created_by is None:
             raise serializers.ValidationError(f"Job with id {value} does not exists")
-        job = Job.objects.get(pk=value)
-        user = self.context['request'].user
-        if job.created_by == user:
+        if created_by == self.context['request'].user.id:
             raise serializers.ValidationError("You cannot add your own job to the cart")
         return value
 
 
+class BulkCartItemSerializer(serializers.Serializer):
+    job_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, help_text="0 removes the job from the cart")
+
+
+class BulkUpdateCartSerializer(serializers.Serializer):
+    items = BulkCartItemSerializer(many=True, allow_empty=True, max_length=100)
+    replace = serializers.BooleanField(
+        default=False, help_text="Remove every cart item that is not listed, to sync a client-side cart"
+    )
+
+    def validate_items(self, items):
+        job_ids = [item['job_id'] for item in items]
+        if len(job_ids) != len(set(job_ids)):
+            raise serializers.ValidationError("Each job can only be listed once")
+
+        # One query for all listed jobs. Removals (quantity 0) are not checked, so a job that no longer exists can still be taken out
+        creators = dict(Job.objects.filter(pk__in=job_ids).values_list('id', 'created_by'))
+        user = self.context['request'].user
+        errors = {}
+        for item in items:
+            if item['quantity'] == 0:
+                continue
+            if item['job_id'] not in creators:
+                errors[item['job_id']] = f"Job with id {item['job_id']} does not exists"
+            elif creators[item['job_id']] == user.id:
+                errors[item['job_id']] = "You cannot add your own job to the cart"
+        if errors:
+            raise serializers.ValidationError(errors)
+        return items
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
@@ -69,53 +108,31 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 class CartItemDetailSerializer(serializers.ModelSerializer):
     job = JobSerializer(read_only=True)
-    total_price = serializers.SerializerMethodField()
+    # Annotated by CartService.with_totals, including the service fee
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = CartItem
         fields = ['id', 'job', 'quantity', 'total_price']
 
-    def get_total_price(self, obj):
-        return round(obj.quantity * obj.job.price.price * Decimal(1.16), 2)
-
 
 class CartSerializer(serializers.ModelSerializer):
+    """ Expects carts loaded through CartService.with_totals """
     items = CartItemDetailSerializer(many=True, read_only=True)
-    total_price = serializers.SerializerMethodField()
+    # A cart that was just created has no annotation, and no items
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True, default=Decimal('0.00'))
 
     class Meta:
         model = Cart
         fields = ['id', 'items', 'total_price']
 
-    def get_total_price(self, cart):
-        total = Decimal(0) 
-        for item in cart.items.all():
-            price = item.job.price.price * Decimal(1.16)
-            total += item.quantity * price
-        return round(total, 2)
-
 
 class CreateOrderSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
-    def validate_cart_id(self, cart_id):
-        if not Cart.objects.filter(pk=cart_id).exists():
-            raise serializers.ValidationError('No cart found with this id')
-        
-        if not CartItem.objects.filter(cart_id=cart_id).exists():
-            raise serializers.ValidationError('Cart is empty')
-        
-        return cart_id
-    
+    # Existence, ownership and emptiness are checked by OrderService.create_order against the locked cart
     def create(self, validated_data):
-        user_id = self.context['user_id']
-        cart_id = validated_data['cart_id']
-
-        try:
-            order = OrderService.create_order(user_id=user_id, cart_id=cart_id)
-            return order
-        except ValueError as e:
-            raise serializers.ValidationError(str(e))
+        return OrderService.create_order(self.context['user'], validated_data['cart_id'])
 
     def to_representation(self, instance):
         return OrderSerializer(instance).data
@@ -123,14 +140,60 @@ class CreateOrderSerializer(serializers.Serializer):
 
 class OrderItemSerializer(serializers.ModelSerializer):
     job = serializers.PrimaryKeyRelatedField(queryset=Job.objects.all())
-    job_name = serializers.SerializerMethodField() 
 
     class Meta:
         model = OrderItem
         fields = ['id', 'job', 'job_name', 'price', 'quantity', 'total_price']
+        read_only_fields = ['job_name']
+
 
-    def get_job_name(self, obj):
-        return obj.job.name
+class OrderListItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'job', 'job_name', 'quantity', 'total_price']
+        read_only_fields = fields
+
+
+class OrderListSerializer(serializers.ModelSerializer):
+    """ Slim order row for order lists and dashboards, the buyer is only referenced by id """
+    items = OrderListItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'user', 'total_price', 'status', 'deadline', 'overdue_at', 'created_at', 'updated_at', 'items']
+        read_only_fields = fields
+
+
+class SellerQueueItemSerializer(serializers.ModelSerializer):
+    """ An order item in a freelancer's queue, expects the order to be selected with it """
+    status = serializers.CharField(source='order_status', read_only=True)
+    buyer = serializers.IntegerField(source='order.user_id', read_only=True)
+    ordered_at = serializers.DateTimeField(source='order.created_at', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'order', 'job', 'job_name', 'quantity', 'total_price', 'status', 'deadline', 'buyer', 'ordered_at']
+        read_only_fields = fields
+
+
+class StatusSummarySerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class RoleSummarySerializer(serializers.Serializer):
+    pending = StatusSummarySerializer(source=Order.PENDING)
+    in_progress = StatusSummarySerializer(source=Order.IN_PROGRESS)
+    delivered = StatusSummarySerializer(source=Order.DELIVERED)
+    completed = StatusSummarySerializer(source=Order.COMPLETED)
+    canceled = StatusSummarySerializer(source=Order.CANCELED)
+    total = StatusSummarySerializer()
+
+
+class OrderSummarySerializer(serializers.Serializer):
+    """ Renders OrderSummaryService.summary """
+    buyer = RoleSummarySerializer()
+    seller = RoleSummarySerializer()
 
 
 class UpdateOrderSerializer(serializers.ModelSerializer):
@@ -146,8 +209,8 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = ['id', 'user', 'total_price', 'status', 'deadline', 'created_at', 'updated_at', 'items']
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'total_price', 'status', 'deadline', 'overdue_at', 'created_at', 'updated_at', 'items']
+        read_only_fields = ['user', 'overdue_at', 'created_at', 'updated_at']
 
 
 class OrderDeliverySerializer(serializers.ModelSerializer):
@@ -158,20 +221,63 @@ class OrderDeliverySerializer(serializers.ModelSerializer):
         model = OrderDelivery
         fields = ['id', 'order', 'file', 'description', 'delivered_by', 'delivered_at']
         read_only_fields = ['delivered_by', 'delivered_at']
-        validators = [
-            FileExtensionValidator(allowed_extensions=['pdf', 'zip', 'jpg', 'png'])
-        ]
+        # Field validators, as a serializer-level validator the extension check received the whole payload
+        extra_kwargs = {
+            'file': {'validators': [
+                FileExtensionValidator(allowed_extensions=DELIVERY_FILE_EXTENSIONS),
+                delivery_validate_file_size,
+            ]},
+        }
 
     def validate(self, data):
         order = data['order']
-        job_creator = order.items.first().job.created_by
-        if self.context['request'].user != job_creator:
+        if not OrderService.is_seller(order, self.context['request'].user):
             raise serializers.ValidationError("Only the job creator can deliver this order.")
         if order.status != Order.IN_PROGRESS:
             raise serializers.ValidationError("Order must be in progress to deliver.")
         return data
     
 
+class DeliveryUploadSerializer(serializers.ModelSerializer):
+    order = serializers.PrimaryKeyRelatedField(queryset=Order.objects.all())
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DeliveryUpload
+        fields = ['id', 'order', 'filename', 'size', 'checksum', 'description', 'offset', 'chunk_size', 'status', 'error', 'delivery', 'created_at', 'updated_at']
+        read_only_fields = ['status', 'error', 'delivery', 'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        return upload_settings()['CHUNK_SIZE']
+
+    def validate_filename(self, value):
+        extension = value.rsplit('.', 1)[-1].lower() if '.' in value else ''
+        if extension not in DELIVERY_FILE_EXTENSIONS:
+            raise serializers.ValidationError(f"Allowed extensions are: {', '.join(DELIVERY_FILE_EXTENSIONS)}.")
+        return value
+
+    def validate_size(self, value):
+        max_size = upload_settings()['MAX_SIZE']
+        if not 0 < value <= max_size:
+            raise serializers.ValidationError(f"Size must be between 1 and {max_size} bytes.")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(char not in '0123456789abcdef' for char in value)):
+            raise serializers.ValidationError("Checksum must be a hex encoded SHA-256.")
+        return value
+
+    def validate(self, data):
+        order = data['order']
+        if not OrderService.is_seller(order, self.context['request'].user):
+            raise serializers.ValidationError("Only the job creator can deliver this order.")
+        if order.status != Order.IN_PROGRESS:
+            raise serializers.ValidationError("Order must be in progress to deliver.")
+        return data
+
+
 class CreateCustomOrderSerializer(serializers.Serializer):
     job = serializers.PrimaryKeyRelatedField(queryset=Job.objects.all())
     price = serializers.DecimalField(max_digits=10, decimal_places=2)
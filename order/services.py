@@ -1,8 +1,234 @@
-from order.models import Cart, Order, OrderItem
-from django.db import transaction
+import logging
+from order.models import Cart, CartItem, DeliveryUpload, Order, OrderDelivery, OrderItem, OrderSummary
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Prefetch, Q, Sum, When
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.core.mail import send_mail
 from django.conf import settings
+from job.pricing import get_fee_policy
+from job.services import JobStatsService
+from users.services import FreelancerStatsService
+from api.events import publish_event
+from api.mail import queue_mail, queue_mass_mail
+from order.uploads import UploadOffsetConflict, UploadOffsetError, get_upload_storage, parse_content_range, upload_settings
+
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_CHANNEL = 'delivery_uploads'
+
+
+class CartService:
+    @staticmethod
+    def with_totals(queryset):
+        """
+        Summary:
+            Prepare carts for CartSerializer.
+
+        Description:
+            Annotates each item's total_price (quantity x price, including the service fee from job.pricing,
+            rounded to cents) and each cart's total_price, the sum of those rounded item totals so the lines
+            always add up to the total, in SQL, and loads items with everything JobSerializer
+            renders (price, category, creator with portfolio, images), so rendering a cart takes a
+            fixed number of queries whatever its size.
+
+        Args:
+            queryset: The cart queryset.
+
+        Returns:
+            QuerySet: The annotated carts with their items prefetched.
+        """
+        fee = get_fee_policy()
+        items = (
+            CartItem.objects
+            .select_related('job__price', 'job__category', 'job__created_by')
+            .prefetch_related('job__images', 'job__created_by__portfolio')
+            .defer('job__search_vector')
+            .annotate(total_price=fee.expression(F('quantity') * F('job__price__price')))
+            .order_by('id')
+        )
+        return queryset.annotate(
+            total_price=Sum(fee.expression(F('items__quantity') * F('items__job__price__price')))
+        ).prefetch_related(Prefetch('items', queryset=items))
+
+    @staticmethod
+    def bulk_update_items(cart, items, replace=False):
+        """
+        Summary:
+            Set the quantities of several jobs in a cart at once.
+
+        Description:
+            Upserts every listed job with a single INSERT ... ON CONFLICT (cart, job) DO UPDATE, and removes
+            jobs listed with quantity 0 (and, with replace, every job that is not listed) with a single DELETE.
+            Quantities are absolute, so repeating a request gives the same cart.
+
+        Args:
+            cart: The cart to update, already checked to belong to the user.
+            items: Validated dicts with job_id and quantity, each job listed once.
+            replace: Whether to remove the cart items of jobs that are not listed.
+
+        Returns:
+            Cart: The updated cart.
+        """
+        upserts = [item for item in items if item['quantity'] > 0]
+        removed = cart.items.exclude(job_id__in=[item['job_id'] for item in upserts]) if replace else \
+            cart.items.filter(job_id__in=[item['job_id'] for item in items if item['quantity'] == 0])
+
+        with transaction.atomic():
+            # Same cart lock as OrderService.create_order, so a checkout never prices a half-written cart
+            Cart.objects.select_for_update().get(pk=cart.pk)
+            removed.delete()
+            if upserts:
+                CartItem.objects.bulk_create(
+                    [CartItem(cart=cart, job_id=item['job_id'], quantity=item['quantity']) for item in upserts],
+                    update_conflicts=True,
+                    unique_fields=['cart', 'job'],
+                    update_fields=['quantity'],
+                )
+        return cart
+
+
+class OrderSummaryService:
+    @staticmethod
+    def _changes(order, *moves):
+        """
+        Summary:
+            Changes to OrderSummary rows for counting an order in (or removing it from) some statuses.
+
+        Args:
+            order: The order.
+            *moves: (status, sign) pairs, sign is 1 to count the order in the status and -1 to remove it.
+
+        Returns:
+            dict: (user_id, role, status) -> (order count delta, amount delta).
+        """
+        sellers = [
+            (seller_id, amount)
+            for seller_id, amount in order.items.order_by().values('freelancer')
+            .annotate(amount=Sum('total_price')).values_list('freelancer', 'amount')
+            if seller_id is not None
+        ]
+        changes = {}
+        for status, sign in moves:
+            changes[(order.user_id, OrderSummary.BUYER, status)] = (sign, sign * order.total_price)
+            for seller_id, amount in sellers:
+                changes[(seller_id, OrderSummary.SELLER, status)] = (sign, sign * amount)
+        return changes
+
+    @staticmethod
+    def _apply(changes):
+        """ Apply the changes with one INSERT for missing rows and one UPDATE """
+        if not changes:
+            return
+        OrderSummary.objects.bulk_create(
+            [OrderSummary(user_id=user_id, role=role, status=status) for user_id, role, status in changes],
+            ignore_conflicts=True
+        )
+
+        def per_row(field, index):
+            return Case(
+                *[
+                    When(user_id=user_id, role=role, status=status, then=F(field) + delta[index])
+                    for (user_id, role, status), delta in changes.items()
+                ],
+                default=F(field),
+                output_field=OrderSummary._meta.get_field(field)
+            )
+
+        rows = Q()
+        for user_id, role, status in changes:
+            rows |= Q(user_id=user_id, role=role, status=status)
+        OrderSummary.objects.filter(rows).update(order_count=per_row('order_count', 0), amount=per_row('amount', 1))
+
+    @staticmethod
+    def add_order(order, sign=1):
+        """
+        Summary:
+            Count a new order for its buyer and sellers, or remove a deleted one with sign=-1.
+
+        Args:
+            order: The order, with its items saved.
+            sign: 1 or -1.
+        """
+        OrderSummaryService._apply(OrderSummaryService._changes(order, (order.status, sign)))
+
+    @staticmethod
+    def apply_status_change(order, previous_status):
+        """
+        Summary:
+            Move an order from its previous status to its current one.
+
+        Args:
+            order: The order after the change.
+            previous_status: The status before the change.
+        """
+        if previous_status == order.status:
+            return
+        OrderSummaryService._apply(OrderSummaryService._changes(order, (previous_status, -1), (order.status, 1)))
+
+    @staticmethod
+    def summary(user):
+        """
+        Summary:
+            A user's order counts and amounts by status, as buyer and as seller.
+
+        Description:
+            Reads at most ten OrderSummary rows. Statuses without orders are reported as zero, `total`
+            covers every status including canceled orders.
+
+        Args:
+            user: The authenticated user.
+
+        Returns:
+            dict: {role: {status: {'count', 'amount'}, 'total': {'count', 'amount'}}}
+        """
+        result = {}
+        for role, _ in OrderSummary.ROLE_CHOICES:
+            result[role] = {status: {'count': 0, 'amount': Decimal(0)} for status, _ in Order.STATUS_CHOICES}
+            result[role]['total'] = {'count': 0, 'amount': Decimal(0)}
+        for role, status, count, amount in OrderSummary.objects.filter(user=user).values_list('role', 'status', 'order_count', 'amount'):
+            result[role][status] = {'count': count, 'amount': amount}
+            result[role]['total']['count'] += count
+            result[role]['total']['amount'] += amount
+        return result
+
+    @staticmethod
+    def rebuild(batch_size=5000):
+        """
+        Summary:
+            Recompute every OrderSummary row from orders and order items.
+
+        Description:
+            Replaces the table inside one transaction with two GROUP BY queries, one for buyers and
+            one for sellers. Used to backfill the table and to repair drift after bulk loads.
+
+        Args:
+            batch_size: Number of rows inserted per statement.
+
+        Returns:
+            int: The number of rows created.
+        """
+        buyers = (
+            OrderSummary(user_id=user_id, role=OrderSummary.BUYER, status=status, order_count=count, amount=amount)
+            for user_id, status, count, amount in Order.objects.order_by().values('user', 'status')
+            .annotate(count=Count('id'), amount=Sum('total_price')).values_list('user', 'status', 'count', 'amount').iterator()
+        )
+        sellers = (
+            OrderSummary(user_id=user_id, role=OrderSummary.SELLER, status=status, order_count=count, amount=amount)
+            for user_id, status, count, amount in OrderItem.objects.filter(freelancer__isnull=False).order_by()
+            .values('freelancer', 'order_status')
+            .annotate(count=Count('order', distinct=True), amount=Sum('total_price'))
+            .values_list('freelancer', 'order_status', 'count', 'amount').iterator()
+        )
+        with transaction.atomic():
+            OrderSummary.objects.all().delete()
+            created = OrderSummary.objects.bulk_create(buyers, batch_size=batch_size)
+            created += OrderSummary.objects.bulk_create(sellers, batch_size=batch_size)
+        return len(created)
 
 
 class OrderService:
@@ -13,9 +239,10 @@ class OrderService:
             Create an order from a user's cart.
 
         Description:
-            Validates that the cart belongs to the user and is not empty. Ensures the user is not ordering their own jobs.
-            Calculates the total price based on cart items, creates an order and associated order items,
-            sends email notifications to the buyer and job creators, and deletes the cart.
+            Locks the cart row so a double-submitted checkout waits for the first one and then finds the cart gone.
+            Reads the cart items once and validates emptiness and own-job items, prices the cart and computes the
+            deadline from max(duration_days) from those rows. Creates the order and bulk inserts its items, bumps the
+            ordered jobs' order_count, the sellers' FreelancerStats and the OrderSummary rows and deletes the cart. The number of queries does not depend on the cart size.
 
         Args:
             user: The authenticated user creating the order.
@@ -26,35 +253,48 @@ class OrderService:
 
         Raises:
             PermissionDenied: If the cart does not belong to the user.
-            ValidationError: If the cart is empty or contains the user's own jobs.
+            ValidationError: If the cart does not exist, is empty or contains the user's own jobs.
         """
         with transaction.atomic():
-            cart = Cart.objects.get(pk=cart_id)
-            cart_items = cart.items.select_related('job').all()
+            cart = Cart.objects.select_for_update().filter(pk=cart_id).first()
+            if cart is None:
+                raise ValidationError({'cart_id': 'No cart found with this id'})
+            if cart.user_id != user.id:
+                raise PermissionDenied({'detail': 'You can only check out your own cart'})
 
+            cart_items = list(cart.items.values_list(
+                'job_id', 'job__name', 'job__created_by', 'job__price__price', 'quantity', 'job__duration_days'
+            ))
             if not cart_items:
                 raise ValidationError("Your cart is empty.")
-
-            total_price = sum([item.job.price.price *
-                               item.quantity for item in cart_items])
+            if any(freelancer_id == user.id for _, _, freelancer_id, _, _, _ in cart_items):
+                raise ValidationError("You cannot order your own job.")
 
             order = Order.objects.create(
                 user=user,
-                total_price=total_price
+                total_price=sum(price * quantity for _, _, _, price, quantity, _ in cart_items),
+                deadline=timezone.now().date() + timedelta(days=max(days for *_, days in cart_items))
             )
 
             order_items = [
                 OrderItem(
                     order=order,
-                    job=item.job,
-                    price=item.job.price.price,
-                    quantity=item.quantity,
-                    total_price=item.job.price.price * item.quantity
+                    job_id=job_id,
+                    job_name=job_name,
+                    freelancer_id=freelancer_id,
+                    order_status=order.status,
+                    deadline=order.deadline,
+                    price=price,
+                    quantity=quantity,
+                    total_price=price * quantity
                 )
-                for item in cart_items
+                for job_id, job_name, freelancer_id, price, quantity, _ in cart_items
             ]
 
             OrderItem.objects.bulk_create(order_items)
+            JobStatsService.add_orders([item.job_id for item in order_items])
+            FreelancerStatsService.add_order(order)
+            OrderSummaryService.add_order(order)
 
             # Send notification to buyer
             # send_mail(
@@ -101,81 +341,534 @@ class OrderService:
             PermissionDenied: If a non-admin user tries to cancel someone else's order.
             ValidationError: If the order is already completed.
         """
-        if user.is_staff:
+        if not user.is_staff:
+            if order.user != user:
+                raise PermissionDenied({'detail': 'You can only cancel your own order'})
+
+            if order.status == Order.COMPLETED:
+                raise ValidationError({'detail': 'You can not cancel an completed order'})
+
+        with transaction.atomic():
+            previous_status = order.status
             order.status = Order.CANCELED
             order.save()
-            return order
-        
-        if order.user != user:
-            raise PermissionDenied({'detail': 'You can only cancel your own order'})
-        
-        if order.status == Order.COMPLETED:
-            raise ValidationError({'detail': 'You can not cancel an completed order'})
-        
-        order.status = Order.CANCELED
-        order.save()
+            OrderService.publish_status(order, previous_status)
         return order
-        
 
-    # @staticmethod
-    # def create_custom_order(user, job, price, delivery_days, features):
-    #     """
-    #     Summary:
-    #         Create a custom order for a specific job.
-
-    #     Description:
-    #         Creates a custom order for a job with a specified price, delivery days, and features.
-    #         Validates that the user is not ordering their own job. Creates an order with a single order item
-    #         and sends email notifications to the buyer and job creator.
-
-    #     Args:
-    #         user: The authenticated user creating the order.
-    #         job: The job object being ordered.
-    #         price: The custom price for the order.
-    #         delivery_days: The number of days for delivery.
-    #         features: A description of the custom features included in the order.
-
-    #     Returns:
-    #         Order: The created order object.
-
-    #     Raises:
-    #         ValidationError: If the user attempts to order their own job.
-    #     """
-    #     with transaction.atomic():
-    #         if job.created_by == user:
-    #             raise ValidationError("You cannot order your own job.")
-            
-    #         total_price = price
-    #         order = Order.objects.create(user=user, total_price=total_price)
-            
-    #         OrderItem.objects.create(
-    #             order=order,
-    #             job=job,
-    #             price=price,
-    #             quantity=1,
-    #             total_price=total_price
-    #         )
-
-    #         # Send notification to buyer
-    #         send_mail(
-    #             subject='Custom Order Placed Successfully',
-    #             message=f'Dear {user.get_full_name() or user.email},\n\nYour custom order (ID: {order.id}) for "{job.name}" has been placed successfully.\nTotal Price: ${total_price}\nDelivery Days: {delivery_days}\nFeatures: {features}\n\nThank you!',
-    #             from_email=settings.DEFAULT_FROM_EMAIL,
-    #             recipient_list=[user.email],
-    #             fail_silently=True,
-    #         )
-
-    #         # Send notification to job creator
-    #         send_mail(
-    #             subject='Your Job Has Been Ordered (Custom Offer)',
-    #             message=f'Dear {job.created_by.get_full_name() or job.created_by.email},\n\nYour job "{job.name}" has been ordered by {user.get_full_name() or user.email} via a custom offer.\nOrder ID: {order.id}\nPrice: ${price}\nDelivery Days: {delivery_days}\nFeatures: {features}\n\nThank you!',
-    #             from_email=settings.DEFAULT_FROM_EMAIL,
-    #             recipient_list=[job.created_by.email],
-    #             fail_silently=True,
-    #         )
-
-    #         return order
+    @staticmethod
+    def is_seller(order, user):
+        """
+        Summary:
+            Whether the user sells at least one item of the order.
+
+        Description:
+            A single lookup on the indexed OrderItem.freelancer column.
+
+        Args:
+            order: The order.
+            user: The user to check.
+
+        Returns:
+            bool: True if one of the order items is assigned to the user.
+        """
+        return OrderItem.objects.filter(order=order, freelancer=user).exists()
+
+    @staticmethod
+    def mark_delivered(delivery):
+        """
+        Summary:
+            Move the order of a new delivery to DELIVERED and notify the buyer.
 
+        Args:
+            delivery: The saved delivery.
+        """
+        order = delivery.order
+        previous_status = order.status
+        order.status = Order.DELIVERED
+        order.save()
+        OrderService.publish_status(order, previous_status)
+
+        delivered_by = delivery.delivered_by
+        queue_mail(
+            subject=f'Order {order.id} Delivered',
+            message=f'Dear {order.user.get_full_name() or order.user.email},\n\nYour order (ID: {order.id}) has been delivered by {delivered_by.get_full_name() or delivered_by.email}.\nDescription: {delivery.description}\nFile: {delivery.file.url if delivery.file else "No file"}',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[order.user.email],
+        )
+
+    @staticmethod
+    def sync_items(order):
+        """
+        Summary:
+            Copy an order's status and deadline to its items.
+
+        Description:
+            OrderItem.order_status and OrderItem.deadline back the (freelancer, order_status, deadline) index
+            of the seller queue. order.signals calls this when either changes on save, code that changes
+            them with QuerySet.update() must call it (or update the items) itself.
+
+        Args:
+            order: The order after the change.
+        """
+        OrderItem.objects.filter(order=order).update(order_status=order.status, deadline=order.deadline)
+
+    @staticmethod
+    def seller_queue(user, statuses):
+        """
+        Summary:
+            The order items a freelancer has to work on, earliest deadline first.
+
+        Description:
+            One range scan of the (freelancer, order_status, deadline) index, joined to the order for the buyer
+            and the order date.
+
+        Args:
+            user: The freelancer.
+            statuses: The order statuses to include.
+
+        Returns:
+            QuerySet: OrderItem rows with their order.
+        """
+        return (
+            OrderItem.objects.filter(freelancer=user, order_status__in=statuses)
+            .select_related('order')
+            .order_by('deadline', 'id')
+        )
+
+    @staticmethod
+    def publish_status(order, previous_status):
+        """
+        Summary:
+            Push an order.updated WebSocket event to the buyer and the sellers of the order.
+
+        Description:
+            The event is sent once the current transaction commits, see api.events.publish_event.
+
+        Args:
+            order: The order whose status changed.
+            previous_status: The status before the change.
+        """
+        sellers = order.items.exclude(freelancer__isnull=True).values_list('freelancer', flat=True).distinct()
+        publish_event([order.user_id, *sellers], 'order.updated', {
+            'id': str(order.id),
+            'status': order.status,
+            'previous_status': previous_status,
+            'deadline': order.deadline.isoformat() if order.deadline else None,
+            'updated_at': order.updated_at.isoformat(),
+        })
         
-    
-        
\ No newline at end of file
+
+    @staticmethod
+    def create_custom_order(user, job, price, delivery_days, features):
+        """
+        Summary:
+            Create a custom order for a specific job.
+
+        Description:
+            Creates an order with a single order item at the agreed price, due delivery_days from today, and
+            notifies the buyer and the job creator. The counters are updated like for a checkout.
+
+        Args:
+            user: The authenticated user creating the order.
+            job: The job object being ordered.
+            price: The custom price for the order.
+            delivery_days: The number of days for delivery.
+            features: A description of the custom features included in the order.
+
+        Returns:
+            Order: The created order object.
+
+        Raises:
+            ValidationError: If the user attempts to order their own job.
+        """
+        if job.created_by_id == user.id:
+            raise ValidationError("You cannot order your own job.")
+
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                total_price=price,
+                deadline=timezone.now().date() + timedelta(days=delivery_days)
+            )
+            OrderItem.objects.bulk_create([OrderItem(
+                order=order,
+                job=job,
+                job_name=job.name,
+                freelancer_id=job.created_by_id,
+                order_status=order.status,
+                deadline=order.deadline,
+                price=price,
+                quantity=1,
+                total_price=price
+            )])
+            JobStatsService.add_orders([job.id])
+            FreelancerStatsService.add_order(order)
+            OrderSummaryService.add_order(order)
+
+            queue_mail(
+                subject='Custom Order Placed Successfully',
+                message=f'Dear {user.get_full_name() or user.email},\n\nYour custom order (ID: {order.id}) for "{job.name}" has been placed successfully.\nTotal Price: ${price}\nDelivery Days: {delivery_days}\nFeatures: {features}\n\nThank you!',
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[user.email],
+            )
+            queue_mail(
+                subject='Your Job Has Been Ordered (Custom Offer)',
+                message=f'Dear {job.created_by.get_full_name() or job.created_by.email},\n\nYour job "{job.name}" has been ordered by {user.get_full_name() or user.email} via a custom offer.\nOrder ID: {order.id}\nPrice: ${price}\nDelivery Days: {delivery_days}\nFeatures: {features}\n\nThank you!',
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[job.created_by.email],
+            )
+        return order
+
+
+class OrderDeadlineService:
+    @staticmethod
+    def open_orders():
+        """ Pending and in progress orders not flagged overdue yet, the rows of the order_open_deadline_idx partial index """
+        return Order.objects.filter(status__in=[Order.PENDING, Order.IN_PROGRESS], overdue_at__isnull=True)
+
+    @staticmethod
+    def _claim(queryset, batch_size):
+        """ Lock a batch of orders, earliest deadline first, skipping the ones another scheduler holds """
+        return list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .order_by('deadline', 'id')[:batch_size]
+        )
+
+    @staticmethod
+    def _sellers(orders):
+        """ order id -> [(user id, email, name)] of the sellers of the orders, in one query """
+        sellers = {}
+        rows = (
+            OrderItem.objects.filter(order__in=orders, freelancer__isnull=False)
+            .values_list('order_id', 'freelancer', 'freelancer__email', 'freelancer__first_name', 'freelancer__last_name')
+            .distinct()
+        )
+        for order_id, user_id, email, first_name, last_name in rows:
+            sellers.setdefault(order_id, []).append((user_id, email, f"{first_name} {last_name}".strip() or email))
+        return sellers
+
+    @staticmethod
+    def process_overdue(today, batch_size=500):
+        """
+        Summary:
+            Flag one batch of open orders whose deadline has passed and notify their buyers and sellers.
+
+        Description:
+            The batch is locked with SKIP LOCKED, so schedulers running at the same time work on different
+            orders. overdue_at is set with one UPDATE, the emails are queued with one INSERT and order.overdue
+            events are pushed once the transaction commits. The status is left unchanged, so order summaries
+            and freelancer stats are not affected.
+
+        Args:
+            today: Orders with a deadline before this date are overdue.
+            batch_size: The maximum number of orders processed.
+
+        Returns:
+            int: The number of orders flagged, 0 when none are left.
+        """
+        with transaction.atomic():
+            orders = OrderDeadlineService._claim(OrderDeadlineService.open_orders().filter(deadline__lt=today), batch_size)
+            if not orders:
+                return 0
+            Order.objects.filter(pk__in=[order.pk for order in orders]).update(overdue_at=timezone.now())
+            sellers = OrderDeadlineService._sellers(orders)
+
+            mails = []
+            for order in orders:
+                buyer = order.user
+                mails.append((
+                    f'Order {order.id} Overdue',
+                    f'Dear {buyer.get_full_name() or buyer.email},\n\nYour order (ID: {order.id}) was due on {order.deadline} and has not been delivered yet. The freelancer has been notified.',
+                    settings.DEFAULT_FROM_EMAIL,
+                    [buyer.email],
+                ))
+                for _, email, name in sellers.get(order.pk, []):
+                    mails.append((
+                        f'Order {order.id} Overdue',
+                        f'Dear {name},\n\nThe order (ID: {order.id}) was due on {order.deadline}. Please deliver it as soon as possible or contact the buyer.',
+                        settings.DEFAULT_FROM_EMAIL,
+                        [email],
+                    ))
+                publish_event([order.user_id, *[user_id for user_id, _, _ in sellers.get(order.pk, [])]], 'order.overdue', {
+                    'id': str(order.id),
+                    'status': order.status,
+                    'deadline': order.deadline.isoformat(),
+                })
+            queue_mass_mail(mails)
+        return len(orders)
+
+    @staticmethod
+    def process_due_soon(today, until, batch_size=500):
+        """
+        Summary:
+            Remind the sellers of one batch of open orders due between today and until.
+
+        Description:
+            Same locking as process_overdue, each order is reminded once (reminded_at) unless its deadline changes.
+
+        Args:
+            today: The first deadline included.
+            until: The last deadline included.
+            batch_size: The maximum number of orders processed.
+
+        Returns:
+            int: The number of orders reminded, 0 when none are left.
+        """
+        with transaction.atomic():
+            orders = OrderDeadlineService._claim(
+                OrderDeadlineService.open_orders().filter(reminded_at__isnull=True, deadline__gte=today, deadline__lte=until),
+                batch_size
+            )
+            if not orders:
+                return 0
+            Order.objects.filter(pk__in=[order.pk for order in orders]).update(reminded_at=timezone.now())
+            sellers = OrderDeadlineService._sellers(orders)
+
+            mails = []
+            for order in orders:
+                for _, email, name in sellers.get(order.pk, []):
+                    mails.append((
+                        f'Order {order.id} Due Soon',
+                        f'Dear {name},\n\nThe order (ID: {order.id}) is due on {order.deadline}.',
+                        settings.DEFAULT_FROM_EMAIL,
+                        [email],
+                    ))
+                publish_event([user_id for user_id, _, _ in sellers.get(order.pk, [])], 'order.due_soon', {
+                    'id': str(order.id),
+                    'status': order.status,
+                    'deadline': order.deadline.isoformat(),
+                })
+            queue_mass_mail(mails)
+        return len(orders)
+
+
+class DeliveryUploadService:
+    @staticmethod
+    def _lock(upload, statuses=(DeliveryUpload.UPLOADING,)):
+        upload = DeliveryUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status not in statuses:
+            raise ValidationError({'detail': f'This upload is already {upload.get_status_display().lower()}.'})
+        return upload
+
+    @staticmethod
+    def append(upload, stream, content_range):
+        """
+        Summary:
+            Store one chunk of an upload.
+
+        Description:
+            The chunk is streamed to the upload storage without being buffered by Django. The stored size
+            is the upload offset: a chunk that starts before it (a retry whose response was lost) only
+            contributes its new bytes, a chunk that starts after it is rejected with 409 and the current offset.
+            The upload row is locked while the chunk is written, so concurrent PUTs cannot interleave.
+
+        Args:
+            upload: The DeliveryUpload.
+            stream: The request body.
+            content_range: The Content-Range header, `bytes <start>-<end>/<total>`.
+
+        Returns:
+            DeliveryUpload: The upload with its new offset in `received`.
+
+        Raises:
+            ValidationError: If the upload is no longer uploading, the header is invalid or the chunk is too large.
+            UploadOffsetConflict: If the chunk starts after the stored bytes.
+        """
+        parsed = parse_content_range(content_range)
+        if parsed is None:
+            raise ValidationError({'detail': "Content-Range must be 'bytes <start>-<end>/<total>'."})
+        start, end, total = parsed
+        length = end - start + 1
+        if total != upload.size:
+            raise ValidationError({'detail': f'Content-Range total must be the upload size ({upload.size}).'})
+        if length > upload_settings()['CHUNK_SIZE']:
+            raise ValidationError({'detail': f"Chunks cannot be larger than {upload_settings()['CHUNK_SIZE']} bytes."})
+
+        storage = get_upload_storage()
+        with transaction.atomic():
+            upload = DeliveryUploadService._lock(upload)
+            offset = storage.size(upload.pk)
+            if start > offset:
+                raise UploadOffsetConflict(offset)
+            skip = offset - start
+            if skip < length:
+                if skip:
+                    stream.read(skip)
+                storage.append(upload.pk, stream, length - skip)
+            upload.received = storage.size(upload.pk)
+            upload.save(update_fields=['received', 'updated_at'])
+        return upload
+
+    @staticmethod
+    def complete(upload):
+        """
+        Summary:
+            Queue a fully received upload to become an OrderDelivery.
+
+        Description:
+            Only checks that every byte arrived and that the order is in progress. The checksum and the copy of
+            the file to the delivery storage are left to the finalize_delivery_uploads worker (see finalize),
+            woken with a Postgres NOTIFY once the transaction commits. A FAILED upload can be queued again.
+
+        Args:
+            upload: The DeliveryUpload.
+
+        Returns:
+            DeliveryUpload: The QUEUED upload.
+
+        Raises:
+            ValidationError: If the upload is already queued or completed, or the order is not in progress.
+            UploadOffsetError: If the upload is incomplete.
+        """
+        storage = get_upload_storage()
+        with transaction.atomic():
+            upload = DeliveryUploadService._lock(upload, (DeliveryUpload.UPLOADING, DeliveryUpload.FAILED))
+            received = storage.size(upload.pk)
+            if received != upload.size:
+                raise UploadOffsetError(f'Upload is incomplete, {received} of {upload.size} bytes received.', received)
+            if not Order.objects.filter(pk=upload.order_id, status=Order.IN_PROGRESS).exists():
+                raise ValidationError("Order must be in progress to deliver.")
+
+            upload.status = DeliveryUpload.QUEUED
+            upload.received = received
+            upload.error = ''
+            upload.save(update_fields=['status', 'received', 'error', 'updated_at'])
+            transaction.on_commit(DeliveryUploadService.notify_workers)
+        return upload
+
+    @staticmethod
+    def notify_workers():
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"NOTIFY {DELIVERY_CHANNEL}")
+
+    @staticmethod
+    def claim(batch_size):
+        """
+        Summary:
+            Mark a batch of queued uploads PROCESSING and commit, so they are finalized without holding row locks.
+
+        Description:
+            Uploads left PROCESSING for DELIVERY_UPLOADS['CLAIM_TIMEOUT'] seconds, by a worker that stopped, are
+            claimed again. The claim time is kept in updated_at, finalize only writes its result while it matches.
+
+        Args:
+            batch_size: The maximum number of uploads to claim.
+
+        Returns:
+            list: The claimed DeliveryUploads.
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=upload_settings()['CLAIM_TIMEOUT'])
+        with transaction.atomic():
+            uploads = list(
+                DeliveryUpload.objects.select_for_update(skip_locked=True)
+                .filter(Q(status=DeliveryUpload.QUEUED) | Q(status=DeliveryUpload.PROCESSING, updated_at__lt=stale))
+                .order_by('updated_at')[:batch_size]
+            )
+            DeliveryUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).update(
+                status=DeliveryUpload.PROCESSING, updated_at=now
+            )
+        for upload in uploads:
+            upload.status, upload.updated_at = DeliveryUpload.PROCESSING, now
+        return uploads
+
+    @staticmethod
+    def finalize(upload):
+        """
+        Summary:
+            Turn a claimed upload into an OrderDelivery and mark the order delivered.
+
+        Description:
+            Verifies the SHA-256 sent when the upload was created and copies the assembled file to the delivery
+            storage outside any transaction. A mismatching file is discarded and the upload goes back to UPLOADING
+            from byte 0. The delivery row is then created in a short transaction holding the order lock. If the
+            upload was aborted or claimed again meanwhile, or the order is no longer in progress, the copied file
+            is deleted instead.
+
+        Args:
+            upload: The DeliveryUpload, claimed by DeliveryUploadService.claim.
+
+        Returns:
+            OrderDelivery: The created delivery, or None.
+        """
+        storage = get_upload_storage()
+        claimed = DeliveryUpload.objects.filter(pk=upload.pk, status=DeliveryUpload.PROCESSING, updated_at=upload.updated_at)
+        try:
+            if upload.checksum and storage.checksum(upload.pk) != upload.checksum:
+                storage.delete(upload.pk)
+                claimed.update(
+                    status=DeliveryUpload.UPLOADING, received=0, updated_at=timezone.now(),
+                    error='Checksum mismatch, the file was discarded. Upload it again from byte 0.'
+                )
+                return None
+            delivery = OrderDelivery(order_id=upload.order_id, delivered_by_id=upload.uploaded_by_id, description=upload.description)
+            with storage.open(upload.pk) as file:
+                delivery.file.save(upload.filename, File(file), save=False)
+        except Exception as e:
+            logger.error(f"Failed to finalize delivery upload {upload.pk}: {str(e)}")
+            claimed.update(status=DeliveryUpload.FAILED, error=str(e), updated_at=timezone.now())
+            return None
+
+        with transaction.atomic():
+            order = Order.objects.select_for_update().get(pk=upload.order_id)
+            upload = claimed.select_for_update().first()
+            if upload is None or order.status != Order.IN_PROGRESS:
+                transaction.on_commit(lambda: delivery.file.storage.delete(delivery.file.name))
+                if upload is not None:
+                    upload.status = DeliveryUpload.FAILED
+                    upload.error = 'Order must be in progress to deliver.'
+                    upload.save(update_fields=['status', 'error', 'updated_at'])
+                return None
+
+            delivery.order = order
+            delivery.save()
+            upload.status = DeliveryUpload.COMPLETED
+            upload.delivery = delivery
+            upload.save(update_fields=['status', 'delivery', 'updated_at'])
+            OrderService.mark_delivered(delivery)
+            transaction.on_commit(lambda: storage.delete(upload.pk))
+        return delivery
+
+    @staticmethod
+    def finalize_batch(batch_size):
+        """
+        Summary:
+            Claim a batch of queued uploads and finalize them.
+
+        Returns:
+            int: The number of uploads claimed, 0 when the queue is empty.
+        """
+        uploads = DeliveryUploadService.claim(batch_size)
+        for upload in uploads:
+            DeliveryUploadService.finalize(upload)
+        return len(uploads)
+
+    @staticmethod
+    def abort(upload):
+        """ Delete an upload and its stored chunks """
+        upload_id = upload.pk
+        upload.delete()
+        transaction.on_commit(lambda: get_upload_storage().delete(upload_id))
+
+    @staticmethod
+    def expire(before):
+        """
+        Summary:
+            Delete the uploads that received nothing since a given time, or failed before it, with their stored chunks.
+
+        Args:
+            before: Uploads last updated before this datetime are deleted.
+
+        Returns:
+            int: The number of uploads deleted.
+        """
+        storage = get_upload_storage()
+        stale = DeliveryUpload.objects.filter(status__in=[DeliveryUpload.UPLOADING, DeliveryUpload.FAILED], updated_at__lt=before)
+        upload_ids = list(stale.values_list('pk', flat=True))
+        for upload_id in upload_ids:
+            storage.delete(upload_id)
+        DeliveryUpload.objects.filter(pk__in=upload_ids).delete()
+        return len(upload_ids)
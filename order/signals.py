@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+from order.models import Order
+from order.services import OrderService, OrderSummaryService
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, update_fields=None, **kwargs):
+    """ Load the stored status and deadline so post_save receivers can tell whether they changed """
+    instance._previous_status = None
+    instance._previous_deadline = None
+    if not instance._state.adding and (update_fields is None or {'status', 'deadline'} & set(update_fields)):
+        orders = Order.objects.filter(pk=instance.pk)
+        if transaction.get_connection().in_atomic_block:
+            # Lock the order until the summaries are updated, a concurrent change would otherwise apply the same old status twice
+            orders = orders.select_for_update()
+        stored = orders.values_list('status', 'deadline').first()
+        if stored:
+            instance._previous_status, instance._previous_deadline = stored
+
+
+@receiver(post_save, sender=Order)
+def update_order_summary(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and previous_status and previous_status != instance.status:
+        OrderSummaryService.apply_status_change(instance, previous_status)
+
+
+@receiver(post_save, sender=Order)
+def sync_order_items(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, '_previous_status', None)
+    if created or not previous_status:
+        return
+    if previous_status != instance.status or getattr(instance, '_previous_deadline', None) != instance.deadline:
+        OrderService.sync_items(instance)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_summary(sender, instance, **kwargs):
+    # Runs before the items are deleted with the order
+    OrderSummaryService.add_order(instance, sign=-1)
+
+
+@receiver(post_save, sender=Order)
+def reset_deadline_flags(sender, instance, created, **kwargs):
+    # A new deadline gets its own reminder and overdue notice from check_order_deadlines
+    if created or not getattr(instance, '_previous_status', None):
+        return
+    if instance._previous_deadline != instance.deadline and (instance.reminded_at or instance.overdue_at):
+        Order.objects.filter(pk=instance.pk).update(reminded_at=None, overdue_at=None)
+        instance.reminded_at = instance.overdue_at = None
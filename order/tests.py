@@ -1,3 +1,371 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from job.models import Category, Job, JobPrice
+from job.services import JobStatsService
+from rest_framework.exceptions import ValidationError
+from order.models import Cart, CartItem, DeliveryUpload, Order, OrderDelivery, OrderItem, OrderSummary
+from order.services import CartService, DeliveryUploadService, OrderService, OrderSummaryService
+from order.uploads import UploadOffsetConflict, UploadOffsetError, get_upload_storage
 
-# Create your tests here.
+
+User = get_user_model()
+
+
+def create_job(seller, price='100.00', category=None, **kwargs):
+    category = category or Category.objects.create(name='Web Development')
+    return Job.objects.create(
+        name=kwargs.pop('name', 'I will build a website'),
+        description=kwargs.pop('description', 'A responsive website'),
+        price=JobPrice.objects.create(price=Decimal(price)),
+        category=category,
+        created_by=seller,
+        duration_days=kwargs.pop('duration_days', 3),
+        **kwargs
+    )
+
+
+def create_order(buyer, job, status=Order.PENDING, quantity=1):
+    order = Order.objects.create(
+        user=buyer,
+        status=status,
+        is_completed=status == Order.COMPLETED,
+        total_price=job.price.price * quantity,
+        deadline=timezone.localdate() + timedelta(days=job.duration_days),
+    )
+    OrderItem.objects.create(
+        order=order, job=job, job_name=job.name, freelancer=job.created_by, order_status=status,
+        deadline=order.deadline, price=job.price.price, quantity=quantity, total_price=job.price.price * quantity,
+    )
+    return order
+
+
+def place_order(buyer, jobs, quantity=1):
+    """ Check out a cart with the given jobs, the way the API does """
+    cart = Cart.objects.create(user=buyer)
+    CartService.bulk_update_items(cart, [{'job_id': job.pk, 'quantity': quantity} for job in jobs])
+    return OrderService.create_order(buyer, cart.pk)
+
+
+class CounterTestCase(TestCase):
+    """ Compares counters maintained incrementally with the values their rebuild computes from scratch """
+
+    def assertMatchesRebuild(self, queryset, fields, rebuild):
+        maintained = list(queryset.order_by('pk').values('pk', *fields))
+        rebuild()
+        self.assertEqual(maintained, list(queryset.order_by('pk').values('pk', *fields)))
+
+
+class OrderAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.other = User.objects.create_user(email='other@example.com', password='Test@123')
+        cls.order = create_order(cls.buyer, create_job(cls.seller))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_seller_can_retrieve_and_start_progress(self):
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.get(f'/api/v1/orders/{self.order.pk}/').status_code, 200)
+        response = self.client.post(f'/api/v1/orders/{self.order.pk}/start_progress/')
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.IN_PROGRESS)
+
+    def test_seller_cannot_patch_order(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(
+            f'/api/v1/orders/{self.order.pk}/', {'status': Order.COMPLETED, 'total_price': '1.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.PENDING)
+        self.assertEqual(self.order.total_price, Decimal('100.00'))
+
+    def test_seller_cannot_cancel_order(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.post(f'/api/v1/orders/{self.order.pk}/cancel/')
+        self.assertEqual(response.status_code, 404)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.PENDING)
+
+    def test_unrelated_user_cannot_retrieve_order(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(f'/api/v1/orders/{self.order.pk}/').status_code, 404)
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.website = create_job(cls.seller, price='100.00', duration_days=3)
+        cls.logo = create_job(cls.seller, price='25.50', category=cls.website.category, name='I will design a logo', duration_days=7)
+
+    def test_create_order_prices_cart_and_uses_longest_duration(self):
+        cart = Cart.objects.create(user=self.buyer)
+        CartService.bulk_update_items(cart, [{'job_id': self.website.id, 'quantity': 2}, {'job_id': self.logo.id, 'quantity': 1}])
+        order = OrderService.create_order(self.buyer, cart.id)
+        self.assertEqual(order.total_price, Decimal('225.50'))
+        self.assertEqual(order.deadline, timezone.now().date() + timedelta(days=7))
+        self.assertEqual(
+            sorted(order.items.values_list('job_id', 'quantity', 'total_price')),
+            sorted([(self.website.id, 2, Decimal('200.00')), (self.logo.id, 1, Decimal('25.50'))]),
+        )
+        self.assertFalse(Cart.objects.filter(pk=cart.pk).exists())
+
+    def test_custom_order_is_due_after_delivery_days(self):
+        order = OrderService.create_custom_order(self.buyer, self.logo, Decimal('80.00'), 10, 'Two concepts')
+        self.assertEqual(order.deadline, timezone.now().date() + timedelta(days=10))
+        self.assertEqual(list(order.items.values_list('freelancer', 'deadline', 'total_price')), [(self.seller.id, order.deadline, Decimal('80.00'))])
+
+    def test_order_without_deadline_falls_back_to_longest_job(self):
+        order = Order.objects.create(user=self.buyer, total_price=Decimal('125.50'))
+        self.assertIsNone(order.deadline)
+        for job in (self.website, self.logo):
+            OrderItem.objects.create(order=order, job=job, freelancer=self.seller, price=job.price.price, quantity=1, total_price=job.price.price)
+        order.save(update_fields=['status'])
+        order.refresh_from_db()
+        self.assertEqual(order.deadline, timezone.now().date() + timedelta(days=7))
+        self.assertEqual(set(order.items.values_list('deadline', flat=True)), {order.deadline})
+
+    def test_create_order_rejects_empty_cart_and_own_jobs(self):
+        cart = Cart.objects.create(user=self.seller)
+        with self.assertRaises(ValidationError):
+            OrderService.create_order(self.seller, cart.id)
+        CartItem.objects.create(cart=cart, job=self.website, quantity=1)
+        with self.assertRaises(ValidationError):
+            OrderService.create_order(self.seller, cart.id)
+        self.assertFalse(Order.objects.exists())
+
+    def test_add_cart_item_merges_quantities(self):
+        cart = Cart.objects.create(user=self.buyer)
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        for _ in range(2):
+            response = client.post(f'/api/v1/carts/{cart.id}/items/', {'job_id': self.logo.id, 'quantity': 2}, format='json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(cart.items.values_list('quantity', flat=True)), [4])
+
+
+@override_settings(SERVICE_FEE_RATE='0.16')
+class CartTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.first = create_job(cls.seller, price='0.03')
+        cls.second = create_job(cls.seller, price='0.03', category=cls.first.category, name='I will proofread a page')
+
+    def test_cart_total_is_the_sum_of_rounded_line_totals(self):
+        cart = Cart.objects.create(user=self.buyer)
+        CartService.bulk_update_items(cart, [{'job_id': self.first.id, 'quantity': 1}, {'job_id': self.second.id, 'quantity': 1}])
+        cart = CartService.with_totals(Cart.objects.filter(pk=cart.pk)).get()
+        # 0.03 * 1.16 rounds to 0.03 per line, while rounding the 0.06 subtotal once would give 0.07
+        self.assertEqual([item.total_price for item in cart.items.all()], [Decimal('0.03'), Decimal('0.03')])
+        self.assertEqual(cart.total_price, Decimal('0.06'))
+
+    def test_empty_cart_total_is_zero(self):
+        cart = Cart.objects.create(user=self.buyer)
+        self.assertEqual(CartService.with_totals(Cart.objects.filter(pk=cart.pk)).get().total_price, Decimal('0'))
+
+
+class DeliveryUploadTests(TestCase):
+    CONTENT = bytes(range(256)) * 40
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.order = create_order(cls.buyer, create_job(cls.seller), status=Order.IN_PROGRESS)
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(
+            DELIVERY_UPLOADS={'ROOT': f'{self.root}/uploads', 'CHUNK_SIZE': 4096},
+            MEDIA_ROOT=f'{self.root}/media',
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.upload = DeliveryUpload.objects.create(
+            order=self.order, uploaded_by=self.seller, filename='delivery.zip', size=len(self.CONTENT),
+            checksum=hashlib.sha256(self.CONTENT).hexdigest(), description='Final files',
+        )
+
+    def append(self, start, end, body=None):
+        body = self.CONTENT[start:end + 1] if body is None else body
+        return DeliveryUploadService.append(self.upload, BytesIO(body), f'bytes {start}-{end}/{len(self.CONTENT)}')
+
+    def test_interrupted_chunk_resumes_from_the_stored_offset(self):
+        # The connection drops after 1000 of the 4096 bytes of the first chunk
+        self.assertEqual(self.append(0, 4095, self.CONTENT[:1000]).received, 1000)
+        self.assertEqual(self.append(1000, 5095).received, 5096)
+        self.assertEqual(self.append(5096, 9191).received, 9192)
+        self.assertEqual(self.append(9192, len(self.CONTENT) - 1).received, len(self.CONTENT))
+
+        self.assertEqual(DeliveryUploadService.complete(self.upload).status, DeliveryUpload.QUEUED)
+        # Nothing is copied until the worker runs
+        self.assertFalse(OrderDelivery.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(DeliveryUploadService.finalize_batch(10), 1)
+
+        self.upload.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.upload.status, DeliveryUpload.COMPLETED)
+        with self.upload.delivery.file.open('rb') as file:
+            self.assertEqual(file.read(), self.CONTENT)
+        self.assertEqual(self.order.status, Order.DELIVERED)
+        self.assertEqual(get_upload_storage().size(self.upload.pk), 0)
+        self.assertEqual(DeliveryUploadService.finalize_batch(10), 0)
+
+    def test_chunk_after_the_offset_is_a_conflict(self):
+        self.append(0, 999)
+        with self.assertRaises(UploadOffsetConflict) as raised:
+            self.append(2000, 2999)
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(raised.exception.detail['offset'], 1000)
+        self.assertEqual(get_upload_storage().size(self.upload.pk), 1000)
+
+    def test_retried_overlapping_chunk_only_adds_new_bytes(self):
+        self.append(0, 2999)
+        # The response to the first chunk was lost, the client sends it again together with more bytes
+        self.assertEqual(self.append(0, 3999).received, 4000)
+        self.assertEqual(self.append(1000, 1999).received, 4000)
+        with get_upload_storage().open(self.upload.pk) as file:
+            self.assertEqual(file.read(), self.CONTENT[:4000])
+
+    def test_checksum_mismatch_discards_the_file(self):
+        corrupted = bytearray(self.CONTENT)
+        corrupted[10] ^= 0xFF
+        for start in range(0, len(corrupted), 4096):
+            self.append(start, min(start + 4096, len(corrupted)) - 1, bytes(corrupted[start:start + 4096]))
+
+        DeliveryUploadService.complete(self.upload)
+        DeliveryUploadService.finalize_batch(10)
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.status, self.upload.received), (DeliveryUpload.UPLOADING, 0))
+        self.assertIn('Checksum mismatch', self.upload.error)
+        self.assertEqual(get_upload_storage().size(self.upload.pk), 0)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.IN_PROGRESS)
+
+    def test_incomplete_upload_cannot_be_completed(self):
+        self.append(0, 999)
+        with self.assertRaises(UploadOffsetError) as raised:
+            DeliveryUploadService.complete(self.upload)
+        self.assertEqual(raised.exception.detail['offset'], 1000)
+
+    def test_order_canceled_before_finalizing_fails_the_upload(self):
+        for start in range(0, len(self.CONTENT), 4096):
+            self.append(start, min(start + 4096, len(self.CONTENT)) - 1)
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        response = client.post(f'/api/v1/delivery-uploads/{self.upload.pk}/complete/')
+        self.assertEqual((response.status_code, response.json()['status']), (202, DeliveryUpload.QUEUED))
+
+        Order.objects.filter(pk=self.order.pk).update(status=Order.CANCELED)
+        with self.captureOnCommitCallbacks(execute=True):
+            DeliveryUploadService.finalize_batch(10)
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.status, self.upload.delivery), (DeliveryUpload.FAILED, None))
+        self.assertFalse(OrderDelivery.objects.exists())
+        self.assertEqual(os.listdir(f'{self.root}/media/order_deliveries'), [])
+
+    def test_conflict_response_carries_the_offset(self):
+        self.append(0, 999)
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        response = client.put(
+            f'/api/v1/delivery-uploads/{self.upload.pk}/', self.CONTENT[2000:3000],
+            content_type='application/octet-stream', headers={'Content-Range': f'bytes 2000-2999/{len(self.CONTENT)}'},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 1000)
+
+
+class JobOrderCountTests(CounterTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='Test@123')
+        cls.website = create_job(cls.seller)
+        cls.logo = create_job(cls.seller, category=cls.website.category, name='I will design a logo')
+
+    def assertOrderCounts(self, website, logo):
+        self.assertEqual(
+            list(Job.objects.order_by('pk').values_list('order_count', flat=True)), [website, logo]
+        )
+        self.assertMatchesRebuild(Job.objects.all(), ['order_count'], JobStatsService.rebuild)
+
+    def test_checkout_cancel_and_delete(self):
+        first = place_order(self.buyer, [self.website, self.logo], quantity=2)
+        second = place_order(self.buyer, [self.website])
+        self.assertOrderCounts(2, 1)
+
+        # Canceled orders keep counting, like in rebuild
+        OrderService.cancel_order(second, self.buyer)
+        self.assertOrderCounts(2, 1)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.assertEqual(client.delete(f'/api/v1/orders/{first.pk}/').status_code, 204)
+        self.assertOrderCounts(1, 0)
+
+        # Deletes outside the API, e.g. from the admin, are counted too
+        second.delete()
+        self.assertOrderCounts(0, 0)
+
+
+class OrderSummaryTests(TestCase):
+    FIELDS = ['user', 'role', 'status', 'order_count', 'amount']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.other_seller = User.objects.create_user(email='other@example.com', password='Test@123')
+        cls.website = create_job(cls.seller)
+        cls.logo = create_job(cls.other_seller, price='40.00', category=cls.website.category, name='I will design a logo')
+
+    def assertMatchesRebuild(self):
+        # Rows of statuses an order left stay at zero, rebuild only creates the ones with orders
+        OrderSummary.objects.filter(order_count=0).delete()
+        maintained = list(OrderSummary.objects.order_by('user', 'role', 'status').values(*self.FIELDS))
+        OrderSummaryService.rebuild()
+        self.assertEqual(maintained, list(OrderSummary.objects.order_by('user', 'role', 'status').values(*self.FIELDS)))
+
+    def test_create_status_change_and_delete(self):
+        first = place_order(self.buyer, [self.website, self.logo], quantity=2)
+        second = place_order(self.buyer, [self.website])
+        summary = OrderSummaryService.summary(self.buyer)
+        self.assertEqual(summary['buyer'][Order.PENDING], {'count': 2, 'amount': Decimal('380.00')})
+        self.assertMatchesRebuild()
+
+        first.status = Order.IN_PROGRESS
+        first.save()
+        OrderService.cancel_order(second, self.buyer)
+        self.assertEqual(OrderSummaryService.summary(self.seller)['seller'][Order.IN_PROGRESS], {'count': 1, 'amount': Decimal('200.00')})
+        self.assertEqual(OrderSummaryService.summary(self.seller)['seller'][Order.CANCELED], {'count': 1, 'amount': Decimal('100.00')})
+        self.assertMatchesRebuild()
+
+        first.delete()
+        summary = OrderSummaryService.summary(self.buyer)
+        self.assertEqual(summary['buyer']['total'], {'count': 1, 'amount': Decimal('100.00')})
+        self.assertMatchesRebuild()
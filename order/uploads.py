@@ -0,0 +1,136 @@
+import hashlib
+import os
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+# Extensions accepted for delivery files, direct and chunked uploads alike
+DELIVERY_FILE_EXTENSIONS = ['pdf', 'zip', 'jpg', 'png']
+
+READ_SIZE = 64 * 1024
+
+
+class UploadOffsetError(APIException):
+    """ An upload cannot go on from where the client is, the response tells the byte to resume from """
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = 'invalid'
+
+    def __init__(self, detail, offset):
+        super().__init__(detail)
+        self.offset = offset
+        # Set after APIException.__init__, which would turn the offset into a string
+        self.detail = {'detail': self.detail, 'offset': offset}
+
+
+class UploadOffsetConflict(UploadOffsetError):
+    """ A chunk starts after the stored bytes, the client must resume from the returned offset """
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'offset_conflict'
+
+    def __init__(self, offset):
+        super().__init__(f'Resume the upload from byte {offset}.', offset)
+
+
+def upload_settings():
+    return {
+        'STORAGE': 'order.uploads.LocalUploadStorage',
+        'ROOT': os.path.join(settings.BASE_DIR, 'delivery_uploads'),
+        'CHUNK_SIZE': 8 * 1024 * 1024,
+        'MAX_SIZE': 1024 * 1024 * 1024,
+        'EXPIRE_AFTER': 24 * 60 * 60,
+        'CLAIM_TIMEOUT': 60 * 60,
+        **getattr(settings, 'DELIVERY_UPLOADS', {}),
+    }
+
+
+def get_upload_storage():
+    config = upload_settings()
+    return import_string(config['STORAGE'])(config)
+
+
+def parse_content_range(header):
+    """
+    Parse a `Content-Range: bytes <start>-<end>/<total>` header.
+
+    Returns:
+        tuple: (start, end, total) with end inclusive, or None if the header is missing or malformed.
+    """
+    unit, _, spec = (header or '').partition(' ')
+    byte_range, _, total = spec.partition('/')
+    start, _, end = byte_range.partition('-')
+    if unit != 'bytes' or not (start.isdigit() and end.isdigit() and total.isdigit()):
+        return None
+    start, end, total = int(start), int(end), int(total)
+    if end < start or end >= total:
+        return None
+    return start, end, total
+
+
+class UploadStorage:
+    """
+    Where the bytes of a DeliveryUpload are kept until the delivery is finalized. Chunks arrive in
+    order, so a backend only appends. Whatever was written survives a dropped request: the stored
+    size is the offset the client resumes from.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def size(self, upload_id):
+        """ Number of bytes stored for the upload, 0 if nothing was written yet """
+        raise NotImplementedError
+
+    def append(self, upload_id, stream, length):
+        """ Append up to length bytes read from stream, returns the number of bytes written """
+        raise NotImplementedError
+
+    def open(self, upload_id):
+        """ The assembled file, opened for binary reading """
+        raise NotImplementedError
+
+    def delete(self, upload_id):
+        raise NotImplementedError
+
+    def checksum(self, upload_id):
+        """ SHA-256 hex digest of the assembled file """
+        digest = hashlib.sha256()
+        with self.open(upload_id) as file:
+            for block in iter(lambda: file.read(READ_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+class LocalUploadStorage(UploadStorage):
+    """ One file per upload under DELIVERY_UPLOADS['ROOT'], for development, tests and single-host deployments """
+
+    def path(self, upload_id):
+        return os.path.join(self.config['ROOT'], f"{upload_id}.part")
+
+    def size(self, upload_id):
+        try:
+            return os.path.getsize(self.path(upload_id))
+        except FileNotFoundError:
+            return 0
+
+    def append(self, upload_id, stream, length):
+        os.makedirs(self.config['ROOT'], exist_ok=True)
+        written = 0
+        with open(self.path(upload_id), 'ab') as file:
+            while written < length:
+                block = stream.read(min(READ_SIZE, length - written))
+                if not block:
+                    break
+                file.write(block)
+                written += len(block)
+        return written
+
+    def open(self, upload_id):
+        return open(self.path(upload_id), 'rb')
+
+    def delete(self, upload_id):
+        try:
+            os.remove(self.path(upload_id))
+        except FileNotFoundError:
+            pass
@@ -2,15 +2,21 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from order.models import Cart, CartItem, Order, OrderDelivery
+from order.models import Cart, CartItem, DeliveryUpload, Order, OrderDelivery, OrderItem
+from users.models import User
 from order import serializers as orderSz
-from order.services import OrderService
+from order.services import CartService, DeliveryUploadService, OrderService, OrderSummaryService
+from order.paginations import OrderPagination, OrderDeliveryPagination
+from job.paginations import DefaultPagination
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from django.core.mail import send_mail
+from rest_framework.generics import get_object_or_404
+from api.mail import queue_mail
 from django.conf import settings
 from django.db import transaction
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Q
 import logging
+from io import BytesIO
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.decorators import api_view
@@ -29,7 +35,7 @@ class CartViewSet(ModelViewSet):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Cart.objects.none()
-        return Cart.objects.prefetch_related('items__job').filter(user=self.request.user)
+        return CartService.with_totals(Cart.objects.filter(user=self.request.user))
 
     @swagger_auto_schema(
         operation_summary="List all carts",
@@ -54,7 +60,7 @@ class CartViewSet(ModelViewSet):
     )
     
     def create(self, request, *args, **kwargs):
-        existing_cart = Cart.objects.filter(user=request.user).first()
+        existing_cart = self.get_queryset().first()
 
         if existing_cart:
             serializer = self.get_serializer(existing_cart)
@@ -121,7 +127,7 @@ class CartItemViewSet(ModelViewSet):
         return {'cart_id': self.kwargs.get('cart_pk'), 'request': self.request}
 
     def get_queryset(self):
-        return CartItem.objects.select_related('job').filter(cart_id=self.kwargs.get('cart_pk'))
+        return CartItem.objects.select_related('job__price').filter(cart_id=self.kwargs.get('cart_pk'))
 
     @swagger_auto_schema(
         operation_summary="List cart items",
@@ -175,6 +181,27 @@ class CartItemViewSet(ModelViewSet):
     def partial_update(self, request, *args, **kwargs):
         return super().partial_update(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_summary="Add, update or remove several cart items",
+        operation_description="Set the quantity of several jobs in one request (quantity 0 removes the job). With `replace`, jobs that are not listed are removed, so a client-side cart can be synced in one round-trip. All jobs are validated before anything changes. Returns the updated cart.",
+        request_body=orderSz.BulkUpdateCartSerializer,
+        responses={
+            200: orderSz.CartSerializer,
+            400: "Bad Request: Invalid, duplicate or own jobs.",
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Cart not found."
+        }
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk(self, request, cart_pk=None):
+        cart = get_object_or_404(Cart, pk=cart_pk, user=request.user)
+        serializer = orderSz.BulkUpdateCartSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        CartService.bulk_update_items(cart, serializer.validated_data['items'], serializer.validated_data['replace'])
+
+        cart = CartService.with_totals(Cart.objects.filter(pk=cart.pk)).get()
+        return Response(orderSz.CartSerializer(cart, context={'request': request}).data)
+
     @swagger_auto_schema(
         operation_summary="Delete a cart item",
         operation_description="Delete a cart item.",
@@ -191,22 +218,47 @@ class CartItemViewSet(ModelViewSet):
 class OrderViewSet(ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = orderSz.OrderSerializer
+    pagination_class = OrderPagination
 
     http_method_names = ['get', 'post', 'delete', 'patch', 'head', 'options']
     permission_classes = [IsAuthenticated]
+    # Detail actions a seller of one of the order's items may run, every other action is limited to the buyer's orders
+    SELLER_ACTIONS = ['retrieve', 'start_progress']
 
+    @swagger_auto_schema(
+        operation_summary="Create an order",
+        operation_description="Create a new order from a cart.",
+        request_body=orderSz.CreateOrderSerializer,
+        responses={
+            201: orderSz.OrderSerializer,
+            400: "Bad Request: Invalid cart ID or empty cart.",
+            401: "Unauthorized: Authentication credentials were not provided."
+        }
+    )
     def create(self, request, *args, **kwargs):
-        cart_id = request.data.get('cart_id')
-        order = OrderService.create_order(request.user, cart_id)
-        serializer = self.get_serializer(order)  # pass model instance
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = OrderService.create_order(request.user, serializer.validated_data['cart_id'])
+        # Reload with everything OrderSerializer reads so the response costs a fixed number of queries
+        order = Order.objects.select_related('user').prefetch_related('items__job', 'user__portfolio').get(pk=order.pk)
+        return Response(orderSz.OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Order.objects.none()
-        if self.request.user.is_staff:
-            return Order.objects.prefetch_related('items__job').all()
-        return Order.objects.prefetch_related('items__job').filter(user=self.request.user)
+        user = self.request.user
+        if user.is_staff:
+            queryset = Order.objects.all()
+        elif self.action in self.SELLER_ACTIONS:
+            # Sellers can open the orders they work on, see OrderService.seller_queue for their list
+            queryset = Order.objects.filter(Q(user=user) | Q(Exists(OrderItem.objects.filter(order=OuterRef('pk'), freelancer=user))))
+        else:
+            queryset = Order.objects.filter(user=user)
+        if self.action == 'list':
+            # OrderListSerializer only reads snapshot columns, so items need neither jobs nor users
+            items = OrderItem.objects.only('id', 'order_id', 'job_id', 'job_name', 'quantity', 'total_price').order_by('id')
+            return queryset.prefetch_related(Prefetch('items', queryset=items)).order_by('-created_at', '-id')
+        return queryset.prefetch_related('items__job')
 
     def get_serializer_class(self):
         if self.action == 'cancel':
@@ -215,6 +267,12 @@ class OrderViewSet(ModelViewSet):
             return orderSz.CreateOrderSerializer
         elif self.action in ['start_progress', 'complete', 'update_status']:
             return orderSz.UpdateOrderSerializer
+        elif self.action == 'list':
+            return orderSz.OrderListSerializer
+        elif self.action == 'summary':
+            return orderSz.OrderSummarySerializer
+        elif self.action == 'queue':
+            return orderSz.SellerQueueItemSerializer
         return orderSz.OrderSerializer
 
     def get_serializer_context(self):
@@ -224,9 +282,9 @@ class OrderViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="List all orders",
-        operation_description="Retrieve a list of orders (all for staff, user-specific for others).",
+        operation_description="Retrieve a page of orders, newest first (all for staff, user-specific for others). Items only carry the job id and the job name captured at checkout. Send `?pagination=cursor` for keyset pages.",
         responses={
-            200: orderSz.OrderSerializer(many=True),
+            200: orderSz.OrderListSerializer(many=True),
             401: "Unauthorized: Authentication credentials were not provided."
         }
     )
@@ -234,24 +292,41 @@ class OrderViewSet(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
     @swagger_auto_schema(
-        operation_summary="Create an order",
-        operation_description="Create a new order from a cart.",
-        request_body=orderSz.CreateOrderSerializer,
+        operation_summary="Order summary",
+        operation_description="Order counts and amounts by status for the authenticated user, as buyer and as seller.",
         responses={
-            201: orderSz.OrderSerializer,
-            400: "Bad Request: Invalid cart ID or empty cart.",
+            200: orderSz.OrderSummarySerializer,
             401: "Unauthorized: Authentication credentials were not provided."
         }
     )
-    # def create(self, request, *args, **kwargs):
-    #     return super().create(request, *args, **kwargs)
-
-    def perform_create(self, serializer):
-        cart_id = self.request.data.get('cart_id')
-        order = OrderService.create_order(self.request.user, cart_id)
-        serializer = self.get_serializer(order)
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def summary(self, request):
+        serializer = orderSz.OrderSummarySerializer(OrderSummaryService.summary(request.user))
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        operation_summary="Seller order queue",
+        operation_description=(
+            "Order items sold by the authenticated user, earliest deadline first. "
+            "Filter with `?status=` (PENDING, IN_PROGRESS, DELIVERED, COMPLETED or CANCELED, repeatable), by default pending, in progress and delivered orders."
+        ),
+        responses={
+            200: orderSz.SellerQueueItemSerializer(many=True),
+            400: "Bad Request: Invalid status.",
+            401: "Unauthorized: Authentication credentials were not provided."
+        }
+    )
+    @action(detail=False, methods=['get'], pagination_class=DefaultPagination)
+    def queue(self, request):
+        statuses = request.query_params.getlist('status') or [Order.PENDING, Order.IN_PROGRESS, Order.DELIVERED]
+        valid = {choice for choice, _ in Order.STATUS_CHOICES}
+        invalid = [value for value in statuses if value not in valid]
+        if invalid:
+            raise ValidationError({'status': f"Invalid status: {', '.join(invalid)}"})
+        page = self.paginate_queryset(OrderService.seller_queue(request.user, statuses))
+        serializer = orderSz.SellerQueueItemSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @swagger_auto_schema(
         operation_summary="Retrieve an order",
         operation_description="Retrieve a specific order.",
@@ -324,25 +399,21 @@ class OrderViewSet(ModelViewSet):
     @action(detail=True, methods=['post'])
     def start_progress(self, request, pk=None):
         order = self.get_object()
-        job_creator = order.items.first().job.created_by
-        if request.user != job_creator:
+        if not OrderService.is_seller(order, request.user):
             raise PermissionDenied("Only the job creator can start progress on this order.")
         if order.status != Order.PENDING:
             raise ValidationError("Order must be in pending status to start progress.")
         
-        order.status = Order.IN_PROGRESS
-        order.save()
-        
-        try:
-            send_mail(
+        with transaction.atomic():
+            order.status = Order.IN_PROGRESS
+            order.save()
+            OrderService.publish_status(order, Order.PENDING)
+            queue_mail(
                 subject=f'Order {order.id} In Progress',
                 message=f'Dear {order.user.get_full_name() or order.user.email},\n\nYour order (ID: {order.id}) is now in progress.',
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[order.user.email],
-                fail_silently=False,
             )
-        except Exception as e:
-            logger.error(f"Failed to send email for order {order.id} start_progress: {str(e)}")
         
         return Response({'status': 'Order is now in progress'})
 
@@ -366,20 +437,18 @@ class OrderViewSet(ModelViewSet):
         if order.status != Order.DELIVERED:
             raise ValidationError("Order must be delivered to complete.")
         
-        order.status = Order.COMPLETED
-        order.save()
-        
-        job_creator = order.items.first().job.created_by
-        try:
-            send_mail(
-                subject=f'Order {order.id} Completed',
-                message=f'Dear {job_creator.get_full_name() or job_creator.email},\n\nThe order (ID: {order.id}) has been marked as completed by {order.user.get_full_name() or order.user.email}.',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[job_creator.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            logger.error(f"Failed to send email for order {order.id} completion: {str(e)}")
+        sellers = User.objects.filter(assigned_jobs__order=order).distinct()
+        with transaction.atomic():
+            order.status = Order.COMPLETED
+            order.save()
+            OrderService.publish_status(order, Order.DELIVERED)
+            for seller in sellers:
+                queue_mail(
+                    subject=f'Order {order.id} Completed',
+                    message=f'Dear {seller.get_full_name() or seller.email},\n\nThe order (ID: {order.id}) has been marked as completed by {order.user.get_full_name() or order.user.email}.',
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[seller.email],
+                )
         
         return Response({'status': 'Order completed'})
 
@@ -398,9 +467,13 @@ class OrderViewSet(ModelViewSet):
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         order = self.get_object()
+        previous_status = order.status
         serializer = orderSz.UpdateOrderSerializer(order, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
+            if order.status != previous_status:
+                OrderService.publish_status(order, previous_status)
         return Response({'status': f'Order status updated to {order.status}'})
 
     def get_permissions(self):
@@ -479,8 +552,9 @@ def initiate_payment(request):
 def payment_success(request):
     order_id = request.data.get("tran_id").split('_')[1]
     order = Order.objects.get(id=order_id)
-    order.status = "IN_PROGRESS"
-    order.save()
+    with transaction.atomic():
+        order.status = "IN_PROGRESS"
+        order.save()
     return redirect(f"{main_settings.FRONTEND_URL}/dashboard/orders/")
 
 
@@ -497,6 +571,7 @@ def payment_cancel(request):
 class OrderDeliveryViewSet(ModelViewSet):
     serializer_class = orderSz.OrderDeliverySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderDeliveryPagination
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -511,7 +586,7 @@ class OrderDeliveryViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="List all deliveries",
-        operation_description="Retrieve a list of deliveries for the authenticated user (as buyer or deliverer).",
+        operation_description="Retrieve a list of deliveries for the authenticated user (as buyer or deliverer). Send `?pagination=cursor` for keyset pages.",
         responses={
             200: orderSz.OrderDeliverySerializer(many=True),
             401: "Unauthorized: Authentication credentials were not provided."
@@ -537,20 +612,7 @@ class OrderDeliveryViewSet(ModelViewSet):
     def perform_create(self, serializer):
         with transaction.atomic():
             delivery = serializer.save(delivered_by=self.request.user)
-            order = delivery.order
-            order.status = Order.DELIVERED
-            order.save()
-            
-            try:
-                send_mail(
-                    subject=f'Order {order.id} Delivered',
-                    message=f'Dear {order.user.get_full_name() or order.user.email},\n\nYour order (ID: {order.id}) has been delivered by {self.request.user.get_full_name() or self.request.user.email}.\nDescription: {delivery.description}\nFile: {delivery.file.url if delivery.file else "No file"}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[order.user.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                logger.error(f"Failed to send email for order {order.id} delivery: {str(e)}")
+            OrderService.mark_delivered(delivery)
 
     @swagger_auto_schema(
         operation_summary="Retrieve a delivery",
@@ -562,4 +624,113 @@ class OrderDeliveryViewSet(ModelViewSet):
         }
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
\ No newline at end of file
+        return super().retrieve(request, *args, **kwargs)
+
+
+class DeliveryUploadViewSet(ModelViewSet):
+    """
+    Resumable, chunked upload of large delivery files: create an upload, PUT the file in chunks with a
+    Content-Range header, then complete it. The finalize_delivery_uploads worker creates the delivery.
+    """
+    serializer_class = orderSz.DeliveryUploadSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'put', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return DeliveryUpload.objects.none()
+        return DeliveryUpload.objects.filter(uploaded_by=self.request.user).order_by('-created_at')
+
+    def get_serializer_class(self):
+        if self.action in ['update', 'complete']:
+            return orderSz.EmptySerializer
+        return orderSz.DeliveryUploadSerializer
+
+    @swagger_auto_schema(
+        operation_summary="List delivery uploads",
+        operation_description="Retrieve the chunked uploads started by the authenticated user.",
+        responses={
+            200: orderSz.DeliveryUploadSerializer(many=True),
+            401: "Unauthorized: Authentication credentials were not provided."
+        }
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Start a delivery upload",
+        operation_description="Start a chunked upload of a delivery file (job creator only, order in progress). `size` is the file size in bytes, `checksum` the optional hex SHA-256 of the whole file, verified when the upload is completed.",
+        request_body=orderSz.DeliveryUploadSerializer,
+        responses={
+            201: orderSz.DeliveryUploadSerializer,
+            400: "Bad Request: Invalid order, file name, size or checksum.",
+            401: "Unauthorized: Authentication credentials were not provided."
+        }
+    )
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(uploaded_by=self.request.user)
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve a delivery upload",
+        operation_description="Retrieve an upload, `offset` is the number of bytes stored and the byte to resume from.",
+        responses={
+            200: orderSz.DeliveryUploadSerializer,
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Upload not found."
+        }
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Upload a chunk",
+        operation_description="Send the raw bytes of one chunk as the request body with `Content-Range: bytes <start>-<end>/<size>`. Chunks must start at the current offset, at most `chunk_size` bytes each. Bytes already received are skipped, so a chunk can be retried safely.",
+        request_body=orderSz.EmptySerializer,
+        responses={
+            200: orderSz.DeliveryUploadSerializer,
+            400: "Bad Request: Invalid Content-Range, chunk too large or upload completed.",
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Upload not found.",
+            409: "Conflict: The chunk starts after the current offset, resume from the returned offset."
+        }
+    )
+    def update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        # The body is read straight from the request, DRF parsers would buffer the whole chunk first
+        stream = request.stream or BytesIO()
+        upload = DeliveryUploadService.append(upload, stream, request.headers.get('Content-Range'))
+        return Response(orderSz.DeliveryUploadSerializer(upload).data)
+
+    @swagger_auto_schema(
+        operation_summary="Complete a delivery upload",
+        operation_description="Queue a fully received upload. A worker verifies the checksum, creates the delivery and marks the order delivered: poll the upload until its `status` is COMPLETED (`delivery` is then set), FAILED, or UPLOADING again with `offset` 0 and an `error` after a checksum mismatch. A FAILED upload can be completed again.",
+        request_body=orderSz.EmptySerializer,
+        responses={
+            202: orderSz.DeliveryUploadSerializer,
+            400: "Bad Request: Upload incomplete, already queued or completed, or order not in progress.",
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Upload not found."
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = DeliveryUploadService.complete(self.get_object())
+        return Response(orderSz.DeliveryUploadSerializer(upload).data, status=status.HTTP_202_ACCEPTED)
+
+    @swagger_auto_schema(
+        operation_summary="Abort a delivery upload",
+        operation_description="Delete an upload and the chunks received so far.",
+        responses={
+            204: "No Content",
+            401: "Unauthorized: Authentication credentials were not provided.",
+            404: "Not Found: Upload not found."
+        }
+    )
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        DeliveryUploadService.abort(instance)
@@ -1,14 +1,16 @@
 from django.contrib import admin
-from users.models import User, Portfolio
+from users.models import User, Portfolio, FreelancerStats
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ['email', 'first_name', 'last_name', 'location', 'display_average_rating', 'is_active', 'date_joined']
     search_fields = ['email', 'first_name', 'last_name', 'bio', 'location']
     list_filter = ['location', 'is_active']
+    list_select_related = ['freelancer_stats']
 
     def display_average_rating(self, obj):
-        return getattr(obj, 'average_rating', 0) or 0
+        stats = getattr(obj, 'freelancer_stats', None)
+        return stats.average_rating if stats else 0
     display_average_rating.short_description = 'Average Rating'
 
 
@@ -17,3 +19,11 @@ class PortfolioAdmin(admin.ModelAdmin):
     list_display = ['title', 'user', 'created_at']
     search_fields = ['title', 'description']
     list_filter = ['user']
+
+
+@admin.register(FreelancerStats)
+class FreelancerStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'total_orders', 'completed_orders', 'earnings', 'average_rating', 'review_count', 'on_time_rate', 'updated_at']
+    search_fields = ['user__email']
+    list_select_related = ['user']
+    readonly_fields = [field.name for field in FreelancerStats._meta.fields]
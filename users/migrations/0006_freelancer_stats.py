@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 04:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_freelancer_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FreelancerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='freelancer_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('completed_orders', models.PositiveIntegerField(default=0)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0)),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('on_time_deliveries', models.PositiveIntegerField(default=0)),
+                ('on_time_rate', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'freelancer stats',
+                'indexes': [models.Index(fields=['-average_rating', '-user'], name='users_freel_average_0bf772_idx'), models.Index(fields=['-total_orders', '-user'], name='users_freel_total_o_b6b511_idx')],
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from users.managers import CustomUserManager
 from cloudinary.models import CloudinaryField
+from django.contrib.postgres.indexes import GinIndex
 
 
 class User(AbstractUser):
@@ -20,6 +21,14 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Freelancer search, see users.services.FreelancerSearchService
+            GinIndex(fields=['skills'], name='user_skills_gin', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['location'], name='user_location_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['bio'], name='user_bio_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
     def __str__(self):
         return self.email
     
@@ -45,4 +54,29 @@ class Portfolio(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['user_id']),
-        ]
\ No newline at end of file
+        ]
+
+
+class FreelancerStats(models.Model):
+    """ Per-seller summary of sales, reviews and deliveries, maintained by users.services.FreelancerStatsService """
+    user = models.OneToOneField('User', on_delete=models.CASCADE, primary_key=True, related_name='freelancer_stats')
+    total_orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    earnings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    delivered_orders = models.PositiveIntegerField(default=0)
+    on_time_deliveries = models.PositiveIntegerField(default=0)
+    on_time_rate = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'freelancer stats'
+        indexes = [
+            models.Index(fields=['-average_rating', '-user']),
+            models.Index(fields=['-total_orders', '-user']),
+        ]
+
+    def __str__(self):
+        return f"Stats of {self.user_id}"
\ No newline at end of file
@@ -23,12 +23,15 @@ class PublicUserSerializer(BaseUserSerializer):
     skills = serializers.ListField(child=serializers.CharField(), required=False)
     average_rating = serializers.FloatField(read_only=True)
     total_orders = serializers.IntegerField(read_only=True)
+    completed_orders = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    on_time_rate = serializers.FloatField(read_only=True)
     location = serializers.CharField(required=False, allow_blank=True)
     full_name = serializers.SerializerMethodField()
 
     class Meta(BaseUserSerializer.Meta):
-        fields = ['id', 'first_name', 'last_name', 'full_name', 'total_orders', 'average_rating', 'location', 'bio', 'profile_picture', 'skills', 'portfolio']
-        read_only_fields = ['portfolio', 'average_rating', 'total_orders']
+        fields = ['id', 'first_name', 'last_name', 'full_name', 'total_orders', 'completed_orders', 'average_rating', 'review_count', 'on_time_rate', 'location', 'bio', 'profile_picture', 'skills', 'portfolio']
+        read_only_fields = ['portfolio', 'average_rating', 'total_orders', 'completed_orders', 'review_count', 'on_time_rate']
         ref_name = 'PublicUser'
 
     def get_full_name(self, obj):
@@ -51,10 +54,14 @@ class UserSerializer(BaseUserSerializer):
     skills = serializers.ListField(child=serializers.CharField(), required=False)
     average_rating = serializers.ReadOnlyField()
     total_orders = serializers.ReadOnlyField()
+    completed_orders = serializers.ReadOnlyField()
+    review_count = serializers.ReadOnlyField()
+    on_time_rate = serializers.ReadOnlyField()
+    earnings = serializers.ReadOnlyField()
     location = serializers.CharField(required=False, allow_blank=True)
 
     class Meta(BaseUserSerializer.Meta):
-        fields = ['id', 'email', 'first_name', 'last_name', 'total_orders', 'average_rating', 'location', 'phone_number', 'bio', 'profile_picture', 'skills', 'portfolio', 'is_staff']
+        fields = ['id', 'email', 'first_name', 'last_name', 'total_orders', 'completed_orders', 'average_rating', 'review_count', 'on_time_rate', 'earnings', 'location', 'phone_number', 'bio', 'profile_picture', 'skills', 'portfolio', 'is_staff']
         read_only_fields = ['is_staff', 'portfolio']
         ref_name = 'CustomUser'
 
@@ -0,0 +1,284 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, Count, DecimalField, Exists, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from job.models import Job, Review
+from order.models import Order, OrderDelivery, OrderItem
+from users.models import FreelancerStats
+
+
+def _ratio(numerator, denominator):
+    return Coalesce(
+        Cast(numerator, FloatField()) / Cast(NullIf(denominator, 0), FloatField()),
+        Value(0.0)
+    )
+
+
+class FreelancerStatsService:
+    @staticmethod
+    def _ensure(user_ids):
+        """ Create missing stats rows, so the F() updates below always have a row to change """
+        FreelancerStats.objects.bulk_create(
+            [FreelancerStats(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+
+    @staticmethod
+    def _apply(user_id, **deltas):
+        """
+        Summary:
+            Add deltas to a freelancer's counters and recompute the derived rates in the same UPDATE.
+
+        Args:
+            user_id: The ID of the freelancer.
+            **deltas: Counter name to change, e.g. rating_sum=5, review_count=1.
+        """
+        if user_id is None:
+            return
+        FreelancerStatsService._ensure([user_id])
+        values = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not values:
+            return
+        if 'rating_sum' in values or 'review_count' in values:
+            values['average_rating'] = _ratio(
+                values.get('rating_sum', F('rating_sum')), values.get('review_count', F('review_count'))
+            )
+        if 'delivered_orders' in values or 'on_time_deliveries' in values:
+            values['on_time_rate'] = _ratio(
+                values.get('on_time_deliveries', F('on_time_deliveries')), values.get('delivered_orders', F('delivered_orders'))
+            )
+        FreelancerStats.objects.filter(user_id=user_id).update(**values)
+
+    @staticmethod
+    def _add_sales(order, sign, count_orders, count_completed):
+        """
+        Summary:
+            Add (sign=1) or remove (sign=-1) an order's items from its sellers' counters.
+
+        Description:
+            One aggregate over the order items and one UPDATE for all sellers, so the number of queries
+            does not depend on the size of the order.
+
+        Args:
+            order: The order.
+            sign: 1 or -1.
+            count_orders: Whether to change total_orders.
+            count_completed: Whether to change completed_orders and earnings.
+        """
+        sales = list(order.items.order_by().values('freelancer').annotate(items=Count('id'), earnings=Sum('total_price')))
+        sales = [row for row in sales if row['freelancer'] is not None]
+        if not sales or not (count_orders or count_completed):
+            return
+        FreelancerStatsService._ensure([row['freelancer'] for row in sales])
+
+        def per_seller(field, key):
+            return Case(
+                *[When(user_id=row['freelancer'], then=F(field) + sign * row[key]) for row in sales],
+                default=F(field),
+                output_field=FreelancerStats._meta.get_field(field)
+            )
+
+        values = {}
+        if count_orders:
+            values['total_orders'] = per_seller('total_orders', 'items')
+        if count_completed:
+            values['completed_orders'] = per_seller('completed_orders', 'items')
+            values['earnings'] = per_seller('earnings', 'earnings')
+        FreelancerStats.objects.filter(user_id__in=[row['freelancer'] for row in sales]).update(**values)
+
+    @staticmethod
+    def add_order(order, sign=1):
+        """
+        Summary:
+            Count an order's items for their sellers, or remove them with sign=-1.
+
+        Description:
+            Order items are bulk created at checkout, which sends no signals, so OrderService calls this
+            explicitly. A completed order also counts towards completed_orders and earnings.
+
+        Args:
+            order: The order, with its items saved.
+            sign: 1 when the order is created, -1 when it is deleted.
+        """
+        FreelancerStatsService._add_sales(order, sign, True, order.status == Order.COMPLETED)
+
+    @staticmethod
+    def apply_status_change(order, previous_status):
+        """
+        Summary:
+            Move an order's items in or out of completed_orders and earnings when it enters or leaves COMPLETED.
+
+        Args:
+            order: The order after the change.
+            previous_status: The status before the change.
+        """
+        was_completed = previous_status == Order.COMPLETED
+        is_completed = order.status == Order.COMPLETED
+        if was_completed != is_completed:
+            FreelancerStatsService._add_sales(order, 1 if is_completed else -1, False, True)
+
+    @staticmethod
+    def apply_rating(job_id, rating_delta, count_delta):
+        """
+        Summary:
+            Apply a review change of a job to its seller's rating.
+
+        Args:
+            job_id: The ID of the reviewed job.
+            rating_delta: The change in the sum of ratings.
+            count_delta: The change in the number of reviews (+1, 0 or -1).
+        """
+        seller_id = Job.objects.filter(pk=job_id).values_list('created_by', flat=True).first()
+        FreelancerStatsService._apply(seller_id, rating_sum=rating_delta, review_count=count_delta)
+
+    @staticmethod
+    def record_delivery(delivery):
+        """
+        Summary:
+            Count the first delivery of a freelancer for an order, on time if it was made by the order deadline.
+
+        Args:
+            delivery: The newly created delivery.
+        """
+        earlier = OrderDelivery.objects.filter(
+            order_id=delivery.order_id, delivered_by_id=delivery.delivered_by_id, pk__lt=delivery.pk
+        )
+        if earlier.exists():
+            return
+        deadline = delivery.order.deadline
+        on_time = deadline is None or timezone.localdate(delivery.delivered_at) <= deadline
+        FreelancerStatsService._apply(delivery.delivered_by_id, delivered_orders=1, on_time_deliveries=int(on_time))
+
+    @staticmethod
+    def rebuild(users=None):
+        """
+        Summary:
+            Recompute the stats of the given users from order items, reviews and deliveries.
+
+        Description:
+            Creates rows for sellers that have none, then runs a single UPDATE with correlated subqueries,
+            so it can backfill the table or repair drift (e.g. after bulk loads or cascading deletes)
+            without loading rows into Python.
+
+        Args:
+            users: User queryset to rebuild, all users by default.
+
+        Returns:
+            int: Number of stats rows updated.
+        """
+        if users is None:
+            users = get_user_model().objects.all()
+
+        sellers = users.filter(Q(Exists(Job.objects.filter(created_by=OuterRef('pk')))) | Q(Exists(
+            OrderDelivery.objects.filter(delivered_by=OuterRef('pk'))
+        )))
+        FreelancerStatsService._ensure(sellers.values_list('pk', flat=True).iterator())
+
+        def total(queryset, group, expression, output_field=IntegerField()):
+            return Coalesce(
+                Subquery(
+                    queryset.order_by().values(group).annotate(total=expression).values('total'),
+                    output_field=output_field
+                ),
+                Value(0),
+                output_field=output_field
+            )
+
+        sales = OrderItem.objects.filter(freelancer=OuterRef('user'))
+        completed = sales.filter(order_status=Order.COMPLETED)
+        reviews = Review.objects.filter(job__created_by=OuterRef('user'))
+        # Only the first delivery of a freelancer for an order counts, like in record_delivery
+        deliveries = OrderDelivery.objects.filter(delivered_by=OuterRef('user')).exclude(Exists(
+            OrderDelivery.objects.filter(
+                order=OuterRef('order'), delivered_by=OuterRef('delivered_by'), pk__lt=OuterRef('pk')
+            )
+        ))
+        on_time = deliveries.filter(Q(order__deadline__isnull=True) | Q(delivered_at__date__lte=F('order__deadline')))
+
+        rating_sum = total(reviews, 'job__created_by', Sum('ratings'))
+        review_count = total(reviews, 'job__created_by', Count('id'))
+        delivered_orders = total(deliveries, 'delivered_by', Count('id'))
+        on_time_deliveries = total(on_time, 'delivered_by', Count('id'))
+        return FreelancerStats.objects.filter(user__in=users).update(
+            total_orders=total(sales, 'freelancer', Count('id')),
+            completed_orders=total(completed, 'freelancer', Count('id')),
+            earnings=total(completed, 'freelancer', Sum('total_price'), DecimalField(max_digits=14, decimal_places=2)),
+            rating_sum=rating_sum,
+            review_count=review_count,
+            average_rating=_ratio(rating_sum, review_count),
+            delivered_orders=delivered_orders,
+            on_time_deliveries=on_time_deliveries,
+            on_time_rate=_ratio(on_time_deliveries, delivered_orders),
+        )
+
+
+class FreelancerSearchService:
+    @staticmethod
+    def with_stats(queryset):
+        """
+        Summary:
+            Annotate users with their FreelancerStats.
+
+        Description:
+            A single LEFT JOIN on the one-to-one stats table, users without a row get zeros.
+
+        Args:
+            queryset: The user queryset to annotate.
+
+        Returns:
+            QuerySet: The annotated users.
+        """
+        return queryset.annotate(
+            total_orders=Coalesce(F('freelancer_stats__total_orders'), 0),
+            completed_orders=Coalesce(F('freelancer_stats__completed_orders'), 0),
+            review_count=Coalesce(F('freelancer_stats__review_count'), 0),
+            average_rating=Coalesce(F('freelancer_stats__average_rating'), 0.0),
+            on_time_rate=Coalesce(F('freelancer_stats__on_time_rate'), 0.0),
+            earnings=Coalesce(F('freelancer_stats__earnings'), Value(Decimal(0)), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+
+    @staticmethod
+    def search(queryset, keyword=None, skills=None, location=None, min_rating=None, sort_by=None):
+        """
+        Summary:
+            Filter and rank freelancers.
+
+        Description:
+            skills uses JSON containment on the GIN-indexed skills column. keyword and location use
+            the pg_trgm word similarity operator on the trigram-indexed bio and location columns,
+            so partial and misspelled words still match. Results are ordered by sort_by when given,
+            otherwise by relevance (sum of both similarities), then by rating.
+
+        Args:
+            queryset: Users annotated by with_stats.
+            keyword: Free text matched against the bio.
+            skills: Skills the freelancer must all have.
+            location: Free text matched against the location.
+            min_rating: Minimum average rating.
+            sort_by: rating_desc, orders_desc or created_at_desc.
+
+        Returns:
+            QuerySet: The matching users, annotated with relevance.
+        """
+        relevance = Value(0.0)
+        if keyword:
+            queryset = queryset.filter(bio__trigram_word_similar=keyword)
+            relevance = relevance + TrigramWordSimilarity(keyword, 'bio')
+        if location:
+            queryset = queryset.filter(location__trigram_word_similar=location)
+            relevance = relevance + TrigramWordSimilarity(location, 'location')
+        if skills:
+            queryset = queryset.filter(skills__contains=skills)
+        if min_rating:
+            queryset = queryset.filter(freelancer_stats__average_rating__gte=min_rating)
+
+        queryset = queryset.annotate(relevance=relevance)
+        if sort_by == 'rating_desc':
+            return queryset.order_by('-average_rating', '-relevance', '-id')
+        if sort_by == 'orders_desc':
+            return queryset.order_by('-total_orders', '-relevance', '-id')
+        if sort_by == 'created_at_desc':
+            return queryset.order_by('-date_joined', '-id')
+        return queryset.order_by('-relevance', '-average_rating', '-id')
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from job.models import Review
+from order.models import Order, OrderDelivery
+from users.services import FreelancerStatsService
+
+
+@receiver(post_save, sender=Order)
+def update_freelancer_completed_orders(sender, instance, created, **kwargs):
+    # _previous_status is loaded by order.signals.remember_order_status
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and previous_status and previous_status != instance.status:
+        FreelancerStatsService.apply_status_change(instance, previous_status)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_freelancer_orders(sender, instance, **kwargs):
+    # Runs before the items are deleted with the order
+    FreelancerStatsService.add_order(instance, sign=-1)
+
+
+@receiver(post_save, sender=Review)
+def update_freelancer_rating(sender, instance, created, **kwargs):
+    # _previous_ratings is loaded by job.signals.remember_review_rating
+    previous_ratings = getattr(instance, '_previous_ratings', None)
+    if created or previous_ratings is None:
+        FreelancerStatsService.apply_rating(instance.job_id, instance.ratings, 1)
+    elif previous_ratings != instance.ratings:
+        FreelancerStatsService.apply_rating(instance.job_id, instance.ratings - previous_ratings, 0)
+
+
+@receiver(post_delete, sender=Review)
+def remove_freelancer_rating(sender, instance, **kwargs):
+    previous_ratings = getattr(instance, '_previous_ratings', None)
+    ratings = instance.ratings if previous_ratings is None else previous_ratings
+    FreelancerStatsService.apply_rating(instance.job_id, -ratings, -1)
+
+
+@receiver(post_save, sender=OrderDelivery)
+def record_freelancer_delivery(sender, instance, created, **kwargs):
+    if created:
+        FreelancerStatsService.record_delivery(instance)
@@ -1,3 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from job.models import Category, Job, JobPrice, Review
+from order.models import Cart, Order, OrderDelivery
+from order.services import CartService, OrderService
+from users.models import FreelancerStats
+from users.services import FreelancerSearchService, FreelancerStatsService
 
-# Create your tests here.
+
+User = get_user_model()
+
+STATS = [
+    'total_orders', 'completed_orders', 'earnings', 'rating_sum', 'review_count', 'average_rating',
+    'delivered_orders', 'on_time_deliveries', 'on_time_rate',
+]
+
+
+class FreelancerStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(email='buyer@example.com', password='Test@123')
+        cls.seller = User.objects.create_user(email='seller@example.com', password='Test@123')
+        cls.other_seller = User.objects.create_user(email='other@example.com', password='Test@123')
+        category = Category.objects.create(name='Web Development')
+        cls.website, cls.logo = [
+            Job.objects.create(
+                name=name, description='Details', price=JobPrice.objects.create(price=Decimal(price)),
+                category=category, created_by=seller, duration_days=3,
+            )
+            for name, price, seller in [
+                ('I will build a website', '100.00', cls.seller), ('I will design a logo', '40.00', cls.other_seller)
+            ]
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def place_order(self, *jobs):
+        cart = Cart.objects.create(user=self.buyer)
+        CartService.bulk_update_items(cart, [{'job_id': job.pk, 'quantity': 1} for job in jobs])
+        return OrderService.create_order(self.buyer, cart.pk)
+
+    def post(self, user, path):
+        self.client.force_authenticate(user)
+        response = self.client.post(path)
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def assertMatchesRebuild(self):
+        maintained = {row.pop('pk'): row for row in FreelancerStats.objects.values('pk', *STATS)}
+        FreelancerStatsService.rebuild()
+        for row in FreelancerStats.objects.values('pk', *STATS):
+            # rebuild also creates rows for sellers without any activity yet
+            self.assertEqual(maintained.get(row.pop('pk'), dict.fromkeys(STATS, 0)), row)
+
+    def stats(self, user):
+        return FreelancerSearchService.with_stats(User.objects.filter(pk=user.pk)).get()
+
+    def test_order_lifecycle_and_reviews(self):
+        order = self.place_order(self.website, self.logo)
+        self.assertEqual(self.stats(self.seller).total_orders, 1)
+        self.assertMatchesRebuild()
+
+        self.post(self.seller, f'/api/v1/orders/{order.pk}/start_progress/')
+        delivery = OrderDelivery.objects.create(order=order, delivered_by=self.seller, description='Done')
+        OrderService.mark_delivered(delivery)
+        self.post(self.buyer, f'/api/v1/orders/{order.pk}/complete/')
+        stats = self.stats(self.seller)
+        self.assertEqual((stats.completed_orders, stats.earnings, stats.on_time_rate), (1, Decimal('100.00'), 1.0))
+        self.assertMatchesRebuild()
+
+        review = Review.objects.create(job=self.website, user=self.buyer, ratings=5, comment='Great')
+        Review.objects.create(job=self.website, user=self.other_seller, ratings=2, comment='Slow')
+        review.ratings = 3
+        review.save()
+        stats = self.stats(self.seller)
+        self.assertEqual((stats.review_count, stats.average_rating), (2, 2.5))
+        self.assertMatchesRebuild()
+
+        review.delete()
+        self.assertEqual(self.stats(self.seller).average_rating, 2.0)
+        self.assertMatchesRebuild()
+
+    def test_reopened_and_deleted_orders(self):
+        order = self.place_order(self.website)
+        order.status = Order.COMPLETED
+        order.save()
+        self.assertEqual(self.stats(self.seller).earnings, Decimal('100.00'))
+
+        # An admin moving the order out of COMPLETED takes the earnings back
+        order.status = Order.DELIVERED
+        order.save()
+        self.assertEqual((self.stats(self.seller).completed_orders, self.stats(self.seller).earnings), (0, Decimal('0.00')))
+        self.assertMatchesRebuild()
+
+        late = self.place_order(self.website)
+        late.deadline = timezone.localdate() - timedelta(days=1)
+        late.status = Order.IN_PROGRESS
+        late.save()
+        OrderDelivery.objects.create(order=late, delivered_by=self.seller, description='Late')
+        self.assertEqual(self.stats(self.seller).on_time_rate, 0.0)
+        self.assertMatchesRebuild()
+
+        order.delete()
+        self.assertEqual(self.stats(self.seller).total_orders, 1)
+        self.assertMatchesRebuild()
@@ -4,10 +4,11 @@ from users.models import User, Portfolio
 from users.serializers import UserSerializer, PublicUserSerializer, PortfolioSerializer, FreelancerSearchSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Avg, Count
 from rest_framework.exceptions import PermissionDenied
 from drf_yasg.utils import swagger_auto_schema
 from django.db.models import Prefetch
+from job.paginations import DefaultPagination
+from users.services import FreelancerSearchService
 
 
 class UserProfileViewSet(ModelViewSet):
@@ -18,10 +19,9 @@ class UserProfileViewSet(ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return User.objects.none()
         
-        base_qs = User.objects.annotate(
-            total_orders=Count('created_jobs__order_items', distinct=True),
-            average_rating=Avg('created_jobs__reviews__ratings')
-        ).prefetch_related(Prefetch('portfolio', queryset=Portfolio.objects.all()))
+        base_qs = FreelancerSearchService.with_stats(User.objects.all()).prefetch_related(
+            Prefetch('portfolio', queryset=Portfolio.objects.all())
+        )
 
         if self.request.user.is_staff:
             return base_qs
@@ -81,7 +81,7 @@ class UserProfileViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Search freelancers",
-        operation_description="Search freelancers by keyword, skills, location, minimum rating, or sort by rating, orders, or join date. Publicly accessible.",
+        operation_description="Search freelancers by keyword (bio), skills, location and minimum rating, ranked by relevance unless `sort_by` (rating, orders or join date) is given. Paginated with `?page=`. Publicly accessible.",
         query_serializer=FreelancerSearchSerializer,
         responses={
             200: PublicUserSerializer(many=True),
@@ -94,34 +94,19 @@ class UserProfileViewSet(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        portfolio_prefetch = Prefetch('portfolio',queryset=Portfolio.objects.select_related('user').all())
-
-        queryset = User.objects.annotate(
-            total_orders=Count('created_jobs__order_items', distinct=True),
-            average_rating=Avg('created_jobs__reviews__ratings')
-        ).prefetch_related(portfolio_prefetch)
-
-        if data.get('keyword'):
-            queryset = queryset.filter(
-                Q(bio__icontains=data['keyword'])
-            )
-        if data.get('skills'):
-            queryset = queryset.filter(skills__contains=data['skills'])
-        if data.get('location'):
-            queryset = queryset.filter(location__icontains=data['location'])
-        if data.get('min_rating'):
-            queryset = queryset.annotate(avg_rating=Avg('created_jobs__reviews__ratings')).filter(avg_rating__gte=data['min_rating'])
-
-        sort_by = data.get('sort_by')
-        if sort_by == 'rating_desc':
-            queryset = queryset.annotate(avg_rating=Avg('created_jobs__reviews__ratings')).order_by('-avg_rating')
-        elif sort_by == 'orders_desc':
-            queryset = queryset.annotate(total_orders=Count('created_jobs__order_items')).order_by('-total_orders')
-        elif sort_by == 'created_at_desc':
-            queryset = queryset.order_by('-date_joined')
-
-        serializer = PublicUserSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = FreelancerSearchService.search(
+            FreelancerSearchService.with_stats(User.objects.all()),
+            keyword=data.get('keyword'),
+            skills=data.get('skills'),
+            location=data.get('location'),
+            min_rating=data.get('min_rating'),
+            sort_by=data.get('sort_by'),
+        ).prefetch_related(Prefetch('portfolio', queryset=Portfolio.objects.all()))
+
+        paginator = DefaultPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = PublicUserSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class PortfolioViewSet(ModelViewSet):